@@ -0,0 +1,127 @@
+"""
+One consistent version of the catalogue artefacts the handlers read.
+
+The metadata, kNN model, preprocessor, indexes built from the metadata,
+facets and user profiles live together on an ArtefactBundle, published as
+app.state.catalogue. A handler reads app.state.catalogue once and uses that
+bundle to the end of the request. A reload builds a whole new bundle beside
+the live one, validates it and publishes it with a single assignment:
+requests in flight finish on the bundle they started with, and the old one
+is freed with its last reference.
+
+signature() records the size and modification time of every file an
+artefact is read from. A reload keeps the previous bundle's objects for the
+artefacts whose files did not change, so it only pays for what was replaced.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+# artefact name -> attributes of the bundle built from it
+ARTEFACTS = {
+    "metadata": ("wine_metadata_df",),
+    "model": ("model",),
+    "preprocessor": ("preprocessor",),
+    "facets": ("facets", "facets_body", "facets_etag"),
+    "user_profiles": ("user_store",),
+}
+
+
+def file_signature(paths) -> List:
+    """(path, size, mtime_ns) of each existing file of paths."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def signature(files: Dict[str, List[str]]) -> Dict[str, List]:
+    """File signature of every artefact, from artefact name -> the files it is read from."""
+    return {name: file_signature(paths) for name, paths in files.items()}
+
+
+class ArtefactBundle:
+    """
+    The artefacts of one catalogue version (see module docstring). Attributes
+    left None were not loaded.
+    """
+
+    def __init__(self, files_signature: Optional[Dict[str, List]] = None):
+        self.wine_metadata_df = None
+        self.model = None
+        self.preprocessor = None
+        self.name_index = None
+        self.suggesters = None
+        self.facets = self.facets_body = self.facets_etag = None
+        self.user_store = None
+        self.signature = files_signature or {}
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.timings = {}
+        self.warmup = None
+
+    @property
+    def version(self) -> str:
+        """Short hash of the files' signature: which files the bundle was built from."""
+        return hashlib.sha1(json.dumps(self.signature, sort_keys=True).encode()).hexdigest()[:12]
+
+    def reuse(self, previous: Optional["ArtefactBundle"], *names: str, attributes=None) -> bool:
+        """
+        Take attributes (default: those of the artefacts names) from previous
+        when the files of all names are unchanged since it was built.
+        """
+        if previous is None or any(self.signature.get(name) != previous.signature.get(name) for name in names):
+            return False
+        attributes = attributes or [attribute for name in names for attribute in ARTEFACTS[name]]
+        if any(getattr(previous, attribute) is None for attribute in attributes):
+            return False
+        for attribute in attributes:
+            setattr(self, attribute, getattr(previous, attribute))
+        return True
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "rows": len(self.wine_metadata_df) if self.wine_metadata_df is not None else None,
+        }
+
+
+def validate_bundle(bundle: ArtefactBundle) -> List[str]:
+    """
+    Problems that make a bundle unfit to serve: missing metadata or model,
+    or artefacts that do not line up with each other. Empty when it is fit.
+    """
+    if bundle.wine_metadata_df is None or bundle.model is None:
+        return ["metadata or model not loaded"]
+
+    problems = []
+    rows, width = bundle.model._fit_X.shape
+    # row i of the model is row i of the metadata (name index, user profiles, recommend-by-wine)
+    if len(bundle.wine_metadata_df) != rows:
+        problems.append(f"metadata has {len(bundle.wine_metadata_df)} rows but the model {rows}")
+
+    if bundle.preprocessor is None:
+        problems.append("preprocessor not loaded")
+    else:
+        from cv_functions.encoder import get_feature_names_out
+
+        encoded = len(get_feature_names_out(bundle.preprocessor))
+        if encoded != width:
+            problems.append(f"preprocessor encodes {encoded} features but the model was fitted on {width}")
+
+    if bundle.facets is not None and bundle.facets.get("n_wines", len(bundle.wine_metadata_df)) != len(bundle.wine_metadata_df):
+        problems.append(f"facets count {bundle.facets['n_wines']} wines, the metadata {len(bundle.wine_metadata_df)}")
+
+    store = bundle.user_store
+    if store is not None and store.n_users:
+        if store.centroids.shape[1] != width:
+            problems.append(f"user profiles have {store.centroids.shape[1]} features, the model {width}")
+        if len(store.rated_rows_all) and int(store.rated_rows_all.max()) >= rows:
+            problems.append(f"user profiles refer to row {int(store.rated_rows_all.max())} of a {rows}-row model")
+    return problems
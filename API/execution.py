@@ -0,0 +1,187 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from cv_functions.tracing import span
+
+RETRY_AFTER_SECONDS = int(os.environ.get("API_RETRY_AFTER", 1))
+# latency samples kept per pool for the percentiles in stats()
+SAMPLE_SIZE = 2048
+
+
+def _percentiles(samples) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    values = np.fromiter(samples, dtype=np.float64) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+class WorkPool:
+    """
+    Named thread pool for one kind of blocking work, so kNN searches and image
+    decoding do not compete with each other (or with Starlette's default pool
+    that sync handlers use).
+
+    Records, per task, the time spent waiting for a free thread (queue time)
+    and the time spent running.
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"cvino-{name}")
+        self._lock = threading.Lock()
+        self._queue_times = deque(maxlen=SAMPLE_SIZE)
+        self._run_times = deque(maxlen=SAMPLE_SIZE)
+        self.completed = 0
+        self.pending = 0
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run function(*args, **kwargs) on the pool and await its result."""
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._queue_times.append(started - submitted)
+                    self._run_times.append(finished - started)
+                    self.completed += 1
+
+        # run in a copy of the caller's context, so tracing spans reach the request's trace
+        context = contextvars.copy_context()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, task)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queue_times, run_times = list(self._queue_times), list(self._run_times)
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "completed": self.completed,
+            "queue_time": _percentiles(queue_times),
+            "run_time": _percentiles(run_times),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._queue_times.clear()
+            self._run_times.clear()
+            self.completed = 0
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class ConcurrencyLimit:
+    """
+    Cap on the requests of one endpoint in flight in this worker.
+
+    Used as "async with limit:"; when the cap is reached the request is turned
+    away at once with 503 and a Retry-After header instead of queueing behind
+    the others, so an overloaded worker sheds load rather than letting latency
+    grow without bound. Counters live on the event loop thread, no lock needed.
+    """
+
+    def __init__(self, name: str, max_in_flight: int, retry_after: int = RETRY_AFTER_SECONDS):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    async def __aenter__(self):
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Too many concurrent {self.name} requests, retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.in_flight += 1
+        self.accepted += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+        }
+
+
+class StartupGate:
+    """
+    ASGI middleware holding requests while the app warms up in the background.
+
+    app.state.loading is the warm-up task (None once started synchronously).
+    Until it is done, a request waits for it up to wait seconds and then gets
+    503 with Retry-After; exempt paths (probes, docs) are always answered at once.
+    """
+
+    def __init__(self, app, exempt_paths=(), wait: float = 30.0, retry_after: int = RETRY_AFTER_SECONDS):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+        self.wait = wait
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in self.exempt_paths:
+            loading = getattr(scope["app"].state, "loading", None)
+            if loading is not None and not loading.done():
+                try:
+                    with span("startup.wait"):
+                        await asyncio.wait_for(asyncio.shield(loading), timeout=self.wait)
+                except asyncio.TimeoutError:
+                    response = JSONResponse(
+                        status_code=503,
+                        content={"detail": "Starting up, retry shortly"},
+                        headers={"Retry-After": str(self.retry_after)},
+                    )
+                    await response(scope, receive, send)
+                    return
+                except Exception:
+                    pass  # a failed load surfaces from the endpoints themselves
+        await self.app(scope, receive, send)
+
+
+def endpoint_limit(name: str, default: int) -> ConcurrencyLimit:
+    """
+    ConcurrencyLimit for an endpoint, overridable with API_MAX_IN_FLIGHT_<NAME>
+    (e.g. API_MAX_IN_FLIGHT_READ_IMAGE for "read-image").
+    """
+    variable = "API_MAX_IN_FLIGHT_" + name.upper().replace("-", "_")
+    return ConcurrencyLimit(name, int(os.environ.get(variable, default)))
+
+
+def default_workers(variable: str, default: int) -> int:
+    return max(1, int(os.environ.get(variable, 0)) or default)
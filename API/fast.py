@@ -1,25 +1,115 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from contextlib import asynccontextmanager
 import pandas as pd
+import asyncio
 import os
-import joblib
-
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from PIL import Image
-from io import BytesIO
+import json
+import hashlib
+import hmac
+import time
+from collections import deque
 
+from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 
-from cv_functions.recommendation import get_wine_recommendations_by_characteristics
+from cv_functions.recommendation import get_wine_recommendations_by_characteristics, get_wine_recommendations_by_wine
 from cv_functions.food_recommendation import get_wine_recommendations_by_food
-from cv_functions.wine_label_ai2 import extract_wine_info_from_image
-from cv_functions.model import load_model
-
-app = FastAPI()
-
+from cv_functions.wine_label_ai2 import close_async_clients, decode_label_image
+from cv_functions.label_engine import LABEL_ENGINE, extract_wine_info, decode_size, warm_local_engine, close_local_engine
+from cv_functions.model import load_model, load_shared_model
+from cv_functions.user_recommendation import UserProfileStore, get_wine_recommendations_for_user
+from cv_functions.label_cache import LabelCache
+from cv_functions.name_index import WineNameIndex
+from cv_functions.facets import load_facets
+from API.responses import FastJSONResponse, records, wines_response
+from API.execution import StartupGate, WorkPool, default_workers, endpoint_limit
+from API.warmup import warm_up
+from API.bundle import ArtefactBundle, file_signature, signature, validate_bundle
+from API.metrics import TracingMiddleware, metrics_response
+from cv_functions.tracing import span
+from cv_functions.suggest import SUGGEST_FIELDS, MAX_SUGGESTIONS, build_suggesters, suggest
+
+# Startup: the app listens as soon as this module is imported; the artefacts
+# load in the lifespan, in the background unless API_BACKGROUND_STARTUP=0.
+# Until they are loaded /healthz answers, /readyz says 503, and other requests
+# wait for them (up to API_STARTUP_WAIT seconds, then 503 + Retry-After).
+BACKGROUND_STARTUP = os.environ.get("API_BACKGROUND_STARTUP", "1") != "0"
+STARTUP_WAIT = float(os.environ.get("API_STARTUP_WAIT", 30))
+PROBE_PATHS = ("/healthz", "/readyz", "/", "/docs", "/redoc", "/openapi.json")
+# rounds of synthetic queries each worker runs before reporting ready (0 disables)
+WARMUP_ROUNDS = int(os.environ.get("API_WARMUP_ROUNDS", 3))
+# Reloads: POST /admin/reload with the X-Admin-Token header (disabled unless API_ADMIN_TOKEN
+# is set), and/or a watcher polling the artefact files every API_RELOAD_POLL seconds (0: off)
+ADMIN_TOKEN = os.environ.get("API_ADMIN_TOKEN", "")
+RELOAD_POLL = float(os.environ.get("API_RELOAD_POLL", 0))
+# query rounds warming a reloaded bundle; 0 only pages its model in, the process being warm already
+RELOAD_WARMUP_ROUNDS = int(os.environ.get("API_RELOAD_WARMUP_ROUNDS", 0))
+RELOAD_HISTORY = 20
+# most wines one recommendation request may ask for: a large n projects much of the catalogue
+MAX_RECOMMENDATIONS = int(os.environ.get("API_MAX_RECOMMENDATIONS", 50))
+
+
+async def start_up():
+    if not app.state.loaded:
+        await run_in_threadpool(load_artifacts)
+    # build the local OCR engine once per worker, before the first upload
+    if LABEL_ENGINE != "remote":
+        try:
+            version = await run_in_threadpool(warm_local_engine)
+            print(f"✅ Local label engine ready (tesseract {version}, mode {LABEL_ENGINE}).")
+        except Exception as e:
+            print(f"❌ Failed to warm up the local label engine: {e}")
+    # per worker, after any fork: pool threads, BLAS and page residency are per process
+    catalogue = app.state.catalogue
+    if WARMUP_ROUNDS > 0 and catalogue.model is not None and catalogue.wine_metadata_df is not None:
+        try:
+            catalogue.warmup = await warm_up(catalogue, app.state.recommend_pool, WARMUP_ROUNDS)
+            app.state.startup_timings["warmup"] = catalogue.warmup["seconds"]
+            # /execution/stats reports real traffic only (warm-up spans never reach /metrics)
+            app.state.recommend_pool.reset_stats()
+            print(f"✅ Warm-up done in {catalogue.warmup['seconds']:.2f}s "
+                  f"({len(catalogue.warmup['queries'])} queries x {WARMUP_ROUNDS} rounds).")
+        except Exception as e:
+            print(f"❌ Warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if BACKGROUND_STARTUP:
+        app.state.loading = asyncio.create_task(start_up())
+    else:
+        await start_up()
+    if RELOAD_POLL > 0:
+        app.state.watcher = asyncio.create_task(watch_artefacts(RELOAD_POLL))
+    yield
+    if app.state.watcher is not None:
+        app.state.watcher.cancel()
+    # release the pooled connections of the label-extraction client
+    await close_async_clients()
+    close_local_engine()
+    app.state.recommend_pool.shutdown()
+    app.state.image_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Execution model: recommendation work (kNN searches, pandas filtering) and image
+# decoding each run on their own sized thread pool, off the event loop. Every
+# endpoint caps its requests in flight per worker and answers 503 + Retry-After
+# beyond that (override with API_MAX_IN_FLIGHT_<ENDPOINT>).
+app.state.recommend_pool = WorkPool("recommend", default_workers("API_RECOMMEND_WORKERS", min(4, os.cpu_count() or 1)))
+app.state.image_pool = WorkPool("image", default_workers("API_IMAGE_WORKERS", 2))
+LIMITS = {
+    "recommend-wines": endpoint_limit("recommend-wines", 32),
+    "recommend-by-food": endpoint_limit("recommend-by-food", 16),
+    "recommend-for-user": endpoint_limit("recommend-for-user", 32),
+    "read-image": endpoint_limit("read-image", 16),
+}
+
+app.add_middleware(StartupGate, exempt_paths=PROBE_PATHS, wait=STARTUP_WAIT)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -27,25 +117,287 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost: times whole requests, startup waits included (API_SERVER_TIMING=1 adds the header)
+app.add_middleware(TracingMiddleware)
+
+# Artefacts: the catalogue version being served is app.state.catalogue (API/bundle.py),
+# filled in by load_artifacts() and replaced as a whole by reload_artifacts()
+app.state.loaded = False
+app.state.loading = None
+app.state.startup_timings = {}
+app.state.catalogue = ArtefactBundle()
+app.state.reloads = deque(maxlen=RELOAD_HISTORY)
+app.state.reload_lock = asyncio.Lock()
+app.state.watcher = None
+app.state.label_cache = None
+
+# where the catalogue and the fitted models are read from (e.g. a synthetic deployment for load tests)
+DATA_DIR = os.environ.get("API_DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data")))
+MODELS_DIR = os.environ.get("API_MODELS_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models")))
+METADATA_PATH = os.path.join(DATA_DIR, "wine_metadata.csv")
+FACETS_PATH = os.path.join(DATA_DIR, "facets.json")
+LOCAL_MODEL_PATH = os.path.join(MODELS_DIR, "trained_model.pkl")
+PREPROCESSOR_PATH = os.path.join(MODELS_DIR, "preprocessor.pkl")
+USER_PROFILES_PATH = os.path.join(MODELS_DIR, "user_profiles")
+# set LABEL_CACHE_PATH to an empty string to disable the label-extraction cache
+LABEL_CACHE_PATH = os.environ.get("LABEL_CACHE_PATH", os.path.join(DATA_DIR, "label_cache.sqlite"))
+NAME_MIN_SCORE = float(os.environ.get("LABEL_NAME_MIN_SCORE", 0.6))
+
+
+def artefact_files():
+    """Artefact name -> the files it is read from (what reloads and the watcher compare)."""
+    user_profiles = sorted(os.listdir(USER_PROFILES_PATH)) if os.path.isdir(USER_PROFILES_PATH) else []
+    return {
+        "metadata": [METADATA_PATH],
+        # the memory-mappable export is rewritten when it was made from another pickle
+        "model": [LOCAL_MODEL_PATH],
+        "preprocessor": [PREPROCESSOR_PATH],
+        "facets": [FACETS_PATH],
+        "user_profiles": [os.path.join(USER_PROFILES_PATH, name) for name in user_profiles],
+    }
+
+
+def load_metadata_and_model(catalogue, previous=None):
+    # Load precomputed metadata and model
+    try:
+        if not catalogue.reuse(previous, "metadata"):
+            catalogue.wine_metadata_df = pd.read_csv(METADATA_PATH)
+            print("✅ Metadata loaded.")
+
+        if not catalogue.reuse(previous, "model"):
+            # memory-mapped by default: every worker process shares one copy of the fitted matrix
+            if os.environ.get("MODEL_MMAP", "1") != "0":
+                catalogue.model = load_shared_model(LOCAL_MODEL_PATH)
+            else:
+                catalogue.model = load_model(LOCAL_MODEL_PATH)
+            print("✅ Model loaded successfully!")
+
+            if catalogue.model is None:
+                print("❌ Warning: Model loaded but is None!")
+    except Exception as e:
+        catalogue.wine_metadata_df = None
+        catalogue.model = None
+        print(f"❌ Failed to load metadata or model: {e}")
+
+
+def load_feature_encoder(catalogue, previous=None):
+    # the feature encoder of /recommend-wines (and the sklearn import it needs)
+    try:
+        if not catalogue.reuse(previous, "preprocessor"):
+            from cv_functions.encoder import load_preprocessor
+            # read afresh: each bundle encodes queries with its own preprocessor
+            catalogue.preprocessor = load_preprocessor(PREPROCESSOR_PATH, cached=False)
+            print("✅ Preprocessor loaded.")
+    except Exception as e:
+        catalogue.preprocessor = None
+        print(f"❌ Failed to load preprocessor: {e}")
+    # the vision API SDK, imported by the remote and tiered label engines on first use
+    if LABEL_ENGINE != "local":
+        import anthropic  # noqa: F401
 
 
-# Load precomputed metadata and model
-try:
-    metadata_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data", "wine_metadata.csv"))
-    app.state.wine_metadata_df = pd.read_csv(metadata_path)
-    print("✅ Metadata loaded.")
+def build_name_index(catalogue, previous=None):
+    # Index wine and winery names so label readings can be resolved to catalogue wines
+    try:
+        if catalogue.reuse(previous, "metadata", attributes=["name_index"]):
+            return
+        catalogue.name_index = WineNameIndex(catalogue.wine_metadata_df) if catalogue.wine_metadata_df is not None else None
+        if catalogue.name_index is not None:
+            print(f"✅ Wine name index built ({len(catalogue.name_index)} wines).")
+    except Exception as e:
+        catalogue.name_index = None
+        print(f"❌ Failed to build wine name index: {e}")
+
+
+def build_suggestion_indexes(catalogue, previous=None):
+    # Prefix indexes behind the /suggest typeahead
+    try:
+        if catalogue.reuse(previous, "metadata", attributes=["suggesters"]):
+            return
+        catalogue.suggesters = build_suggesters(catalogue.wine_metadata_df) if catalogue.wine_metadata_df is not None else None
+        if catalogue.suggesters is not None:
+            print("✅ Suggestion indexes built.")
+    except Exception as e:
+        catalogue.suggesters = None
+        print(f"❌ Failed to build suggestion indexes: {e}")
+
+
+def load_filter_facets(catalogue, previous=None):
+    # Filter lookup tables for the UIs, rebuilt when the metadata is newer than facets.json
+    try:
+        if catalogue.reuse(previous, "metadata", "facets"):
+            return
+        catalogue.facets = load_facets(catalogue.wine_metadata_df, METADATA_PATH, FACETS_PATH) if catalogue.wine_metadata_df is not None else None
+        # load_facets may have just rewritten facets.json: that is not a new version
+        catalogue.signature["facets"] = file_signature([FACETS_PATH])
+        # serialized once: the payload never changes while the bundle is served
+        catalogue.facets_body = json.dumps(catalogue.facets, ensure_ascii=False).encode("utf-8") if catalogue.facets else None
+        catalogue.facets_etag = f'"{hashlib.sha1(catalogue.facets_body).hexdigest()}"' if catalogue.facets_body else None
+        if catalogue.facets is not None:
+            print("✅ Facets loaded.")
+    except Exception as e:
+        catalogue.facets = catalogue.facets_body = catalogue.facets_etag = None
+        print(f"❌ Failed to load facets: {e}")
+
+
+def load_user_profiles(catalogue, previous=None):
+    # Load the per-user profile store (memory-mapped, optional)
+    try:
+        if catalogue.reuse(previous, "user_profiles"):
+            return
+        catalogue.user_store = UserProfileStore(USER_PROFILES_PATH)
+        print(f"✅ User profiles loaded ({catalogue.user_store.n_users} users).")
+    except Exception as e:
+        catalogue.user_store = None
+        print(f"❌ Failed to load user profiles: {e}")
 
-    # Load model path
-    LOCAL_MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "trained_model.pkl"))
-    app.state.model = load_model(LOCAL_MODEL_PATH)
-    print("✅ Model loaded successfully!")
 
-    if app.state.model is None:
-        print("❌ Warning: Model loaded but is None!")
-except Exception as e:
-    app.state.wine_metadata_df = None
-    app.state.model = None
-    print(f"❌ Failed to load metadata or model: {e}")
+def open_label_cache():
+    # Open the label-extraction cache
+    try:
+        app.state.label_cache = LabelCache(
+            LABEL_CACHE_PATH,
+            max_entries=int(os.environ.get("LABEL_CACHE_MAX_ENTRIES", 10000)),
+            memory_entries=int(os.environ.get("LABEL_CACHE_MEMORY_ENTRIES", 512)),
+            phash_distance=int(os.environ.get("LABEL_CACHE_PHASH_DISTANCE", 4)),
+        ) if LABEL_CACHE_PATH else None
+        print("✅ Label cache opened." if app.state.label_cache else "Label cache disabled.")
+    except Exception as e:
+        app.state.label_cache = None
+        print(f"❌ Failed to open label cache: {e}")
+
+
+# Loading steps of a bundle, in order; each reports its own failure and leaves its artefacts None.
+# Given the previous bundle, a step keeps its artefacts when their files are unchanged.
+STARTUP_STEPS = [
+    ("metadata_and_model", load_metadata_and_model),
+    ("preprocessor", load_feature_encoder),
+    ("name_index", build_name_index),
+    ("suggestion_indexes", build_suggestion_indexes),
+    ("facets", load_filter_facets),
+    ("user_profiles", load_user_profiles),
+]
+
+
+def load_bundle(previous=None):
+    """Build an artefact bundle from the files on disk (blocking), reusing what is unchanged in previous."""
+    catalogue = ArtefactBundle(signature(artefact_files()))
+    started = time.perf_counter()
+    for step, load in STARTUP_STEPS:
+        step_started = time.perf_counter()
+        load(catalogue, previous)
+        catalogue.timings[step] = round(time.perf_counter() - step_started, 3)
+    catalogue.timings["total"] = round(time.perf_counter() - started, 3)
+    return catalogue
+
+
+def load_artifacts():
+    """
+    Load every artefact (blocking): the first bundle, then the label cache.
+    Run by the lifespan, or by the master of API/serve.py before it forks the workers.
+    """
+    started = time.perf_counter()
+    app.state.catalogue = load_bundle()
+    app.state.startup_timings.update(app.state.catalogue.timings)
+    step_started = time.perf_counter()
+    open_label_cache()
+    app.state.startup_timings["label_cache"] = round(time.perf_counter() - step_started, 3)
+    app.state.startup_timings["total"] = round(time.perf_counter() - started, 3)
+    app.state.loaded = True
+    print(f"✅ Artefacts loaded in {app.state.startup_timings['total']:.2f}s (version {app.state.catalogue.version}).")
+
+
+async def reload_artifacts(trigger: str, force: bool = False):
+    """
+    Load the artefacts changed on disk into a new bundle, off the event loop,
+    validate and warm it, then make it the one new requests use. The live
+    bundle serves throughout, and stays if the new one is unfit.
+
+    Returns:
+        dict: status (reloaded, unchanged or rejected), versions, problems, timings
+    """
+    async with app.state.reload_lock:
+        previous = app.state.catalogue
+        started = time.perf_counter()
+        result = {"trigger": trigger, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "previous_version": previous.version}
+        if not force and signature(artefact_files()) == previous.signature:
+            return {**result, "status": "unchanged", "version": previous.version}
+
+        # the default thread pool: the recommend pool keeps serving requests meanwhile
+        catalogue = await run_in_threadpool(load_bundle, None if force else previous)
+        result.update(version=catalogue.version, timings=catalogue.timings)
+        problems = validate_bundle(catalogue)
+        if problems:
+            result.update(status="rejected", problems=problems)
+            print(f"❌ Reload ({trigger}) rejected, still serving {previous.version}: {'; '.join(problems)}")
+        else:
+            # paged in before it takes traffic; query rounds would hold the recommend pool from live requests
+            try:
+                catalogue.warmup = await warm_up(catalogue, app.state.recommend_pool, RELOAD_WARMUP_ROUNDS)
+            except Exception as e:
+                print(f"❌ Warm-up of the reloaded artefacts failed: {e}")
+            # the swap: one reference assignment
+            app.state.catalogue = catalogue
+            result["status"] = "reloaded"
+            print(f"✅ Reloaded ({trigger}): version {previous.version} -> {catalogue.version} "
+                  f"in {time.perf_counter() - started:.2f}s.")
+
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        app.state.reloads.append(result)
+        return result
+
+
+async def watch_artefacts(interval: float):
+    """
+    Reload when the artefact files change. A change is picked up once the
+    files are the same at two polls in a row, so a bundle is not built from
+    an update still being written.
+    """
+    seen = rejected = None
+    while True:
+        await asyncio.sleep(interval)
+        if not app.state.loaded:
+            continue
+        try:
+            current = await run_in_threadpool(lambda: signature(artefact_files()))
+            if current != app.state.catalogue.signature and current == seen and current != rejected:
+                result = await reload_artifacts("watcher")
+                # a rejected version is retried only once its files change again
+                rejected = current if result["status"] == "rejected" else None
+            seen = current
+        except Exception as e:
+            print(f"❌ Artefact watcher: {e}")
+
+
+def after_fork():
+    """
+    Reset the state a worker forked from a preloading master (API/serve.py)
+    must not share with its siblings. Everything else loaded above is shared
+    copy-on-write.
+    """
+    if app.state.label_cache is not None:
+        app.state.label_cache.reopen()
+
+
+MAX_UPLOAD_BYTES = int(os.environ.get("LABEL_MAX_UPLOAD_BYTES", 15 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+async def read_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Read an upload chunk by chunk, giving up as soon as it exceeds max_bytes.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload larger than {max_bytes} bytes")
+
+    chunks, size = [], 0
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 
 class WineRequest(BaseModel):
     wine_type: str = "Red"
@@ -55,7 +407,7 @@ class WineRequest(BaseModel):
     acidity: Optional[str] = None
     country: Optional[str] = None
     region_name: Optional[str] = None
-    n_recommendations: int = 5
+    n_recommendations: int = Field(5, ge=1, le=MAX_RECOMMENDATIONS)
 
 
 class FoodWineRequest(BaseModel):
@@ -67,7 +419,7 @@ class FoodWineRequest(BaseModel):
     acidity: Optional[str] = None
     country: Optional[str] = None
     region_name: Optional[str] = None
-    n_recommendations: int = 5
+    n_recommendations: int = Field(5, ge=1, le=MAX_RECOMMENDATIONS)
     exact_match_only: bool = False
 
 
@@ -76,12 +428,14 @@ def root():
     return {"message": "Wine Recommender API is running."}
 
 @app.post("/recommend-wines")
-def recommend_wines(request: WineRequest):
-    if app.state.wine_metadata_df is None:
+async def recommend_wines(request: WineRequest):
+    # one bundle for the whole request, even if a reload swaps it meanwhile
+    catalogue = app.state.catalogue
+    if catalogue.wine_metadata_df is None:
         raise HTTPException(status_code=500, detail="Metadata not loaded")
 
 
-    if app.state.model is None:
+    if catalogue.model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
 
     try:
@@ -90,18 +444,21 @@ def recommend_wines(request: WineRequest):
         country = None if request.country in ["None", "string"] else request.country
         region_name = None if request.region_name in ["None", "string"] else request.region_name
 
-        result_df = get_wine_recommendations_by_characteristics(
-            wine_type=request.wine_type,
-            grape_varieties=request.grape_varieties,
-            body=request.body,
-            abv=request.abv,
-            acidity=acidity,
-            country=country,
-            region_name=region_name,
-            n_recommendations=request.n_recommendations,
-            metadata_df=app.state.wine_metadata_df,
-            model=app.state.model
-        )
+        async with LIMITS["recommend-wines"]:
+            result_df = await app.state.recommend_pool.run(
+                get_wine_recommendations_by_characteristics,
+                wine_type=request.wine_type,
+                grape_varieties=request.grape_varieties,
+                body=request.body,
+                abv=request.abv,
+                acidity=acidity,
+                country=country,
+                region_name=region_name,
+                n_recommendations=request.n_recommendations,
+                metadata_df=catalogue.wine_metadata_df,
+                model=catalogue.model,
+                preprocessor=catalogue.preprocessor
+            )
 
         # Check if result_df is None first
         if result_df is None:
@@ -110,14 +467,17 @@ def recommend_wines(request: WineRequest):
         if result_df.empty:
             return {"message": "No recommendations found.", "wines": []}
 
-        return {"wines": result_df.to_dict(orient="records")}
+        return wines_response(result_df)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
 @app.post("/recommend-by-food")
-def recommend_by_food(request: FoodWineRequest):
-    if app.state.wine_metadata_df is None:
+async def recommend_by_food(request: FoodWineRequest):
+    catalogue = app.state.catalogue
+    if catalogue.wine_metadata_df is None:
         raise HTTPException(status_code=500, detail="Metadata not loaded")
 
     try:
@@ -136,97 +496,256 @@ def recommend_by_food(request: FoodWineRequest):
             else:
                 grape_varieties = request.grape_varieties
 
-        result_df = get_wine_recommendations_by_food(
-            features_df=app.state.wine_metadata_df,
-            food_pairing=request.food_pairing,
-            wine_type=wine_type,
-            grape_varieties=grape_varieties,
-            body=body,
-            abv=request.abv,
-            acidity=acidity,
-            country=country,
-            region_name=region_name,
-            n_recommendations=request.n_recommendations,
-            exact_match_only=request.exact_match_only
-        )
+        async with LIMITS["recommend-by-food"]:
+            result_df = await app.state.recommend_pool.run(
+                get_wine_recommendations_by_food,
+                features_df=catalogue.wine_metadata_df,
+                food_pairing=request.food_pairing,
+                wine_type=wine_type,
+                grape_varieties=grape_varieties,
+                body=body,
+                abv=request.abv,
+                acidity=acidity,
+                country=country,
+                region_name=region_name,
+                n_recommendations=request.n_recommendations,
+                exact_match_only=request.exact_match_only
+            )
         if result_df.empty:
             return {"message": f"No wines found that pair with '{request.food_pairing}'.", "wines": []}
 
-        return {"wines": result_df.to_dict(orient="records")}
+        return wines_response(result_df)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Food recommendation failed: {e}")
 
 
-# @app.post('/read_image')
-# async def receive_image(img: UploadFile = File(...)):
-#     try:
-#         # Step 1: Read bytes from uploaded image
-#         contents = await img.read()  # type: bytes
+@app.get("/recommend-for-user/{user_id}")
+async def recommend_for_user(user_id: int, n_recommendations: int = Query(5, ge=1, le=MAX_RECOMMENDATIONS)):
+    catalogue = app.state.catalogue
+    if catalogue.wine_metadata_df is None or catalogue.model is None:
+        raise HTTPException(status_code=500, detail="Metadata or model not loaded")
 
-#         # Step 2: Convert bytes to image (PIL)
-#         image = Image.open(BytesIO(contents)).convert("RGB")
+    if catalogue.user_store is None:
+        raise HTTPException(status_code=500, detail="User profiles not loaded")
 
-#         # Step 3: Preprocess image (e.g., resize)
-#         wine_info = extract_wine_info_from_image(image)
+    if user_id not in catalogue.user_store:
+        raise HTTPException(status_code=404, detail=f"Unknown user {user_id}")
 
-#         return wine_info
-#     except Exception as e:
-#         return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
-
-@app.post('/read_image')
-async def receive_image(img: UploadFile = File(...), n_recommendations: int = 5):
     try:
-        # Step 1: Read bytes from uploaded image
-        contents = await img.read()  # type: bytes
+        async with LIMITS["recommend-for-user"]:
+            result_df = await app.state.recommend_pool.run(
+                get_wine_recommendations_for_user,
+                user_id=user_id,
+                store=catalogue.user_store,
+                n_recommendations=n_recommendations,
+                metadata_df=catalogue.wine_metadata_df,
+                model=catalogue.model
+            )
+
+        if result_df is None or result_df.empty:
+            return {"message": "No recommendations found.", "wines": []}
 
-        # Step 2: Convert bytes to image (PIL)
-        image = Image.open(BytesIO(contents)).convert("RGB")
+        return wines_response(result_df, user_id=user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"User recommendation failed: {e}")
+
+
+@app.get("/facets")
+def facets(request: Request):
+    """
+    Lookup tables the UIs build their filters from (see cv_functions.facets.build_facets).
+    Cacheable: clients revalidate with If-None-Match and get a 304 while the catalogue is unchanged.
+    """
+    catalogue = app.state.catalogue
+    if catalogue.facets_body is None:
+        raise HTTPException(status_code=500, detail="Facets not loaded")
+
+    headers = {"ETag": catalogue.facets_etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == catalogue.facets_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalogue.facets_body, media_type="application/json", headers=headers)
+
+
+@app.get("/suggest/{field}")
+def suggest_values(field: str, q: str = "", limit: int = 10, country: Optional[str] = None):
+    """
+    Typeahead: the most common catalogue values of field with a word starting with q.
+    field is one of grapes, foods, countries, regions, wineries, wines;
+    country restricts region suggestions to one country.
+    """
+    if field not in SUGGEST_FIELDS:
+        raise HTTPException(status_code=404, detail=f"Unknown field {field!r}, expected one of {list(SUGGEST_FIELDS)}")
+
+    catalogue = app.state.catalogue
+    if catalogue.suggesters is None:
+        raise HTTPException(status_code=500, detail="Suggestion indexes not loaded")
+
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    return {"field": field, "q": q, "suggestions": suggest(catalogue.suggesters, field, q, limit, country=country)}
+
+
+def recommend_for_label(catalogue, wine_info, n_recommendations):
+    """
+    Recommendations for a label reading from an artefact bundle (blocking:
+    runs on the recommend pool).
+
+    Returns:
+        (matched catalogue wine or None, recommended wines DataFrame)
+    """
+    # Resolve the label to a catalogue wine when its name is read well enough
+    match = None
+    if catalogue.name_index is not None:
+        with span("read_image.resolve_name"):
+            match = catalogue.name_index.resolve(
+                wine_info.get("wine_name"), wine_info.get("winery"), min_score=NAME_MIN_SCORE
+            )
+
+    if match is not None:
+        # Recommend from the identified wine's own vector
+        return match, get_wine_recommendations_by_wine(
+            match["row"],
+            n_recommendations=n_recommendations,
+            metadata_df=catalogue.wine_metadata_df,
+            model=catalogue.model
+        )
 
-        # Step 3: Extract wine info from image
-        wine_info = extract_wine_info_from_image(image)
+    # Parse ABV to float
+    abv = float(wine_info["ABV"]) if wine_info["ABV"] and wine_info["ABV"].replace('.', '', 1).isdigit() else 12.0
+
+    # Get recommendations from a profile synthesized from the label
+    return None, get_wine_recommendations_by_characteristics(
+        wine_type=wine_info["wine_type"],
+        grape_varieties=wine_info["grape_varieties"],
+        body=wine_info["body"],
+        abv=abv,
+        acidity=wine_info["acidity"],
+        country=wine_info["country"],
+        region_name=wine_info["region"],
+        n_recommendations=n_recommendations,
+        metadata_df=catalogue.wine_metadata_df,
+        model=catalogue.model,
+        preprocessor=catalogue.preprocessor
+    )
 
-        # Step 4: Get recommendations based on extracted info
-        if wine_info["extraction_successful"]:
-            try:
-                # Parse ABV to float
-                abv = float(wine_info["ABV"]) if wine_info["ABV"] and wine_info["ABV"].replace('.', '', 1).isdigit() else 12.0
-
-                # Get recommendations
-                result_df = get_wine_recommendations_by_characteristics(
-                    wine_type=wine_info["wine_type"],
-                    grape_varieties=wine_info["grape_varieties"],
-                    body=wine_info["body"],
-                    abv=abv,
-                    acidity=wine_info["acidity"],
-                    country=wine_info["country"],
-                    region_name=wine_info["region"],
-                    n_recommendations=n_recommendations,
-                    metadata_df=app.state.wine_metadata_df,
-                    model=app.state.model
-                )
-
-                # Include recommendations in response
-                if result_df is not None and not result_df.empty:
-                    wine_info["recommendations"] = result_df.to_dict(orient="records")
-                else:
+
+@app.post('/read_image')
+async def receive_image(img: UploadFile = File(...), n_recommendations: int = Query(5, ge=1, le=MAX_RECOMMENDATIONS)):
+    # the limit is taken before the upload is read, so a saturated worker turns requests away cheaply
+    catalogue = app.state.catalogue
+    async with LIMITS["read-image"]:
+        try:
+            # Step 1: Read bytes from uploaded image (bounded, chunk by chunk)
+            with span("read_image.upload"):
+                contents = await read_upload(img)
+
+            # Step 2: Decode near the size the label engine needs, off the event loop
+            with span("read_image.decode"):
+                image = await app.state.image_pool.run(decode_label_image, contents, decode_size())
+
+            # Step 3: Extract wine info from image (local OCR and/or the shared pooled API client)
+            with span("read_image.extract"):
+                wine_info = await extract_wine_info(image, cache=app.state.label_cache, pool=app.state.image_pool)
+
+            # Step 4: Get recommendations based on extracted info
+            if wine_info["extraction_successful"]:
+                try:
+                    with span("read_image.recommend"):
+                        match, result_df = await app.state.recommend_pool.run(
+                            recommend_for_label, catalogue, wine_info, n_recommendations
+                        )
+                    wine_info["matched_wine"] = match
+
+                    # Include recommendations in response
+                    if result_df is not None and not result_df.empty:
+                        with span("serialize"):
+                            wine_info["recommendations"] = records(result_df)
+                    else:
+                        wine_info["recommendations"] = []
+                        wine_info["recommendation_message"] = "No similar wines found."
+                except Exception as e:
                     wine_info["recommendations"] = []
-                    wine_info["recommendation_message"] = "No similar wines found."
-            except Exception as e:
+                    wine_info["recommendation_error"] = str(e)
+            else:
                 wine_info["recommendations"] = []
-                wine_info["recommendation_error"] = str(e)
-        else:
-            wine_info["recommendations"] = []
-            wine_info["recommendation_message"] = "Could not generate recommendations because wine info extraction failed."
+                wine_info["recommendation_message"] = "Could not generate recommendations because wine info extraction failed."
 
-        return wine_info
-    except Exception as e:
-        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+            return FastJSONResponse(wine_info)
+        except HTTPException:
+            raise
+        except Exception as e:
+            return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+
+
+@app.get("/label-cache/stats")
+def label_cache_stats():
+    if app.state.label_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **app.state.label_cache.stats()}
+
+
+@app.get("/execution/stats")
+def execution_stats():
+    """Queue and run times of the worker pools, and in-flight / rejected counts per endpoint."""
+    return {
+        "pools": {pool.name: pool.stats() for pool in (app.state.recommend_pool, app.state.image_pool)},
+        "endpoints": {name: limit.stats() for name, limit in LIMITS.items()},
+    }
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and its event loop answers."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: artefacts loaded and the worker warmed up (local label engine included, if used)."""
+    if not app.state.loaded or (app.state.loading is not None and not app.state.loading.done()):
+        return JSONResponse(status_code=503, content={"status": "loading", "startup_timings": dict(app.state.startup_timings)})
+    catalogue = app.state.catalogue
+    if catalogue.wine_metadata_df is None or catalogue.model is None:
+        return JSONResponse(status_code=503, content={"status": "failed", "detail": "Metadata or model not loaded"})
+    return {"status": "ready", "startup_timings": app.state.startup_timings, "warmup": catalogue.warmup,
+            "catalogue": catalogue.info()}
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format: stage and request latency histograms, and process metrics."""
+    return metrics_response()
 
 
 @app.get("/check-model")
 def check_model():
+    catalogue = app.state.catalogue
     return {
-        "model_loaded": app.state.model is not None,
-        "metadata_loaded": app.state.wine_metadata_df is not None,
-        "metadata_shape": str(app.state.wine_metadata_df.shape) if app.state.wine_metadata_df is not None else None,
+        "model_loaded": catalogue.model is not None,
+        "metadata_loaded": catalogue.wine_metadata_df is not None,
+        "metadata_shape": str(catalogue.wine_metadata_df.shape) if catalogue.wine_metadata_df is not None else None,
+        "user_profiles_loaded": catalogue.user_store is not None,
+        "name_index_loaded": catalogue.name_index is not None,
+        "label_engine": LABEL_ENGINE,
+        "catalogue": catalogue.info(),
+        "reloads": list(app.state.reloads),
     }
+
+
+@app.post("/admin/reload")
+async def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the artefacts changed on disk and swap them in once validated and
+    warmed; requests in flight finish on the version they started with.
+    force reloads every artefact, changed or not. Reloads this worker only.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Reloads are disabled: set API_ADMIN_TOKEN")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    result = await reload_artifacts("admin", force=force)
+    return JSONResponse(status_code=409 if result["status"] == "rejected" else 200, content=result)
@@ -0,0 +1,108 @@
+"""
+Request tracing and the Prometheus /metrics export.
+
+TracingMiddleware opens a trace per request (cv_functions.tracing), records
+the request's total time by route and, when enabled, reports the request's
+spans to the client in a Server-Timing header. TracingCollector exports the
+stage and request histograms in the Prometheus text format, alongside the
+process metrics prometheus_client collects by default.
+
+Metrics are per process: with several workers each scrape reaches one of them.
+"""
+import os
+import time
+from typing import List, Tuple
+
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+
+from cv_functions.tracing import REQUESTS, STAGES, current_trace, end_trace, start_trace
+
+SERVER_TIMING = os.environ.get("API_SERVER_TIMING", "0") == "1"
+# Prometheus bucket bounds: edges of the tracing histograms' buckets, so the counts are exact
+EXPORT_BUCKETS = [scale * 10.0 ** exponent for exponent in range(-4, 2) for scale in (1, 2.5, 5)]
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def server_timing_header(trace: List[Tuple[str, float]], total: float) -> str:
+    """
+    Server-Timing value for a request's spans: one entry per stage (repeated
+    stages summed), in the order they first ran, then the total.
+    """
+    durations = {}
+    for name, seconds in trace:
+        durations[name] = durations.get(name, 0.0) + seconds
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware giving every HTTP request a trace and timing it by route
+    ("POST /recommend-wines"; "unmatched" for unknown paths, to bound the
+    number of series).
+    """
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_trace()
+        trace = current_trace()
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(trace, time.perf_counter() - started)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing if self.server_timing else send)
+        finally:
+            route = scope.get("route")
+            REQUESTS.record(f"{scope['method']} {route.path}" if route is not None else "unmatched",
+                            time.perf_counter() - started)
+            end_trace(token)
+
+
+def _histogram_families(histograms, name, label, documentation):
+    histogram_family = HistogramMetricFamily(name, documentation, labels=[label])
+    quantile_family = GaugeMetricFamily(
+        name.replace("_seconds", "_quantile_seconds"),
+        f"{documentation}, quantiles from the full-resolution histogram",
+        labels=[label, "quantile"],
+    )
+    for key, histogram in histograms.items():
+        cumulative = histogram.cumulative_counts(EXPORT_BUCKETS)
+        # read after the buckets, so no bucket exceeds the total under concurrent records
+        _, count, total, _ = histogram.snapshot()
+        buckets = [(f"{bound:g}", value) for bound, value in zip(EXPORT_BUCKETS, cumulative)]
+        histogram_family.add_metric([key], buckets + [("+Inf", count)], sum_value=total)
+        for quantile, value in zip(EXPORT_QUANTILES, histogram.quantiles(EXPORT_QUANTILES)):
+            quantile_family.add_metric([key, f"{quantile:g}"], value)
+    return histogram_family, quantile_family
+
+
+class TracingCollector:
+    """prometheus_client collector over the stage and request histograms."""
+
+    def collect(self):
+        yield from _histogram_families(STAGES, "cvino_stage_duration_seconds", "stage",
+                                       "Time spent in each traced stage")
+        yield from _histogram_families(REQUESTS, "cvino_request_duration_seconds", "route",
+                                       "Time to serve each request, by route")
+
+
+REGISTRY.register(TracingCollector())
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
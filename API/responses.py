@@ -0,0 +1,90 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+from cv_functions.tracing import span
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is the fallback
+    orjson = None
+
+# Columns returned for each recommended wine ("*" returns every metadata column).
+# Leaves out Elaborate, Code, Website, Vintages, RegionID, WineryID, Grapes (a
+# duplicate of Grapes_list) and the coordinates, which no client reads.
+DEFAULT_RESPONSE_COLUMNS = [
+    "WineID", "WineName", "Type", "Grapes_list", "Harmonize", "ABV", "Body", "Acidity",
+    "Country", "RegionName", "WineryName", "avg_rating", "rating_count", "Similarity",
+]
+_columns_setting = os.environ.get("RESPONSE_COLUMNS", "").strip()
+RESPONSE_COLUMNS: Optional[List[str]] = (
+    None if _columns_setting == "*"
+    else [column.strip() for column in _columns_setting.split(",") if column.strip()] if _columns_setting
+    else DEFAULT_RESPONSE_COLUMNS
+)
+
+
+def _column_values(values: np.ndarray) -> list:
+    # one conversion per column instead of one per cell; NaN becomes None
+    if values.dtype.kind == "f":
+        missing = np.isnan(values)
+        values = values.tolist()
+        if missing.any():
+            for position in np.flatnonzero(missing):
+                values[position] = None
+        return values
+    if values.dtype.kind == "O":
+        # NaN is the only value not equal to itself
+        return [None if value != value else value for value in values.tolist()]
+    return values.tolist()
+
+
+def records(df: Optional[pd.DataFrame], columns: Optional[Sequence[str]] = RESPONSE_COLUMNS) -> List[Dict[str, Any]]:
+    """
+    JSON-ready rows of df restricted to columns (those df has), built column
+    by column, with missing values as None.
+    """
+    if df is None or df.empty:
+        return []
+    names = list(df.columns) if columns is None else [column for column in columns if column in df.columns]
+    values = [_column_values(df[name].to_numpy()) for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # OPT_SERIALIZE_NUMPY covers numpy scalars left in hand-built dicts
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, default=_default).encode("utf-8")
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response serialized with orjson when available, skipping FastAPI's
+    jsonable_encoder pass over the payload.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wines_response(df: Optional[pd.DataFrame], **extra) -> FastJSONResponse:
+    """
+    {"wines": [...], **extra} for a DataFrame of recommended wines.
+    """
+    with span("serialize"):
+        return FastJSONResponse({**extra, "wines": records(df)})
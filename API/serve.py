@@ -0,0 +1,118 @@
+"""
+Pre-forking server: load the model and metadata once, then fork the workers.
+
+    python -m API.serve --workers 4 --port 8000
+
+`uvicorn API.fast:app --workers N` starts every worker from scratch, so each
+one reads the metadata CSV, builds the name and suggestion indexes and loads
+the model on its own, and memory grows with N. Here the master imports
+API.fast (loading everything), freezes the garbage collector so a collection
+never writes to the loaded objects, binds the listening socket and forks the
+workers: they share the master's pages copy-on-write and only pay for the
+pages they modify. The model matrix and user profiles are memory-mapped files
+on top of that, shared through the page cache.
+
+A worker that dies is replaced; SIGTERM / SIGINT stop them all.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+import traceback
+
+import uvicorn
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the CvalVino API from pre-forked workers sharing the loaded artefacts.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+                        help="Worker processes (default: WEB_CONCURRENCY or 1)")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, args):
+    from API import fast
+
+    fast.after_fork()
+    config = uvicorn.Config(fast.app, host=args.host, port=args.port, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # worker: uvicorn installs its own handlers for these
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        run_worker(sock, args)
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    started = time.perf_counter()
+    from API import fast
+
+    # the model, metadata and indexes, loaded once in the master: workers find them loaded
+    fast.load_artifacts()
+    # move everything loaded so far out of the collector's reach: scanning it
+    # would write to the object headers and un-share the pages in every worker
+    gc.collect()
+    gc.freeze()
+    # bound only once loaded, so nothing connects to a server that cannot answer yet
+    sock = bind_socket(args.host, args.port)
+    print(f"✅ Master ready in {time.perf_counter() - started:.1f}s, forking {args.workers} workers (pid {os.getpid()}).")
+
+    workers = {spawn_worker(sock, args) for _ in range(max(1, args.workers))}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            print(f"❌ Worker {pid} exited with code {os.waitstatus_to_exitcode(status)}, starting a new one.")
+            time.sleep(1)  # do not spin if workers die on startup
+            workers.add(spawn_worker(sock, args))
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
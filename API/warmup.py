@@ -0,0 +1,132 @@
+"""
+Warm-up each API worker runs before reporting ready.
+
+The first requests after a deploy would otherwise pay for first-use imports,
+the BLAS thread pool starting, first-time pandas code paths, the recommend
+pool's threads being created and page faults on the memory-mapped model.
+warm_up() touches every page of the model matrix and user profiles, then
+runs synthetic queries of every recommendation endpoint on the recommend pool
+(the threads real requests run on), serialized as the endpoints do. The API
+also warms a reloaded bundle this way before it replaces the live one.
+"""
+import asyncio
+import mmap
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from API.responses import wines_response
+from cv_functions.food_recommendation import get_wine_recommendations_by_food
+from cv_functions.recommendation import get_wine_recommendations_by_characteristics, get_wine_recommendations_by_wine
+from cv_functions.tracing import unrecorded
+from cv_functions.user_recommendation import get_wine_recommendations_for_user
+
+
+def touch_pages(array) -> int:
+    """
+    Read one byte of every memory page of array, so a memory-mapped array is
+    resident before the first query. Returns the number of bytes covered.
+    """
+    data = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+    # a strided sum reads exactly one byte per page
+    int(data[::mmap.PAGESIZE].sum())
+    return data.nbytes
+
+
+def _most_common(facets, column, default):
+    counts = (facets or {}).get("value_counts", {}).get(column) or {}
+    return next(iter(counts), default)
+
+
+def warmup_queries(state) -> List[Tuple[str, Callable, Dict[str, Any]]]:
+    """
+    (name, function, kwargs) of the synthetic queries on an artefact bundle
+    (API/bundle.py), built from the most common catalogue values so they
+    return real wines.
+    """
+    metadata_df, model, preprocessor = state.wine_metadata_df, state.model, state.preprocessor
+    wine_type = _most_common(state.facets, "Type", "Red")
+    country = _most_common(state.facets, "Country", None)
+    regions = (state.facets or {}).get("country_regions", {}).get(country) or [None]
+    food = _most_common(state.facets, "foods", "Beef")
+
+    queries = [
+        ("recommend-wines", get_wine_recommendations_by_characteristics, {
+            "wine_type": wine_type, "n_recommendations": 5, "metadata_df": metadata_df, "model": model,
+            "preprocessor": preprocessor,
+        }),
+        ("recommend-wines-filtered", get_wine_recommendations_by_characteristics, {
+            "wine_type": wine_type,
+            "grape_varieties": [_most_common(state.facets, "grapes", "Cabernet Sauvignon")],
+            "body": _most_common(state.facets, "Body", "Full-bodied"),
+            "abv": 13.0,
+            "acidity": _most_common(state.facets, "Acidity", None),
+            "country": country,
+            "region_name": regions[0],
+            "n_recommendations": 5, "metadata_df": metadata_df, "model": model, "preprocessor": preprocessor,
+        }),
+        ("recommend-by-food", get_wine_recommendations_by_food, {
+            "features_df": metadata_df, "food_pairing": food, "n_recommendations": 5,
+        }),
+        ("recommend-by-food-exact", get_wine_recommendations_by_food, {
+            "features_df": metadata_df, "food_pairing": food, "wine_type": wine_type,
+            "n_recommendations": 10, "exact_match_only": True,
+        }),
+        ("recommend-by-wine", get_wine_recommendations_by_wine, {
+            "row": 0, "n_recommendations": 5, "metadata_df": metadata_df, "model": model,
+        }),
+    ]
+    store = state.user_store
+    if store is not None and store.n_users:
+        user_id = int(np.flatnonzero(np.asarray(store.lookup) >= 0)[0]) + store.min_user_id
+        queries.append(("recommend-for-user", get_wine_recommendations_for_user, {
+            "user_id": user_id, "store": store, "n_recommendations": 5, "metadata_df": metadata_df, "model": model,
+        }))
+    return queries
+
+
+def _run_query(function, kwargs) -> float:
+    started = time.perf_counter()
+    # serialized like the endpoints do, so orjson and the projection are warm too
+    wines_response(function(**kwargs))
+    return time.perf_counter() - started
+
+
+async def warm_up(state, pool, rounds: int = 3) -> Dict[str, Any]:
+    """
+    Warm up a loaded artefact bundle on pool, the recommend pool (see module
+    docstring).
+
+    Returns:
+        dict: seconds taken, bytes touched, and per query the first and last
+        round's latency in ms
+    """
+    started = time.perf_counter()
+    touched = 0
+    if state.model is not None:
+        touched += touch_pages(state.model._fit_X)
+    if state.user_store is not None:
+        touched += touch_pages(state.user_store.centroids) + touch_pages(state.user_store.rated_rows_all)
+
+    # rounds=0 only pages the arrays in (the API's reloads, in a process already warm)
+    queries = warmup_queries(state) if rounds > 0 else []
+    latencies = {name: [] for name, _, _ in queries}
+    # synthetic queries: their cold-path spans stay out of the latency histograms /metrics exports
+    with unrecorded():
+        for _ in range(rounds):
+            # all queries of a round at once, so every pool thread gets started
+            results = await asyncio.gather(*(
+                pool.run(_run_query, function, kwargs) for _, function, kwargs in queries
+            ))
+            for (name, _, _), seconds in zip(queries, results):
+                latencies[name].append(seconds)
+
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes_touched": touched,
+        "queries": {
+            name: {"first_ms": round(values[0] * 1000, 2), "last_ms": round(values[-1] * 1000, 2)}
+            for name, values in latencies.items()
+        },
+    }
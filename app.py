@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
 import os
 import ast
 import requests
-import ipdb
 import tempfile
 
+from cv_functions.facets import read_facets
+from interface import api_client
+
 # === Set up page ===
 st.set_page_config(page_title="🍇 CvalVino", layout="wide")
 
@@ -59,39 +60,27 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # === Load dropdown source data ===
-@st.cache_data
-def load_data():
-    try:
-        return pd.read_csv("raw_data/wine_metadata.csv")
-    except FileNotFoundError:
-        return pd.DataFrame()
-
-df = load_data()
+EMPTY_FACETS = {"types": [], "countries": [], "regions": [], "country_regions": {}, "region_country": {}, "grapes": [], "foods": []}
 
-# create a Country vs Region lookup dictionary
 
-country_to_regions = (
-    df.groupby('Country')['RegionName']
-    .apply(lambda x: list(dict.fromkeys(x)))  # removes duplicates, keeps order
-    .to_dict()
-)
-
-region_to_country = {
-    region: country
-    for country, regions in country_to_regions.items()
-    for region in regions}
+@st.cache_data(ttl=3600)
+def load_facets():
+    """
+    Dropdown lookup tables (country -> regions, grapes, foods, ...), fetched
+    once from the API's /facets, or read from the facets file of the last
+    build if the API is unreachable.
+    """
+    try:
+        return api_client.get_facets()
+    except (requests.RequestException, api_client.APIError):
+        return read_facets() or EMPTY_FACETS
 
-# create grape varieties list
-all_grapes = []
-for grapes in df["Grapes_list"]:
-    # Convert string representation of list to actual list if needed
-    if isinstance(grapes, str):
-        grapes_list = ast.literal_eval(grapes)
-    else:
-        grapes_list = grapes
-    all_grapes.extend([g.strip() for g in grapes_list])
+facets = load_facets()
 
-unique_grapes = sorted(set(all_grapes))
+# Country vs Region lookup dictionaries and grape varieties list
+country_to_regions = facets["country_regions"]
+region_to_country = facets["region_country"]
+unique_grapes = facets["grapes"]
 
 
 # === Session state for page navigation ===
@@ -102,22 +91,8 @@ if "wine_page" not in st.session_state:
     st.session_state.wine_page = True
 
 
-@st.cache_data
-def get_unique_foods(df):
-    if "Harmonize" not in df.columns:
-        return []
-    food_set = set()
-    for item in df["Harmonize"].dropna():
-        try:
-            foods = ast.literal_eval(item)
-            food_set.update([f.strip() for f in foods])
-        except:
-            continue
-    return sorted(food_set)
-
-# === Food-based Recommendation Section (Only if 'Harmonize' exists) ===
-if "Harmonize" in df.columns:
-    unique_foods = get_unique_foods(df)
+# === Foods for the food-based recommendation page ===
+unique_foods = facets["foods"]
 
 
 # === create  buttons ===
@@ -215,7 +190,7 @@ if st.session_state.food_page:
         help="Start typing to select one or more foods from our database."
     )
 
-    wine_types = df["Type"].dropna().unique().tolist()
+    wine_types = facets["types"]
     wine_type_selected = st.selectbox("🍷 Prefer a wine type?", wine_types)
 
     # Extract food names (remove emoji and space)
@@ -227,26 +202,18 @@ if st.session_state.food_page:
         if selected_foods:
             selected_food_names = [food.split(' ', 1)[1] if ' ' in food else food for food in selected_foods]
 
-            def matches_any_food(harmonize_str):
-                if isinstance(harmonize_str, str) and harmonize_str.startswith("["):
-                    try:
-                        harmonized_foods = [item.lower() for item in ast.literal_eval(harmonize_str)]
-                        return any(food.lower() in harmonized_foods for food in selected_food_names)
-                    except:
-                        return False
-                return False
-
-            food_wines = df[df["Harmonize"].apply(matches_any_food)]
-
-            if wine_type_selected != "All":
-                food_wines = food_wines[food_wines["Type"] == wine_type_selected]
+            # one API call per selected food, all in flight at once
+            try:
+                food_wines = api_client.cached_recommend_by_foods(tuple(selected_food_names), wine_type_selected, 10)
+            except Exception as e:
+                food_wines = None
+                st.error(f"Failed to get recommendations from the API: {e}")
 
-                if not food_wines.empty:
+            if food_wines is not None:
+                if food_wines:
                     st.success(f"Found {len(food_wines)} wines for '{food_input}' 🍇")
 
-                    top_food_wines = food_wines.head(10)
-
-                    for _, row in top_food_wines.iterrows():
+                    for row in food_wines:
                         with st.container():
                             cols = st.columns([1, 4])
 
@@ -301,9 +268,6 @@ if st.session_state.food_page:
                 else:
                     st.warning(f"No wine recommendations found for '{food_input}'.")
 
-            else:
-                st.warning(f"No wine recommendations found for '{food_input}'.")
-
 
 # === Main Wine Filters Page ===
 if st.session_state.wine_page:
@@ -333,12 +297,17 @@ if st.session_state.wine_page:
     with info_col:
         if send_to_api_clicked and uploaded_image is not None:
             img_bytes = uploaded_image.getvalue()
-            files = {'img': img_bytes}
-            #response = requests.post("https://cvino-api-224355531443.europe-west1.run.app/read_image", files=files)
-            response = requests.post("http://localhost:8000/read_image", files=files) # backend
-            if response.status_code == 200:
+            try:
+                # cached on the image bytes: re-sending the same label is free
+                wine_info = api_client.cached_read_label(img_bytes)
+            except api_client.APIError as e:
+                wine_info = None
+                st.warning(f"Failed to upload image: {e.message}")
+            except requests.RequestException as e:
+                wine_info = None
+                st.error(f"Failed to connect to API: {e}")
+            if wine_info is not None:
                 # st.success("Image successfully uploaded and processed!")
-                wine_info = response.json()
                 # Store extracted info in session_state so it persists after rerun
                 st.session_state['last_extracted_wine_info'] = wine_info
 
@@ -358,8 +327,6 @@ if st.session_state.wine_page:
                     st.session_state['abv_input'] = float(wine_info['ABV'])
                 except Exception:
                     pass
-            else:
-                st.warning(f"Failed to upload image: {response.json().get('message')}")
          # Always display extracted info if it exists
         wine_info = st.session_state.get('last_extracted_wine_info')
         if wine_info:
@@ -400,7 +367,7 @@ if st.session_state.wine_page:
 
         wine_name_input = None
 
-        country_options = sorted(df["Country"].dropna().unique().tolist()) + [None]
+        country_options = sorted(facets["countries"]) + [None]
         if 'country_input' in st.session_state: # if detect country from image
             default_country = st.session_state['country_input']
         else:
@@ -411,7 +378,7 @@ if st.session_state.wine_page:
 
 
     with col2:
-        wine_type_box = df["Type"].dropna().unique().tolist()
+        wine_type_box = facets["types"]
         if 'wine_type_input' in st.session_state: # if detect type from image
             default_wine_type = st.session_state['wine_type_input']
         else:
@@ -420,7 +387,7 @@ if st.session_state.wine_page:
         default_index = wine_type_box.index(default_wine_type) if default_wine_type in wine_type_box else 1
         wine_type_input = st.selectbox("Type", wine_type_box, index= default_index)
 
-        region_options_all = df["RegionName"].dropna().unique().tolist() + [None]
+        region_options_all = facets["regions"] + [None]
         if country_input:
             region_options = sorted(country_to_regions[country_input])
 
@@ -506,63 +473,57 @@ if st.session_state.wine_page:
             }
 
             try:
-                response = requests.post(
-                    "http://localhost:8000/recommend-wines",
-                    json=payload
-                )
-
-                if response.status_code == 200:
-                    wines = response.json().get("wines", [])
-                    if not wines:
-                        st.warning("No recommendations found.")
-                    else:
-                        # 2. Stop audio
-                         st.components.v1.html("""
-                        <script>
-                            const audio = document.getElementById("temp-audio");
-                            if (audio) {
-                                audio.pause();
-                                audio.currentTime = 0;
-                                audio.remove();
-                            }
-                        </script>
-                        """, height=0)
-                    st.success(f"Here are your top {len(wines)} wine recommendations 🍷")
-
-                    for wine in wines:
-                        with st.container():
-                            cols = st.columns([1, 4])
-                            with cols[0]:
-                                # Add vertical space above the image to lower its position
-                                st.markdown("<div style='height:40px;'></div>", unsafe_allow_html=True)
-                                if wine['Type'] == "Red":
-                                    image_path = "images/red_wine.png"
-                                elif wine['Type'] == "White":
-                                    image_path = "images/white_wine.png"
-                                elif wine['Type'] == "Rosé":
-                                    image_path = "images/rose_wine.png"
-                                elif wine['Type'] == "Sparkling":
-                                    image_path = "images/sparkling_wine.png"
-                                elif wine['Type'] == "Dessert":
-                                    image_path = "images/dessert.png"
-                                elif wine['Type'] == "Dessert/Port":
-                                    image_path = "images/port.png"
-                                st.image(image_path, width=250)
-
-                            with cols[1]:
-                                st.markdown(f"""
-                                    ### {wine['WineName']}
-                                    - **Type**: {wine['Type']}
-                                    - **Grapes**: {", ".join(ast.literal_eval(wine['Grapes_list'])) if isinstance(wine['Grapes_list'], str) else wine['Grapes_list']}
-                                    - **Body**: {wine['Body']}
-                                    - **ABV**: {wine['ABV']}%
-                                    - **Region**: {wine['RegionName']}
-                                    - **Country**: {wine['Country']}
-                                    - **Similarity**: {wine['Similarity']:.2f}
-                                """)
-                                st.markdown("---")
-
+                wines = api_client.cached_recommend_wines(payload).get("wines", [])
+                if not wines:
+                    st.warning("No recommendations found.")
                 else:
-                    st.error(f"API error: {response.status_code} – {response.text}")
+                    # 2. Stop audio
+                     st.components.v1.html("""
+                    <script>
+                        const audio = document.getElementById("temp-audio");
+                        if (audio) {
+                            audio.pause();
+                            audio.currentTime = 0;
+                            audio.remove();
+                        }
+                    </script>
+                    """, height=0)
+                st.success(f"Here are your top {len(wines)} wine recommendations 🍷")
+
+                for wine in wines:
+                    with st.container():
+                        cols = st.columns([1, 4])
+                        with cols[0]:
+                            # Add vertical space above the image to lower its position
+                            st.markdown("<div style='height:40px;'></div>", unsafe_allow_html=True)
+                            if wine['Type'] == "Red":
+                                image_path = "images/red_wine.png"
+                            elif wine['Type'] == "White":
+                                image_path = "images/white_wine.png"
+                            elif wine['Type'] == "Rosé":
+                                image_path = "images/rose_wine.png"
+                            elif wine['Type'] == "Sparkling":
+                                image_path = "images/sparkling_wine.png"
+                            elif wine['Type'] == "Dessert":
+                                image_path = "images/dessert.png"
+                            elif wine['Type'] == "Dessert/Port":
+                                image_path = "images/port.png"
+                            st.image(image_path, width=250)
+
+                        with cols[1]:
+                            st.markdown(f"""
+                                ### {wine['WineName']}
+                                - **Type**: {wine['Type']}
+                                - **Grapes**: {", ".join(ast.literal_eval(wine['Grapes_list'])) if isinstance(wine['Grapes_list'], str) else wine['Grapes_list']}
+                                - **Body**: {wine['Body']}
+                                - **ABV**: {wine['ABV']}%
+                                - **Region**: {wine['RegionName']}
+                                - **Country**: {wine['Country']}
+                                - **Similarity**: {wine['Similarity']:.2f}
+                            """)
+                            st.markdown("---")
+
+            except api_client.APIError as e:
+                st.error(f"API error: {e.status_code} – {e.message}")
             except Exception as e:
                 st.error(f"Failed to connect to API: {e}")
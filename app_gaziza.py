@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
-import os
-import ast
+import requests
+
+from cv_functions.facets import parse_list, read_facets
+from interface import api_client
 
 # === Set up page ===
 st.set_page_config(page_title="🍇 CvalVino", layout="wide")
@@ -129,34 +130,57 @@ st.markdown("""
         Your Elegant Wine Recommender
     </p>
 """, unsafe_allow_html=True)
-# === Load the dataset ===
-@st.cache_data
-def load_data():
-    file_path = os.path.join("raw_data", "last", "XWines_Full_100K_wines.csv")
-    return pd.read_csv(file_path)
-
-df = load_data()
-
-# create a Country vs Region lookup dictionary
+# === Load the dropdown options ===
+EMPTY_FACETS = {"types": [], "countries": [], "regions": [], "country_regions": {}, "region_country": {}, "grapes": [], "foods": []}
+
+
+@st.cache_data(ttl=3600)
+def load_facets():
+    """
+    Dropdown lookup tables (countries, regions, foods, ...), fetched once from
+    the API's /facets, or read from the facets file of the last build if the
+    API is unreachable.
+    """
+    try:
+        return api_client.get_facets()
+    except (requests.RequestException, api_client.APIError):
+        return read_facets() or EMPTY_FACETS
+
+facets = load_facets()
+
+
+def show_wines(wines):
+    """One card per wine of an API response."""
+    for row in wines:
+        grapes = row.get("Grapes_list") or row.get("Grapes") or []
+        if isinstance(grapes, str):
+            grapes = parse_list(grapes)
+        harmonize = row.get("Harmonize") or []
+        if isinstance(harmonize, str):
+            harmonize = parse_list(harmonize)
+        with st.container():
+            cols = st.columns([1, 4])
+            with cols[0]:
+                st.image("https://purepng.com/public/uploads/large/purepng.com-wine-bottlefood-winebottlealcoholbeverageliquor-2515194557124w46mz.png", width=80)
+            with cols[1]:
+                st.markdown(f"""
+                    ### {row['WineName']}
+                    - **Grapes**: {", ".join(grapes)}
+                    - **Body**: {row['Body']}
+                    - **ABV**: {row['ABV']}%
+                    - **Region**: {row['RegionName']}
+                    - **Country**: {row['Country']}
+                    - **Food Recommendation**: {", ".join(harmonize)}
+                """)
+                st.markdown("---")
 
 
 # === Session state for page navigation ===
 if "food_page" not in st.session_state:
     st.session_state.food_page = False
 
-# === Extract unique foods from Harmonize column ===
-@st.cache_data
-def get_unique_foods(df):
-    food_set = set()
-    for item in df["Harmonize"].dropna():
-        try:
-            foods = ast.literal_eval(item)
-            food_set.update([f.strip() for f in foods])
-        except:
-            continue
-    return sorted(food_set)
-
-unique_foods = get_unique_foods(df)
+# === Foods of the catalogue ===
+unique_foods = facets["foods"]
 
 # === Title and navigation ===
 
@@ -166,8 +190,6 @@ if not st.session_state.food_page:
         st.session_state.food_page = True
 
 # === Food Recommendation Page ===
-import ast
-
 if st.session_state.food_page:
     st.header("🍽️ Food-Based Wine Recommendation")
 
@@ -180,32 +202,17 @@ if st.session_state.food_page:
 
     # Original working button
     if st.button("🔎 Recommend Wines"):
-        if food_input.strip():
-            food_wines = df[df["Harmonize"].apply(
-                lambda x: food_input.lower() in [item.lower() for item in ast.literal_eval(x)] if isinstance(x, str) and x.startswith("[") else False
-            )]
-
-            if not food_wines.empty:
+        if food_input and food_input.strip():
+            try:
+                food_wines = api_client.cached_recommend_by_foods((food_input,), None, 10)
+            except (requests.RequestException, api_client.APIError) as e:
+                food_wines = None
+                st.error(f"Failed to get recommendations from the API: {e}")
+
+            if food_wines:
                 st.success(f"Found {len(food_wines)} wines for '{food_input}' 🍇")
-                top_food_wines = food_wines[["WineName", "Grapes", "Body", "ABV", "RegionName", "Country", "Harmonize"]].head(10)
-
-                for _, row in top_food_wines.iterrows():
-                    with st.container():
-                        cols = st.columns([1, 4])
-                        with cols[0]:
-                            st.image("https://purepng.com/public/uploads/large/purepng.com-wine-bottlefood-winebottlealcoholbeverageliquor-2515194557124w46mz.png", width=80)
-                        with cols[1]:
-                            st.markdown(f"""
-                                ### {row['WineName']}
-                                - **Grapes**: {", ".join(ast.literal_eval(row['Grapes'])) if isinstance(row['Grapes'], str) and row['Grapes'].startswith("[") else row['Grapes']}
-                                - **Body**: {row['Body']}
-                                - **ABV**: {row['ABV']}%
-                                - **Region**: {row['RegionName']}
-                                - **Country**: {row['Country']}
-                                - **Food Recommendation**: {", ".join(ast.literal_eval(row['Harmonize']))}
-                            """)
-                            st.markdown("---")
-            else:
+                show_wines(food_wines)
+            elif food_wines is not None:
                 st.warning(f"No wine recommendations found for '{food_input}'.")
         else:
             st.warning("Please enter a food.")
@@ -226,23 +233,14 @@ if not st.session_state.food_page:
     col1, col2 = st.columns(2)
 
     with col1:
-        grape_input = st.text_input("Grape", placeholder="e.g., Merlot, Cabernet Sauvignon")
-        wine_name_input = None
-        if grape_input:
-            filtered_wines = df[df["Grapes"].str.contains(grape_input.strip(), case=False, na=False)]
-            wine_name_options = filtered_wines["WineName"].dropna().unique().tolist()
-
-            if wine_name_options:
-                wine_name_input = st.selectbox("Wine Name (filtered by grape)", wine_name_options)
-            else:
-                st.warning("No wines found for that grape.")
-
-        country_input = st.selectbox("Country", df["Country"].dropna().unique().tolist())
+        grape_input = st.multiselect("Grape", facets["grapes"], placeholder="e.g., Merlot, Cabernet Sauvignon")
+        country_input = st.selectbox("Country", facets["countries"])
 
 
     with col2:
-        wine_type_input = st.selectbox("Type", df["Type"].dropna().unique().tolist())
-        region_input = st.selectbox("Region", df["RegionName"].dropna().unique().tolist())
+        wine_type_input = st.selectbox("Type", facets["types"])
+        region_options = facets["country_regions"].get(country_input) or facets["regions"]
+        region_input = st.selectbox("Region", region_options)
 
     col3, col4 = st.columns(2)
     with col3:
@@ -252,38 +250,25 @@ if not st.session_state.food_page:
 
     num_recommendations = st.number_input("How many wine recommendations would you like to see?", min_value=1, max_value=50, value=10, step=1)
 
-    # === Filter logic ===
-    filtered_df = df.copy()
-    if grape_input:
-        filtered_df = filtered_df[filtered_df["Grapes"].str.contains(grape_input, case=False, na=False)]
-    if wine_name_input:
-        filtered_df = filtered_df[filtered_df["WineName"] == wine_name_input]
-
-    filtered_df = filtered_df[filtered_df["Body"] == body_input]
-    filtered_df = filtered_df[(filtered_df["ABV"] >= abv_input - 1) & (filtered_df["ABV"] <= abv_input + 1)]
-    filtered_df = filtered_df[filtered_df["RegionName"] == region_input]
-
     # === Display results as cards ===
     st.subheader("🍇 Recommended Wines")
 
-    if filtered_df.empty:
+    payload = {
+        "wine_type": wine_type_input,
+        "grape_varieties": grape_input or None,
+        "body": body_input,
+        "abv": abv_input,
+        "country": country_input,
+        "region_name": region_input,
+        "n_recommendations": int(num_recommendations),
+    }
+    try:
+        wines = api_client.cached_recommend_wines(payload).get("wines", [])
+    except (requests.RequestException, api_client.APIError) as e:
+        wines = None
+        st.error(f"Failed to get recommendations from the API: {e}")
+
+    if wines:
+        show_wines(wines)
+    elif wines is not None:
         st.warning("No matching wines found. Try changing the filters.")
-    else:
-        top_wines = filtered_df[["WineName", "Grapes", "Body", "ABV", "RegionName", "Country", "Harmonize"]].head(num_recommendations)
-
-        for index, row in top_wines.iterrows():
-            with st.container():
-                cols = st.columns([1, 4])
-                with cols[0]:
-                    st.image("https://purepng.com/public/uploads/large/purepng.com-wine-bottlefood-winebottlealcoholbeverageliquor-2515194557124w46mz.png", width=80)
-                with cols[1]:
-                    st.markdown(f"""
-                        ### {row['WineName']}
-                        - **Grapes**: {", ".join(ast.literal_eval(row['Grapes'])) if isinstance(row['Grapes'], str) and row['Grapes'].startswith("[") else row['Grapes']}
-                        - **Body**: {row['Body']}
-                        - **ABV**: {row['ABV']}%
-                        - **Region**: {row['RegionName']}
-                        - **Country**: {row['Country']}
-                        - **Food Recommendation**: {", ".join(ast.literal_eval(row["Harmonize"]))}
-                    """)
-                    st.markdown("---")
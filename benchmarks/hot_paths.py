@@ -0,0 +1,275 @@
+"""
+Benchmarks of the recommendation and encoding hot paths on synthetic
+X-Wines-shaped catalogues (benchmarks/synthetic_catalogue.py):
+
+- encoder.fit_transform, model.train: fitting the preprocessor and the kNN
+  model on the whole catalogue
+- encoder.transform: the whole catalogue (batch) and one-wine queries (single)
+- recommend.characteristics, recommend.food: queries of the endpoints'
+  functions one after the other (single), and batches of queries run at once
+  on --threads threads as the API's recommend pool does (batch)
+
+Every case reports latency percentiles, throughput and peak memory: the peak
+of Python and numpy allocations over a separate run under tracemalloc, so
+timings are not slowed by it (the preprocessor fit's joblib workers are
+separate processes and not included), and the process's peak RSS once the
+size is done (sizes run smallest first). Results go to a JSON file for
+comparison with later runs (--compare prints the ratios to an earlier file).
+
+    python -m benchmarks.hot_paths --sizes 10000 100000 1000000 --output bench.json
+    python -m benchmarks.hot_paths --sizes 10000 --compare bench.json
+
+The fitted preprocessor and model are written to a temporary directory, not
+models/.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.synthetic_catalogue import BODIES, FOODS, GRAPES, TYPES, knn_features, make_catalogue  # noqa: E402
+from cv_functions import encoder, model as model_module  # noqa: E402
+from cv_functions.food_recommendation import get_wine_recommendations_by_food  # noqa: E402
+from cv_functions.recommendation import get_wine_recommendations_by_characteristics  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PERCENTILES = (50, 90, 99)
+
+
+def peak_memory_mb(function) -> float:
+    """Peak of the allocations function makes, above what is allocated when it starts."""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round((peak - baseline) / 1e6, 1)
+
+
+def summarize(name, size, mode, latencies, seconds, items, memory_mb):
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "size": size,
+        "benchmark": name,
+        "mode": mode,
+        "samples": len(latencies),
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3),
+            **{f"p{p}": round(float(np.percentile(latencies_ms, p)), 3) for p in PERCENTILES},
+            "max": round(float(latencies_ms.max()), 3),
+        },
+        "throughput_per_s": round(items / seconds, 2),
+        "peak_memory_mb": memory_mb,
+    }
+
+
+def run_once(name, size, function, items, repeats):
+    """A whole-catalogue operation: throughput in rows per second."""
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, size, "batch", latencies, sum(latencies), items * repeats, peak_memory_mb(function))
+
+
+def run_single(name, size, function, queries, max_seconds):
+    """Queries one after the other, until all ran or max_seconds passed (at least 3)."""
+    latencies = []
+    started = time.perf_counter()
+    for kwargs in queries:
+        query_started = time.perf_counter()
+        function(**kwargs)
+        latencies.append(time.perf_counter() - query_started)
+        if len(latencies) >= 3 and time.perf_counter() - started > max_seconds:
+            break
+    total = time.perf_counter() - started
+    return summarize(name, size, "single", latencies, total, len(latencies),
+                     peak_memory_mb(lambda: function(**queries[0])))
+
+
+def run_batch(name, size, function, queries, batch_size, threads, max_seconds, query_seconds):
+    """
+    Batches of batch_size queries submitted at once to a pool of threads,
+    until all ran or max_seconds passed. Batches shrink (to threads queries at
+    least) so that one fits in max_seconds, given queries of query_seconds.
+    """
+    batch_size = max(threads, min(batch_size, int(max_seconds / query_seconds * threads)))
+
+    def timed(kwargs):
+        started = time.perf_counter()
+        function(**kwargs)
+        return time.perf_counter() - started
+
+    batches = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+    latencies, total = [], 0.0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for batch in batches:
+            started = time.perf_counter()
+            latencies.extend(pool.map(timed, batch))
+            total += time.perf_counter() - started
+            if total > max_seconds:
+                break
+        memory = peak_memory_mb(lambda: list(pool.map(timed, batches[0])))
+    return summarize(name, size, "batch", latencies, total, len(latencies), memory)
+
+
+def characteristics_queries(rng, n, metadata_df, model):
+    return [{
+        "wine_type": str(rng.choice(TYPES)),
+        "grape_varieties": [str(rng.choice(GRAPES[:20]))],
+        "body": str(rng.choice(BODIES)),
+        "abv": float(np.round(rng.uniform(11, 15), 1)),
+        "country": [None, "France", "Italy", "Spain", "Portugal", "Chile"][rng.integers(6)],
+        "n_recommendations": 5, "metadata_df": metadata_df, "model": model,
+    } for _ in range(n)]
+
+
+def food_queries(rng, n, metadata_df):
+    return [{
+        "features_df": metadata_df,
+        "food_pairing": str(rng.choice(FOODS)),
+        "wine_type": str(rng.choice(TYPES[:3])) if rng.random() < 0.5 else None,
+        "n_recommendations": 5,
+        "exact_match_only": bool(rng.random() < 0.3),
+    } for _ in range(n)]
+
+
+def benchmark_size(size, args):
+    results = []
+    started = time.perf_counter()
+    catalogue = make_catalogue(size, seed=args.seed)
+    features = knn_features(catalogue)
+    print(f"\n{size:,} wines (generated in {time.perf_counter() - started:.1f} s)")
+
+    def record(result):
+        results.append(result)
+        latency = result["latency_ms"]
+        print(f"  {result['benchmark']:<26}{result['mode']:<7}{result['samples']:>5}  "
+              f"p50 {latency['p50']:>10.2f} ms  p99 {latency['p99']:>10.2f} ms  "
+              f"{result['throughput_per_s']:>12,.2f}/s  {result['peak_memory_mb']:>8.1f} MB")
+
+    fitted = {}
+
+    def fit_transform():
+        fitted["X"] = encoder.Encoder_features_fit_transform(features)
+
+    def train():
+        fitted["model"] = model_module.train_model(fitted["X"])
+
+    # the fits print progress: keep the table readable
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        fit_result = run_once("encoder.fit_transform", size, fit_transform, size, args.fit_repeats)
+        train_result = run_once("model.train", size, train, size, args.fit_repeats)
+    record(fit_result)
+    record(train_result)
+
+    record(run_once("encoder.transform", size, lambda: encoder.Encoder_features_transform(features), size,
+                    args.fit_repeats))
+    rows = [{"df": features.iloc[[i]]} for i in np.random.default_rng(args.seed).integers(0, size, args.queries)]
+    record(run_single("encoder.transform", size, encoder.Encoder_features_transform, rows, args.max_seconds))
+
+    rng = np.random.default_rng(args.seed)
+    queries = characteristics_queries(rng, args.queries, catalogue, fitted["model"])
+    single = run_single("recommend.characteristics", size, get_wine_recommendations_by_characteristics, queries,
+                        args.max_seconds)
+    record(single)
+    record(run_batch("recommend.characteristics", size, get_wine_recommendations_by_characteristics, queries,
+                     args.batch_size, args.threads, args.max_seconds, single["latency_ms"]["mean"] / 1000))
+
+    queries = food_queries(rng, args.queries, catalogue)
+    single = run_single("recommend.food", size, get_wine_recommendations_by_food, queries, args.max_seconds)
+    record(single)
+    record(run_batch("recommend.food", size, get_wine_recommendations_by_food, queries, args.batch_size,
+                     args.threads, args.max_seconds, single["latency_ms"]["mean"] / 1000))
+
+    for result in results:
+        result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["size"], r["benchmark"], r["mode"]): r for r in json.load(f)["results"]}
+    print(f"\nagainst {baseline_path} (p50 latency and throughput, this run / baseline):")
+    for result in results:
+        before = baseline.get((result["size"], result["benchmark"], result["mode"]))
+        if before is None:
+            continue
+        p50 = result["latency_ms"]["p50"] / before["latency_ms"]["p50"]
+        throughput = result["throughput_per_s"] / before["throughput_per_s"]
+        print(f"  {result['size']:>9,} {result['benchmark']:<26}{result['mode']:<7}"
+              f"p50 x{p50:>6.2f}  throughput x{throughput:>6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommendation and encoding hot-path benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200, help="queries per single / batch case")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="threads running a batch")
+    parser.add_argument("--fit-repeats", type=int, default=1, help="runs of each whole-catalogue operation")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="time budget of each query case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    # pandas deprecation warnings from the recommenders, once per query otherwise
+    warnings.simplefilter("ignore", FutureWarning)
+    model_dir = tempfile.mkdtemp(prefix="cvino-bench-")
+    encoder.preprocessor_file = os.path.join(model_dir, "preprocessor.pkl")
+    model_module.pickle_file = os.path.join(model_dir, "trained_model.pkl")
+
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": [],
+    }
+    for size in sorted(args.sizes):
+        report["results"].extend(benchmark_size(size, args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report["results"], args.compare)
+
+
+if __name__ == "__main__":
+    main()
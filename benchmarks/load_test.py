@@ -0,0 +1,294 @@
+"""
+HTTP load test of the API on a synthetic catalogue, with the vision API
+replaced by the local stub (interface/stub_vision_api.py).
+
+The harness writes a synthetic deployment (benchmarks/synthetic_catalogue.py:
+catalogue, fitted preprocessor and model), starts the stub with --vision-latency
+seconds per answer to mimic the remote round-trip, then starts the API on that
+deployment:
+
+- subprocess: `uvicorn API.fast:app`
+- preload: `python -m API.serve --workers N`
+- inprocess: uvicorn in a thread of the harness (the load generator then
+  shares the interpreter, and its GIL, with the server)
+- or --url to load an API that is already running
+
+For each --concurrency level, that many clients send requests back to back for
+--duration seconds (after --warmup seconds not counted), each request picked
+from the --mix of /recommend-wines, /recommend-by-food and /read_image. The
+report gives, per level and endpoint, requests per second, latency percentiles,
+the status codes and the error rate (anything but a 2xx, connection errors
+and timeouts included). 503s are the API's backpressure: the client that got
+one waits for its Retry-After before sending its next request.
+
+    python -m benchmarks.load_test --wines 100000 --concurrency 1 4 16 64 --output load.json
+    python -m benchmarks.load_test --server preload --workers 4 --env API_RECOMMEND_WORKERS=2
+"""
+import argparse
+import ast
+import asyncio
+import datetime
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.hot_paths import environment  # noqa: E402
+from benchmarks.synthetic_catalogue import BODIES, FOODS, GRAPES, TYPES, write_deployment  # noqa: E402
+from interface.stub_vision_api import start_stub_server  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENDPOINTS = ("recommend-wines", "recommend-by-food", "read_image")
+PERCENTILES = (50, 90, 99)
+
+
+def label_images(count, seed=0):
+    """JPEG uploads of different content, so no two hit the same label-cache entry."""
+    rng = random.Random(seed)
+    images = []
+    for i in range(count):
+        image = Image.new("RGB", (900, 1200), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(40):
+            x, y = rng.randrange(900), rng.randrange(1200)
+            draw.rectangle([x, y, x + rng.randrange(20, 200), y + rng.randrange(10, 80)],
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        draw.text((120, 500), f"CHATEAU SYNTHETIC {i}", fill=(0, 0, 0))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def stub_wine_info(metadata_path):
+    """A label reading of a catalogue wine, so /read_image resolves it like a real label."""
+    wine = pd.read_csv(metadata_path, nrows=1).iloc[0]
+    return {
+        "wine_name": wine["WineName"],
+        "winery": wine["WineryName"],
+        "wine_type": wine["Type"],
+        "grape_varieties": ast.literal_eval(wine["Grapes"]),
+        "body": wine["Body"],
+        "acidity": wine["Acidity"],
+        "country": wine["Country"],
+        "region": None,
+        "ABV": str(wine["ABV"]),
+    }
+
+
+def make_request(endpoint, rng, images):
+    """(method, path, httpx keyword arguments) of a random request to endpoint."""
+    if endpoint == "recommend-wines":
+        return "POST", "/recommend-wines", {"json": {
+            "wine_type": rng.choice(TYPES),
+            "grape_varieties": [rng.choice(GRAPES[:20])],
+            "body": rng.choice(BODIES),
+            "abv": round(rng.uniform(11, 15), 1),
+            "country": rng.choice([None, "France", "Italy", "Spain", "Portugal", "Chile"]),
+            "n_recommendations": 5,
+        }}
+    if endpoint == "recommend-by-food":
+        return "POST", "/recommend-by-food", {"json": {
+            "food_pairing": rng.choice(FOODS),
+            "wine_type": rng.choice([None, "Red", "White"]),
+            "n_recommendations": 5,
+            "exact_match_only": rng.random() < 0.3,
+        }}
+    return "POST", "/read_image", {"files": {"img": ("label.jpg", rng.choice(images), "image/jpeg")}}
+
+
+async def run_level(url, concurrency, mix, duration, warmup, images, timeout, seed):
+    """Closed-loop load: concurrency clients sending requests back to back."""
+    endpoints, weights = zip(*mix.items())
+    samples = []  # (endpoint, status, seconds) of requests started after the warm-up
+    started = time.perf_counter()
+    measure_from, stop_at = started + warmup, started + warmup + duration
+
+    async def client_loop(client, rng):
+        while time.perf_counter() < stop_at:
+            endpoint = rng.choices(endpoints, weights)[0]
+            method, path, kwargs = make_request(endpoint, rng, images)
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                response, status = None, type(e).__name__
+            if request_started >= measure_from:
+                samples.append((endpoint, status, time.perf_counter() - request_started))
+            if response is not None and response.status_code == 503:
+                # back off as asked, like a well-behaved client, rather than hammering the worker
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        await asyncio.gather(*(client_loop(client, random.Random(seed + i)) for i in range(concurrency)))
+    # the requests still running at stop_at finished after it: measure until the last one did
+    elapsed = max(time.perf_counter() - measure_from, 1e-9)
+
+    report = {"concurrency": concurrency, "seconds": round(elapsed, 2), "endpoints": {}}
+    for endpoint in (*endpoints, "all"):
+        rows = [row for row in samples if endpoint == "all" or row[0] == endpoint]
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[status] = statuses.get(status, 0) + 1
+        errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+        latencies = np.asarray([seconds for _, _, seconds in rows]) * 1000
+        report["endpoints"][endpoint] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "statuses": statuses,
+            "latency_ms": {
+                **{f"p{p}": round(float(np.percentile(latencies, p)), 2) for p in PERCENTILES},
+                "max": round(float(latencies.max()), 2),
+            } if rows else None,
+        }
+    return report
+
+
+def wait_ready(url, timeout, process=None):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/readyz", timeout=2).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"API not ready after {timeout:.0f}s")
+
+
+def start_api(args, env):
+    """Start the API as args.server asks; returns (url, stop function, process or None)."""
+    url = f"http://127.0.0.1:{args.port}"
+    if args.server == "inprocess":
+        # the API reads its configuration when API.fast is imported
+        os.environ.update(env)
+        import uvicorn
+        from API import fast
+
+        server = uvicorn.Server(uvicorn.Config(fast.app, host="127.0.0.1", port=args.port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+
+        def stop():
+            server.should_exit = True
+            thread.join(timeout=30)
+        return url, stop, None
+
+    if args.server == "preload":
+        command = [sys.executable, "-m", "API.serve", "--workers", str(args.workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "API.fast:app", "--host", "127.0.0.1"]
+    command += ["--port", str(args.port), "--log-level", "warning"]
+    log = open(os.path.join(args.deployment, "api.log"), "w")
+    process = subprocess.Popen(command, cwd=ROOT, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+    def stop():
+        process.terminate()
+        process.wait(timeout=30)
+        log.close()
+    return url, stop, process
+
+
+def parse_mix(items):
+    mix = {}
+    for item in items:
+        endpoint, weight = item.split("=", 1)
+        if endpoint not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint {endpoint!r} in --mix (one of {', '.join(ENDPOINTS)})")
+        mix[endpoint] = float(weight)
+    return mix
+
+
+def print_level(level):
+    print(f"\nconcurrency {level['concurrency']} ({level['seconds']:.0f} s)")
+    for endpoint, stats in level["endpoints"].items():
+        latency = stats["latency_ms"] or {"p50": 0, "p90": 0, "p99": 0}
+        print(f"  {endpoint:<19}{stats['requests']:>7}  {stats['rps']:>8.1f} rps  "
+              f"p50 {latency['p50']:>9.1f}  p90 {latency['p90']:>9.1f}  p99 {latency['p99']:>9.1f} ms  "
+              f"errors {stats['error_rate']:>6.1%}  {stats['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test of the API with a stubbed vision backend")
+    parser.add_argument("--wines", type=int, default=100_000, help="size of the synthetic catalogue")
+    parser.add_argument("--deployment", default=None,
+                        help="directory of the synthetic deployment, reused when it matches (default: temporary)")
+    parser.add_argument("--server", choices=["subprocess", "preload", "inprocess"], default="subprocess")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes of --server preload")
+    parser.add_argument("--url", default=None, help="load an API already running instead of starting one")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring, per level")
+    parser.add_argument("--mix", nargs="+", default=["recommend-wines=6", "recommend-by-food=3", "read_image=1"],
+                        metavar="ENDPOINT=WEIGHT")
+    parser.add_argument("--vision-latency", type=float, default=1.0, help="seconds the stub takes per label")
+    parser.add_argument("--images", type=int, default=50, help="distinct label images to upload")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra environment for the API")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    stop = process = None
+    url = args.url
+    if url is None:
+        args.deployment = args.deployment or tempfile.mkdtemp(prefix="cvino-load-")
+        started = time.perf_counter()
+        data_dir, models_dir = write_deployment(args.wines, args.deployment, seed=args.seed)
+        print(f"Synthetic deployment of {args.wines:,} wines in {args.deployment} ({time.perf_counter() - started:.1f} s)")
+
+        _, vision_url = start_stub_server(latency=args.vision_latency,
+                                          wine_info=stub_wine_info(os.path.join(data_dir, "wine_metadata.csv")))
+        env = {
+            "API_DATA_DIR": data_dir,
+            "API_MODELS_DIR": models_dir,
+            "LABEL_ENGINE": "remote",
+            "LABEL_API_BASE_URL": vision_url,
+            "ANTHROPIC_API_KEY": "stub",
+            "LABEL_CACHE_PATH": "",
+            **dict(item.split("=", 1) for item in args.env),
+        }
+        url, stop, process = start_api(args, env)
+    try:
+        print(f"API ready in {wait_ready(url, 300, process):.1f} s at {url}")
+        images = label_images(args.images, args.seed)
+        report = {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "settings": {key: value for key, value in vars(args).items() if key != "output"},
+            "levels": [],
+        }
+        for concurrency in args.concurrency:
+            level = asyncio.run(run_level(url, concurrency, mix, args.duration, args.warmup, images,
+                                          args.timeout, args.seed))
+            report["levels"].append(level)
+            print_level(level)
+    finally:
+        if stop is not None:
+            stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Synthetic X-Wines-shaped catalogues for the benchmarks.
+
+make_catalogue(n) returns n wines with the columns and value types of
+raw_data/wine_metadata.csv as the API reads it (Grapes, Harmonize and
+Grapes_list as list literals), with X-Wines-like distributions: wine types
+in their catalogue proportions, Zipf-distributed grapes, countries, regions
+and foods, one to four grapes and two to six foods per wine. knn_features()
+turns it into the frame the encoder is fitted on, as interface/main_local.py
+does, and write_deployment() writes a catalogue with its fitted preprocessor
+and model where the API can load them (API_DATA_DIR / API_MODELS_DIR).
+Generation is seeded, so a size always gives the same catalogue.
+"""
+import ast
+import os
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+TYPES = ["Red", "White", "Sparkling", "Rosé", "Dessert", "Dessert/Port"]
+TYPE_WEIGHTS = [0.46, 0.33, 0.09, 0.06, 0.03, 0.03]
+BODIES = ["Very light-bodied", "Light-bodied", "Medium-bodied", "Full-bodied", "Very full-bodied"]
+BODY_WEIGHTS = [0.03, 0.14, 0.30, 0.45, 0.08]
+ACIDITIES = ["Low", "Medium", "High"]
+ACIDITY_WEIGHTS = [0.05, 0.25, 0.70]
+COUNTRIES = [
+    ("France", "FR"), ("Italy", "IT"), ("United States", "US"), ("Spain", "ES"), ("Portugal", "PT"),
+    ("Argentina", "AR"), ("Chile", "CL"), ("Germany", "DE"), ("Australia", "AU"), ("South Africa", "ZA"),
+    ("Brazil", "BR"), ("Austria", "AT"), ("New Zealand", "NZ"), ("Greece", "GR"), ("Hungary", "HU"),
+    ("Uruguay", "UY"), ("Romania", "RO"), ("Canada", "CA"), ("Switzerland", "CH"), ("Israel", "IL"),
+    ("Georgia", "GE"), ("Moldova", "MD"), ("Croatia", "HR"), ("Slovenia", "SI"), ("Bulgaria", "BG"),
+    ("Lebanon", "LB"), ("Mexico", "MX"), ("Turkey", "TR"), ("Czech Republic", "CZ"), ("China", "CN"),
+]
+FOODS = [
+    "Beef", "Lamb", "Poultry", "Pork", "Game Meat", "Veal", "Chicken", "Shellfish", "Rich Fish", "Lean Fish",
+    "Codfish", "Pasta", "Vegetarian", "Spicy Food", "Mushrooms", "Cured Meat", "Appetizer", "Snack",
+    "Aperitif", "Sweet Dessert", "Fruit Dessert", "Soft Cheese", "Hard Cheese", "Mild Cheese", "Blue Cheese",
+    "Goat Cheese", "Maturated Cheese", "Tomato Dishes", "Risotto", "Pizza", "Salad", "Sushi", "Barbecue",
+    "Duck", "Tuna", "Salmon", "Seafood", "Paella", "Curry", "Chocolate",
+]
+GRAPES = [
+    "Cabernet Sauvignon", "Merlot", "Chardonnay", "Pinot Noir", "Syrah/Shiraz", "Sauvignon Blanc", "Malbec",
+    "Tempranillo", "Riesling", "Grenache", "Sangiovese", "Cabernet Franc", "Pinot Gris", "Petit Verdot",
+    "Touriga Nacional", "Nebbiolo", "Carménère", "Mourvèdre", "Zinfandel", "Chenin Blanc", "Viognier",
+    "Carignan", "Touriga Franca", "Tinta Roriz", "Semillon", "Muscat/Moscato", "Gewürztraminer",
+    "Grüner Veltliner", "Barbera", "Montepulciano", "Corvina", "Primitivo", "Aglianico", "Albariño",
+    "Pinot Meunier", "Glera", "Verdejo", "Garnacha", "Nero d'Avola", "Tannat", "Pinotage", "Torrontés",
+]
+N_GRAPES = 700
+N_REGIONS = 2000
+RATED_SHARE = 0.85
+
+
+def _zipf_weights(n: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _pick_lists(rng: np.random.Generator, vocabulary, weights, sizes) -> list:
+    """One list per entry of sizes, of that many distinct values drawn with weights."""
+    # draw more than needed in one go, then keep the first distinct values per row
+    draws = rng.choice(len(vocabulary), size=(len(sizes), int(sizes.max()) * 2), p=weights)
+    vocabulary = list(vocabulary)
+    return [[vocabulary[i] for i in list(dict.fromkeys(row))[:size]] for row, size in zip(draws.tolist(), sizes.tolist())]
+
+
+def make_catalogue(n_wines: int, seed: int = 0, first_wine_id: int = 100000) -> pd.DataFrame:
+    """
+    Synthetic wine metadata of n_wines rows (see module docstring).
+
+    Args:
+        n_wines (int): Number of wines
+        seed (int): Random seed
+        first_wine_id (int): WineID of the first wine, the others following
+
+    Returns:
+        pd.DataFrame: Catalogue with the columns of raw_data/wine_metadata.csv
+    """
+    rng = np.random.default_rng(seed)
+    grapes = GRAPES + [f"Grape {i}" for i in range(len(GRAPES), N_GRAPES)]
+
+    # regions belong to countries in proportion to the countries' share of wines
+    country_weights = _zipf_weights(len(COUNTRIES), 1.0)
+    region_country = rng.choice(len(COUNTRIES), size=N_REGIONS, p=country_weights)
+    region_latitude = rng.uniform(-45, 55, size=N_REGIONS)
+    region_longitude = rng.uniform(-125, 150, size=N_REGIONS)
+    region = rng.choice(N_REGIONS, size=n_wines, p=_zipf_weights(N_REGIONS, 0.9))
+    country = region_country[region]
+
+    n_grapes = rng.choice([1, 2, 3, 4], size=n_wines, p=[0.6, 0.2, 0.12, 0.08])
+    grape_lists = _pick_lists(rng, grapes, _zipf_weights(len(grapes)), n_grapes)
+    food_lists = _pick_lists(rng, FOODS, _zipf_weights(len(FOODS), 0.8), rng.integers(2, 7, size=n_wines))
+    grape_literals = [str(value) for value in grape_lists]
+    winery = rng.integers(0, max(1, n_wines // 3), size=n_wines)
+    rated = rng.random(n_wines) < RATED_SHARE
+    first_vintage = rng.integers(1990, 2022, size=n_wines)
+
+    return pd.DataFrame({
+        "WineID": np.arange(first_wine_id, first_wine_id + n_wines),
+        "WineName": [f"{names[0]} Reserve {i}" for i, names in enumerate(grape_lists)],
+        "Type": rng.choice(TYPES, size=n_wines, p=TYPE_WEIGHTS),
+        "Elaborate": np.where(n_grapes == 1, "Varietal/100%", "Assemblage/Blend"),
+        "Grapes": grape_literals,
+        "Harmonize": [str(value) for value in food_lists],
+        "ABV": np.round(rng.normal(13.0, 1.4, size=n_wines).clip(5.0, 22.0), 1),
+        "Body": rng.choice(BODIES, size=n_wines, p=BODY_WEIGHTS),
+        "Acidity": rng.choice(ACIDITIES, size=n_wines, p=ACIDITY_WEIGHTS),
+        "Code": [COUNTRIES[c][1] for c in country],
+        "Country": [COUNTRIES[c][0] for c in country],
+        "RegionID": region + 1000,
+        "RegionName": [f"Region {r}" for r in region],
+        "WineryID": winery + 10000,
+        "WineryName": [f"Winery {w}" for w in winery],
+        "Website": None,
+        "Vintages": [str(list(range(2023, v - 1, -1))[:5]) for v in first_vintage],
+        "latitude": region_latitude[region],
+        "longitude": region_longitude[region],
+        "avg_rating": np.where(rated, rng.normal(3.8, 0.35, size=n_wines).clip(1.0, 5.0), np.nan),
+        "rating_count": np.where(rated, rng.zipf(1.6, size=n_wines).clip(1, 50000), 0),
+        "rating_std": np.where(rated, rng.uniform(0.2, 1.1, size=n_wines), np.nan),
+        "Grapes_list": grape_literals,
+    })
+
+
+def knn_features(catalogue: pd.DataFrame) -> pd.DataFrame:
+    """
+    The encoder's input for a catalogue: main_local.py's columns, with
+    Grapes_list parsed to lists as cv_functions.data does.
+    """
+    drop_columns = ['WineID', 'WineName', 'Elaborate', 'Grapes', 'Harmonize', 'Code', 'Country', 'RegionID',
+                    'RegionName', 'WineryID', 'WineryName', 'Website', 'Vintages']
+    features = catalogue.drop(columns=drop_columns)
+    features["Grapes_list"] = catalogue["Grapes"].map(ast.literal_eval)
+    return features
+
+
+def write_deployment(n_wines: int, directory: str, seed: int = 0):
+    """
+    Write a synthetic catalogue of n_wines to directory/raw_data and its
+    fitted preprocessor and kNN model to directory/models; kept if already
+    there for that size and seed.
+
+    Returns:
+        tuple: (data_dir, models_dir)
+    """
+    from cv_functions import encoder, model as model_module
+
+    data_dir, models_dir = os.path.join(directory, "raw_data"), os.path.join(directory, "models")
+    metadata_path = os.path.join(data_dir, "wine_metadata.csv")
+    marker_path = os.path.join(directory, "deployment.txt")
+    marker = f"{n_wines} wines, seed {seed}\n"
+    if os.path.exists(marker_path) and open(marker_path).read() == marker:
+        return data_dir, models_dir
+
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(models_dir, exist_ok=True)
+    catalogue = make_catalogue(n_wines, seed=seed)
+    catalogue.to_csv(metadata_path, index=False)
+
+    # the fitting functions write to module-level paths: point them at the deployment for the fit
+    saved_paths = encoder.preprocessor_file, model_module.pickle_file
+    encoder.preprocessor_file = os.path.join(models_dir, "preprocessor.pkl")
+    model_module.pickle_file = os.path.join(models_dir, "trained_model.pkl")
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            model_module.train_model(encoder.Encoder_features_fit_transform(knn_features(catalogue)))
+    finally:
+        encoder.preprocessor_file, model_module.pickle_file = saved_paths
+
+    with open(marker_path, "w") as f:
+        f.write(marker)
+    return data_dir, models_dir
@@ -0,0 +1,191 @@
+"""
+The stages of the offline build, from the raw X-Wines files to the artefacts
+the API serves, as a cached pipeline (cv_functions/pipeline.py):
+
+    geocode -> clean_wines -> clean_ratings -> rating_stats -> merge -> encode -> train
+                                                                     \\-> facets   \\-> user_profiles
+
+publish() then copies the outputs to where the API reads them
+(raw_data/wine_metadata.csv and facets.json; models/preprocessor.pkl,
+trained_model.pkl and user_profiles/), skipping those already published.
+
+Geocoding looks new regions up online and remembers them in the geocoding
+cache file, which is an input of the geocode stage: a run that geocodes new
+regions makes the next run repeat the stage once, from the cache only. As
+the stages downstream are keyed on geocode's output, a changed cache file
+only re-runs them when the catalogue's coordinates change.
+"""
+import ast
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List
+
+import pandas as pd
+
+from cv_functions import encoder, custom_encoders, facets as facets_module
+from cv_functions.data_clean_features import ratings_clean_features, wine_clean_features
+from cv_functions.geocode_regions import geocode_regions
+from cv_functions.model import export_shared_model, load_model, train_model
+from cv_functions.pipeline import Pipeline, Stage
+from cv_functions.user_recommendation import build_user_profiles
+from transformers.ratings_agg import Rates_aggregator
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RAW_DIR = os.path.join(ROOT, "raw_data", "last")
+WINES_FILE = "XWines_Full_100K_wines.csv"
+RATINGS_FILE = "XWines_Full_21M_ratings.csv"
+PUBLISHED_FILE = "published.json"
+# columns of the merged catalogue that are not kNN features
+NON_FEATURE_COLUMNS = ['WineID', 'WineName', 'Elaborate', 'Grapes', 'Harmonize', 'Code', 'Country', 'RegionID',
+                       'RegionName', 'WineryID', 'WineryName', 'Website', 'Vintages']
+
+
+def geocode_stage(wines_path, geocoding_cache):
+    return geocode_regions(pd.read_csv(wines_path), cache_file=geocoding_cache, min_delay=2.0)
+
+
+def clean_wines_stage(geocoded_df):
+    wines_clean_df = wine_clean_features(geocoded_df)
+    wines_clean_df['Grapes_list'] = wines_clean_df['Grapes'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
+    return wines_clean_df
+
+
+def clean_ratings_stage(wines_clean_df, ratings_path):
+    return ratings_clean_features(pd.read_csv(ratings_path), wines_clean_df)
+
+
+def rating_stats_stage(ratings_clean_df):
+    return Rates_aggregator(ratings_clean_df)
+
+
+def merge_stage(wines_clean_df, rating_stats_df):
+    # the catalogue the API serves (wine_metadata.csv): wines with ratings
+    return wines_clean_df.merge(rating_stats_df, on='WineID')
+
+
+def encode_stage(metadata_df, out_dir):
+    # fits the preprocessor on the kNN features, saved with the stage's output
+    return encoder.Encoder_features_fit_transform(metadata_df.drop(columns=NON_FEATURE_COLUMNS),
+                                                  filepath=os.path.join(out_dir, "preprocessor.pkl"))
+
+
+def train_stage(features_df, out_dir, n_neighbors=6):
+    train_model(features_df, n_neighbors=n_neighbors, filepath=os.path.join(out_dir, "trained_model.pkl"))
+
+
+def user_profiles_stage(ratings_clean_df, metadata_df, features_df, out_dir):
+    build_user_profiles(ratings_clean_df[['UserID', 'WineID', 'Rating']], metadata_df['WineID'],
+                        features_df.to_numpy(), out_dir=out_dir)
+
+
+def facets_stage(metadata_df):
+    return facets_module.build_facets(metadata_df)
+
+
+def build_stages(raw_dir: str = RAW_DIR, geocoding_cache: str = None, n_neighbors: int = 6) -> List[Stage]:
+    """The build's stages, reading the raw X-Wines files of raw_dir."""
+    geocoding_cache = geocoding_cache or os.path.join(ROOT, "raw_data", "geocoding_cache.pkl")
+    return [
+        Stage("geocode", geocode_stage,
+              files={"wines_path": os.path.join(raw_dir, WINES_FILE), "geocoding_cache": geocoding_cache},
+              code=[geocode_stage, geocode_regions]),
+        Stage("clean_wines", clean_wines_stage, deps=["geocode"], code=[clean_wines_stage, wine_clean_features]),
+        Stage("clean_ratings", clean_ratings_stage, deps=["clean_wines"],
+              files={"ratings_path": os.path.join(raw_dir, RATINGS_FILE)},
+              code=[clean_ratings_stage, ratings_clean_features]),
+        Stage("rating_stats", rating_stats_stage, deps=["clean_ratings"], code=[rating_stats_stage, Rates_aggregator]),
+        Stage("merge", merge_stage, deps=["clean_wines", "rating_stats"]),
+        Stage("encode", encode_stage, deps=["merge"], writes_files=True,
+              code=[encode_stage, encoder, custom_encoders]),
+        Stage("train", train_stage, deps=["encode"], params={"n_neighbors": n_neighbors}, writes_files=True,
+              code=[train_stage, train_model]),
+        Stage("user_profiles", user_profiles_stage, deps=["clean_ratings", "merge", "encode"], writes_files=True,
+              code=[user_profiles_stage, build_user_profiles]),
+        Stage("facets", facets_stage, deps=["merge"], code=[facets_stage, facets_module]),
+    ]
+
+
+def _replace(path: str, write):
+    """Write path through a unique temporary file beside it, so concurrent publishes never share one."""
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        os.close(fd)
+        write(tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _copy(source: str, destination: str):
+    # a fresh modification time (not copy2): reloads spot changed artefacts by size and modification time
+    _replace(destination, lambda tmp_path: shutil.copyfile(source, tmp_path))
+
+
+def publish(pipeline: Pipeline, data_dir: str, models_dir: str) -> Dict[str, str]:
+    """
+    Write the pipeline's outputs (run first) where the API reads them, each
+    one only if its stage's output changed since it was last published there.
+
+    Returns:
+        dict: published path -> stage output hash, for what was written
+    """
+    record_path = os.path.join(pipeline.cache_dir, PUBLISHED_FILE)
+    published = {}
+    if os.path.exists(record_path):
+        with open(record_path) as f:
+            published = json.load(f)
+
+    def needed(path, stage):
+        return published.get(path) != pipeline.output_hashes[stage] or not os.path.exists(path)
+
+    written = {}
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(models_dir, exist_ok=True)
+
+    metadata_path = os.path.join(data_dir, "wine_metadata.csv")
+    if needed(metadata_path, "merge"):
+        _replace(metadata_path, lambda tmp_path: pipeline.output("merge").to_csv(tmp_path, index=False))
+        written[metadata_path] = "merge"
+
+    # after the metadata: the API rebuilds facets older than it
+    facets_path = os.path.join(data_dir, "facets.json")
+    if needed(facets_path, "facets") or metadata_path in written:
+        facets_module.save_facets(pipeline.output("facets"), facets_path)
+        written[facets_path] = "facets"
+
+    preprocessor_path = os.path.join(models_dir, "preprocessor.pkl")
+    if needed(preprocessor_path, "encode"):
+        _copy(os.path.join(pipeline.entry_dir("encode"), "preprocessor.pkl"), preprocessor_path)
+        written[preprocessor_path] = "encode"
+
+    model_path = os.path.join(models_dir, "trained_model.pkl")
+    if needed(model_path, "train"):
+        _copy(os.path.join(pipeline.entry_dir("train"), "trained_model.pkl"), model_path)
+        export_shared_model(load_model(model_path), model_path)
+        written[model_path] = "train"
+
+    profiles_dir = os.path.join(models_dir, "user_profiles")
+    if needed(profiles_dir, "user_profiles"):
+        os.makedirs(profiles_dir, exist_ok=True)
+        source_dir = pipeline.entry_dir("user_profiles")
+        for name in sorted(os.listdir(source_dir)):
+            if name.endswith(".npy") or name == "user_profiles.json":
+                _copy(os.path.join(source_dir, name), os.path.join(profiles_dir, name))
+        written[profiles_dir] = "user_profiles"
+
+    for path, stage in written.items():
+        published[path] = pipeline.output_hashes[stage]
+        print(f"✅ Published {path} ({stage}).")
+
+    def write_record(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(published, f, indent=2)
+
+    _replace(record_path, write_record)
+    return {path: pipeline.output_hashes[stage] for path, stage in written.items()}
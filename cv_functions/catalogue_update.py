@@ -0,0 +1,334 @@
+"""
+Incremental catalogue updates: add or change wines without refitting.
+
+New and changed wines are encoded with the fitted preprocessor, and their
+rows are replaced in or appended to the kNN matrix and the metadata CSV.
+Row i of the model stays row i of the metadata, so the rows the user
+profiles and name index refer to keep their meaning. The fitted preprocessor
+is left as it is, so the update also checks how far the catalogue has drifted
+from what it was fitted on and recommends a full refit
+(interface/main_local.py) when:
+
+- the top-60 grape set has changed: a grape now more frequent than one of the
+  fitted 60 has no column and is encoded as no grape at all
+- a wine type the one-hot encoder has never seen was added (encoded as none)
+- numeric features fall well outside the fitted min-max range (encoded
+  outside [0, 1])
+- the catalogue has grown by more than max_growth since the last full fit, so
+  the medians and ranges no longer describe it
+
+Body and acidity values the ordinal encoders do not know cannot be encoded at
+all: such an update is refused before anything is written.
+"""
+import json
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from cv_functions.encoder import Encoder_features_transform, load_preprocessor
+from cv_functions.facets import build_facets, load_facets, parse_list, save_facets, update_facets
+from cv_functions.model import export_shared_model, load_shared_model, shared_model_paths
+
+KNN_FEATURE_COLUMNS = ['Type', 'ABV', 'Body', 'Acidity', 'latitude', 'longitude', 'avg_rating', 'rating_count',
+                       'rating_std', 'Grapes_list']
+UPDATES_FILE = "catalogue_updates.json"
+MAX_GROWTH = 0.2
+# share of a feature's fitted range a value may fall outside it before it counts as drift
+RANGE_TOLERANCE = 0.05
+
+
+def knn_features(metadata_df: pd.DataFrame) -> pd.DataFrame:
+    """The columns the preprocessor encodes, with Grapes_list as lists."""
+    features = metadata_df[KNN_FEATURE_COLUMNS].copy()
+    features['Grapes_list'] = features['Grapes_list'].map(parse_list)
+    return features
+
+
+def prepare_updates(updates_df: pd.DataFrame, metadata_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Complete the update rows to full metadata rows.
+
+    A changed wine (WineID already in the catalogue) keeps its current values
+    for the columns the update leaves empty. A new wine without coordinates
+    gets those of its region in the catalogue, and no ratings.
+    """
+    if updates_df['WineID'].duplicated().any():
+        raise ValueError("WineIDs repeated in the update: "
+                         f"{updates_df.loc[updates_df['WineID'].duplicated(), 'WineID'].tolist()[:10]}")
+    updates = updates_df.reindex(columns=metadata_df.columns)
+    if 'Grapes_list' not in updates_df.columns and 'Grapes' in updates_df.columns:
+        updates['Grapes_list'] = updates_df['Grapes']
+
+    current = metadata_df.set_index('WineID')
+    changed = updates['WineID'].isin(current.index).to_numpy()
+    if changed.any():
+        previous = current.loc[updates.loc[changed, 'WineID']].reset_index()
+        previous.index = updates.index[changed]
+        updates.loc[changed] = updates.loc[changed].fillna(previous[updates.columns])
+
+    new = ~changed
+    regions = metadata_df.dropna(subset=['latitude', 'longitude']).drop_duplicates('RegionName').set_index('RegionName')
+    for column in ('latitude', 'longitude'):
+        missing = new & updates[column].isna().to_numpy()
+        updates.loc[missing, column] = updates.loc[missing, 'RegionName'].map(regions[column])
+    updates.loc[new, 'rating_count'] = updates.loc[new, 'rating_count'].fillna(0)
+    return _restore_dtypes(updates, metadata_df.dtypes)
+
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: pd.Series) -> pd.DataFrame:
+    """
+    Cast columns back to the catalogue's dtypes, so integer columns are not
+    written as floats ("143.0"). An integer column holding missing values stays float.
+    """
+    castable = {column: dtype for column, dtype in dtypes.items()
+                if not (pd.api.types.is_integer_dtype(dtype) and df[column].isna().any())}
+    return df.astype(castable)
+
+
+def check_drift(preprocessor, catalogue_df: pd.DataFrame, updates_df: pd.DataFrame,
+                grape_counts: Dict[str, int], fitted_rows: int, max_growth: float = MAX_GROWTH) -> Dict[str, Any]:
+    """
+    Compare the updated catalogue with what the preprocessor was fitted on
+    (see module docstring).
+
+    Args:
+        catalogue_df (pd.DataFrame): Catalogue metadata after the update
+        updates_df (pd.DataFrame): The new and changed rows
+        grape_counts (dict): Wines per grape over the updated catalogue
+        fitted_rows (int): Catalogue size at the last full fit
+
+    Returns:
+        dict: refit_recommended, reasons, and the details of each check
+    """
+    transformers = preprocessor.named_transformers_
+    reasons = []
+
+    # grapes more frequent than a fitted one (ties with the 60th do not count)
+    top_grapes = list(transformers['Grape'].top_grapes)
+    least_fitted = min((grape_counts.get(grape, 0) for grape in top_grapes), default=0)
+    entering = sorted((grape for grape, count in grape_counts.items()
+                       if grape not in top_grapes and count > least_fitted), key=lambda g: -grape_counts[g])
+    most_outside = max((count for grape, count in grape_counts.items() if grape not in top_grapes), default=0)
+    leaving = sorted((grape for grape in top_grapes if grape_counts.get(grape, 0) < most_outside),
+                     key=lambda g: grape_counts.get(g, 0))
+    if entering:
+        reasons.append(f"top-{len(top_grapes)} grapes changed: {', '.join(entering[:5])} now more frequent "
+                       f"than {', '.join(leaving[:5])}")
+
+    known_types = set(transformers['Type'].categories_[0])
+    unseen_types = sorted(set(updates_df['Type'].dropna()) - known_types)
+    if unseen_types:
+        reasons.append(f"wine types the encoder has never seen: {', '.join(unseen_types)}")
+
+    numeric = {name: columns for name, _, columns in preprocessor.transformers_}['num']
+    scaler = transformers['num'].named_steps['scaler']
+    out_of_range = {}
+    for column, low, high in zip(numeric, scaler.data_min_, scaler.data_max_):
+        values = pd.to_numeric(updates_df[column], errors='coerce')
+        # a little past the edges is harmless (e.g. rating_count 0 for new wines when the fit saw 1 and up)
+        margin = RANGE_TOLERANCE * (high - low)
+        outside = int(((values < low - margin) | (values > high + margin)).sum())
+        if outside:
+            out_of_range[column] = {"rows": outside, "fitted_range": [float(low), float(high)],
+                                    "update_range": [float(values.min()), float(values.max())]}
+    if out_of_range:
+        reasons.append(f"values outside the fitted range of {', '.join(out_of_range)}")
+
+    growth = (len(catalogue_df) - fitted_rows) / max(fitted_rows, 1)
+    if growth > max_growth:
+        reasons.append(f"catalogue grew {growth:.0%} since the last full fit (more than {max_growth:.0%})")
+
+    return {
+        "refit_recommended": bool(reasons),
+        "reasons": reasons,
+        "grapes_entering_top": entering,
+        "grapes_leaving_top": leaving,
+        "unseen_types": unseen_types,
+        "out_of_range": out_of_range,
+        "growth_since_fit": round(growth, 4),
+    }
+
+
+def _check_encodable(preprocessor, updates_df: pd.DataFrame):
+    """Refuse values the ordinal encoders cannot encode (they raise on unknown categories)."""
+    for name in ('Body', 'Acidity'):
+        known = set(preprocessor.named_transformers_[name].named_steps['ordinal'].categories_[0])
+        unknown = sorted(set(updates_df[name].dropna()) - known)
+        if unknown:
+            raise ValueError(f"unknown {name} values {unknown}: the preprocessor needs a full refit to encode them")
+
+
+class _FileChanges:
+    """
+    The files an update replaces or appends to, kept restorable until it is
+    done: rollback() puts each one back as it was, so an update failing
+    half-way does not leave a model that no longer matches the metadata.
+    """
+
+    def __init__(self):
+        self._undo = []
+        self._backups = []
+
+    def keep(self, path: str):
+        """Remember path as it is now (a hard link to the current file), before it is replaced."""
+        if not os.path.exists(path):
+            self._undo.append(lambda: os.path.exists(path) and os.remove(path))
+            return
+        backup = f"{path}.bak"
+        if os.path.exists(backup):
+            os.remove(backup)
+        os.link(path, backup)
+        self._backups.append(backup)
+        self._undo.append(lambda: self._restore(backup, path))
+
+    @staticmethod
+    def _restore(backup: str, path: str):
+        # renaming a hard link over another link to the same file is a no-op that keeps both names
+        if os.path.exists(path) and os.path.samefile(backup, path):
+            os.remove(backup)
+        else:
+            os.replace(backup, path)
+
+    def replace(self, path: str, write, mode: str = "w"):
+        """write(f) to a temporary file next to path, then rename it over path."""
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.chmod(tmp_path, 0o644)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.keep(path)
+        os.replace(tmp_path, path)
+
+    def append_csv(self, df: pd.DataFrame, path: str):
+        size = os.path.getsize(path)
+
+        def truncate():
+            with open(path, "r+b") as f:
+                f.truncate(size)
+
+        self._undo.append(truncate)
+        df.to_csv(path, mode='a', header=False, index=False)
+
+    def rollback(self):
+        for undo in reversed(self._undo):
+            undo()
+        self._undo, self._backups = [], []
+
+    def commit(self):
+        for backup in self._backups:
+            os.remove(backup)
+        self._undo, self._backups = [], []
+
+
+def update_catalogue(updates_df: pd.DataFrame, metadata_path: str, model_path: str, preprocessor_path: str,
+                     facets_path: Optional[str] = None, max_growth: float = MAX_GROWTH,
+                     dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Add the wines of updates_df to the catalogue and replace the ones it
+    already has (by WineID), without refitting the preprocessor or the model.
+
+    Args:
+        updates_df (pd.DataFrame): Wines with the metadata columns; WineID required
+        metadata_path (str): The catalogue's wine_metadata.csv
+        model_path (str): The kNN model pickle (its memory-mappable export is rewritten too)
+        preprocessor_path (str): The fitted preprocessor
+        facets_path (str): facets.json to rebuild, if any
+        max_growth (float): Growth since the last full fit above which a refit is recommended
+        dry_run (bool): Only encode and check drift, write nothing
+
+    Returns:
+        dict: added / changed counts, rows, seconds taken and the drift report
+    """
+    started = time.perf_counter()
+    # round_trip: the default float parser can be off in the last digit, which would rewrite every row
+    metadata_df = pd.read_csv(metadata_path, float_precision="round_trip")
+    model = load_shared_model(model_path)
+    # this file's preprocessor, not the process-wide one load_preprocessor() may already hold
+    preprocessor = load_preprocessor(preprocessor_path, cached=False)
+    if len(metadata_df) != model._fit_X.shape[0]:
+        raise ValueError(f"{metadata_path} has {len(metadata_df)} rows but the model {model._fit_X.shape[0]}")
+
+    updates = prepare_updates(updates_df, metadata_df)
+    _check_encodable(preprocessor, updates)
+    vectors = Encoder_features_transform(knn_features(updates), preprocessor=preprocessor).to_numpy(
+        dtype=model._fit_X.dtype)
+
+    # changed wines keep their row, new wines are appended in the update's order
+    rows = pd.Index(metadata_df['WineID']).get_indexer(updates['WineID'])
+    changed, new = rows >= 0, rows < 0
+    catalogue_df = metadata_df.copy()
+    # column by column: a whole-row assignment goes through one object array and turns int columns into floats
+    changed_index = catalogue_df.index[rows[changed]]
+    for column in catalogue_df.columns:
+        catalogue_df.loc[changed_index, column] = updates.loc[changed, column].to_numpy()
+    catalogue_df = _restore_dtypes(pd.concat([catalogue_df, updates[new]], ignore_index=True), metadata_df.dtypes)
+    matrix = np.concatenate([model._fit_X, vectors[new]])
+    matrix[rows[changed]] = vectors[changed]
+
+    # drift is measured from the last full fit: a new preprocessor starts a new history
+    history_path = os.path.join(os.path.dirname(model_path), UPDATES_FILE)
+    history = {}
+    if os.path.exists(history_path):
+        with open(history_path) as f:
+            history = json.load(f)
+    fitted_at = os.path.getmtime(preprocessor_path)
+    if history.get("preprocessor_mtime") != fitted_at:
+        history = {"preprocessor_mtime": fitted_at, "fitted_rows": len(metadata_df), "updates": []}
+
+    # the facets are updated from the rows that change rather than recounted
+    removed_df = metadata_df.iloc[rows[changed]]
+    if facets_path:
+        facets = update_facets(load_facets(metadata_df, metadata_path, facets_path), updates, removed_df)
+    else:
+        facets = build_facets(catalogue_df)
+    drift = check_drift(preprocessor, catalogue_df, updates, facets["value_counts"]["grapes"],
+                        history["fitted_rows"], max_growth)
+    report = {
+        "added": int(new.sum()),
+        "changed": int(changed.sum()),
+        "rows": len(catalogue_df),
+        "drift": drift,
+    }
+    if dry_run:
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    # each file is replaced atomically; a running API keeps what it loaded until it reloads.
+    # If one of them fails, the ones already written are put back.
+    from sklearn.neighbors import NearestNeighbors
+
+    updated_model = NearestNeighbors(**model.get_params()).fit(matrix)
+    if getattr(model, "feature_names_in_", None) is not None:
+        updated_model.feature_names_in_ = model.feature_names_in_
+
+    changes = _FileChanges()
+    try:
+        changes.replace(model_path, lambda f: pickle.dump(updated_model, f), mode="wb")
+        changes.keep(shared_model_paths(model_path)[0])
+        export_shared_model(updated_model, model_path)
+
+        if changed.any():
+            changes.replace(metadata_path, lambda f: catalogue_df.to_csv(f, index=False))
+        else:
+            changes.append_csv(updates[new], metadata_path)
+        if facets_path:
+            changes.keep(facets_path)
+            save_facets(facets, facets_path)
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        history["updates"].append({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **report})
+        changes.replace(history_path, lambda f: json.dump(history, f, indent=2))
+    except BaseException:
+        changes.rollback()
+        raise
+    changes.commit()
+    return report
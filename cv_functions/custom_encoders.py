@@ -2,7 +2,6 @@ import pandas as pd
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.preprocessing import OrdinalEncoder, MinMaxScaler
-import ipdb
 
 # Import from transformers/top_k_encoder.py
 class TopNGrapeOneHotEncoder(BaseEstimator, TransformerMixin):
@@ -13,12 +13,14 @@ from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder, S
 from sklearn.impute import SimpleImputer
 # Using absolute imports with the project root directory
 from cv_functions.custom_encoders import TopNGrapeOneHotEncoder, BodyOrdinalEncoder, AcidOrdinalEncoder, RatingsStatsAggregator
-import ipdb
 
 
 LOCAL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
 preprocessor_file = os.path.join(LOCAL_PATH, "preprocessor.pkl")
 
+# fitted preprocessor, unpickled once per process
+_preprocessor = None
+
 
 # Function to get column names
 def get_feature_names_out(ct):
@@ -30,11 +32,13 @@ def get_feature_names_out(ct):
             names.extend(cols)
     return names
 
-def Encoder_features_fit_transform(df:pd.DataFrame):
+def Encoder_features_fit_transform(df:pd.DataFrame, filepath=None):
     '''
-    encode features
+    encode features, saving the fitted preprocessor to filepath (default
+    models/preprocessor.pkl)
 
     '''
+    global _preprocessor
     body_categories = [['Very light-bodied', 'Light-bodied', 'Medium-bodied', 'Full-bodied', 'Very full-bodied']]
     acidity_categories = [['Low', 'Medium', 'High']]
     numeric_features = ['ABV','latitude', 'longitude', 'avg_rating', 'rating_count', 'rating_std']
@@ -74,8 +78,9 @@ def Encoder_features_fit_transform(df:pd.DataFrame):
     preprocessor.fit(df)
 
     #save preprocessor into pickle
-    with open(preprocessor_file, 'wb') as f:
+    with open(filepath or preprocessor_file, 'wb') as f:
         pickle.dump(preprocessor, f)
+    _preprocessor = preprocessor
 
 
     df_processed = preprocessor.transform(df)
@@ -94,10 +99,26 @@ def Encoder_features_fit_transform(df:pd.DataFrame):
 
     return X_df
 
-def Encoder_features_transform(df:pd.DataFrame):
-
-    with open(preprocessor_file, 'rb') as f:
-        preprocessor = pickle.load(f)
+def load_preprocessor(filepath=None, cached=True):
+    """
+    Return the fitted preprocessor, loading it from filepath (default
+    models/preprocessor.pkl) on first use. cached=False reads the file again
+    and leaves the process-wide copy as it is (the API's reloads).
+    """
+    global _preprocessor
+    if not cached:
+        with open(filepath or preprocessor_file, 'rb') as f:
+            return pickle.load(f)
+    if _preprocessor is None:
+        with open(filepath or preprocessor_file, 'rb') as f:
+            _preprocessor = pickle.load(f)
+    return _preprocessor
+
+
+def Encoder_features_transform(df:pd.DataFrame, preprocessor=None):
+
+    if preprocessor is None:
+        preprocessor = load_preprocessor()
 
     #preprocessor.set_output(transform='pandas')
     df_processed = preprocessor.transform(df)
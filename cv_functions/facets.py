@@ -0,0 +1,178 @@
+import ast
+import json
+import os
+import tempfile
+from collections import Counter
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+LOCAL_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data"))
+FACETS_PATH = os.path.join(LOCAL_DATA_PATH, "facets.json")
+
+COUNTED_COLUMNS = ["Type", "Body", "Acidity", "Country", "RegionName"]
+
+
+def parse_list(value) -> list:
+    """
+    Parse a list cell of the metadata ("['Beef', 'Lamb']"); a plain string is a one-item list.
+    """
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+
+def count_values(values: pd.Series, as_list: bool = False) -> Counter:
+    """
+    Count the stripped string values of a column (of the items of a list column).
+    """
+    # count distinct cells first: list columns repeat the same few strings
+    counts = Counter()
+    if as_list:
+        # parsed lists (Grapes_list) are unhashable: value_counts would compare them one by one
+        values = values.map(lambda value: tuple(value) if isinstance(value, list) else value)
+    for value, count in values.value_counts().items():
+        for item in (parse_list(value) if as_list else [value]):
+            if isinstance(item, str) and item.strip():
+                counts[item.strip()] += count
+    return counts
+
+
+def _first_seen(values: pd.Series) -> list:
+    return values.dropna().unique().tolist()
+
+
+def build_facets(metadata_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Lookup tables the UIs build their filters from.
+
+    Returns:
+        dict: n_wines; types, countries and regions in catalogue order;
+        country_regions (country -> regions) and region_country; sorted grape
+        and food vocabularies; value_counts of the main columns, grapes and foods
+    """
+    grapes_column = "Grapes_list" if "Grapes_list" in metadata_df.columns else "Grapes"
+    grape_counts = count_values(metadata_df[grapes_column], as_list=True)
+    food_counts = count_values(metadata_df["Harmonize"], as_list=True) if "Harmonize" in metadata_df.columns else Counter()
+
+    country_regions = {
+        country: _first_seen(regions)
+        for country, regions in metadata_df.groupby("Country")["RegionName"]
+    }
+
+    value_counts = {
+        column: dict(count_values(metadata_df[column]).most_common())
+        for column in COUNTED_COLUMNS if column in metadata_df.columns
+    }
+    value_counts["grapes"] = dict(grape_counts.most_common())
+    value_counts["foods"] = dict(food_counts.most_common())
+
+    return {
+        "n_wines": int(len(metadata_df)),
+        "types": _first_seen(metadata_df["Type"]),
+        "countries": _first_seen(metadata_df["Country"]),
+        "regions": _first_seen(metadata_df["RegionName"]),
+        "country_regions": country_regions,
+        "region_country": {
+            region: country for country, regions in country_regions.items() for region in regions
+        },
+        "grapes": sorted(grape_counts),
+        "foods": sorted(food_counts),
+        "value_counts": value_counts,
+    }
+
+
+def update_facets(facets: Dict[str, Any], added_df: pd.DataFrame, removed_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Facets of the catalogue after adding the rows of added_df and removing
+    those of removed_df, from the facets before, without recounting the whole
+    catalogue. A value whose count falls to zero disappears; regions stay
+    listed under every country they were seen with.
+    """
+    removed_df = removed_df if removed_df is not None else added_df.iloc[:0]
+    facets = json.loads(json.dumps(facets))
+    value_counts = facets["value_counts"]
+
+    def apply(key, added: Counter, removed: Counter):
+        counts = Counter(value_counts.get(key, {}))
+        counts.update(added)
+        counts.subtract(removed)
+        value_counts[key] = {value: count for value, count in counts.most_common() if count > 0}
+
+    for column in COUNTED_COLUMNS:
+        if column in added_df.columns:
+            apply(column, count_values(added_df[column]), count_values(removed_df[column]))
+    grapes_column = "Grapes_list" if "Grapes_list" in added_df.columns else "Grapes"
+    apply("grapes", count_values(added_df[grapes_column], as_list=True), count_values(removed_df[grapes_column], as_list=True))
+    if "Harmonize" in added_df.columns:
+        apply("foods", count_values(added_df["Harmonize"], as_list=True), count_values(removed_df["Harmonize"], as_list=True))
+
+    def merged(values, key, new_values):
+        kept = [value for value in values if value in value_counts[key]]
+        return kept + [value for value in new_values if value not in kept and value in value_counts[key]]
+
+    facets["n_wines"] += len(added_df) - len(removed_df)
+    facets["types"] = merged(facets["types"], "Type", _first_seen(added_df["Type"]))
+    facets["countries"] = merged(facets["countries"], "Country", _first_seen(added_df["Country"]))
+    facets["regions"] = merged(facets["regions"], "RegionName", _first_seen(added_df["RegionName"]))
+    for country, regions in added_df.groupby("Country")["RegionName"]:
+        facets["country_regions"][country] = merged(facets["country_regions"].get(country, []), "RegionName", _first_seen(regions))
+    facets["country_regions"] = {
+        country: [region for region in regions if region in value_counts["RegionName"]]
+        for country, regions in facets["country_regions"].items() if country in value_counts["Country"]
+    }
+    facets["region_country"] = {
+        region: country for country, regions in facets["country_regions"].items() for region in regions
+    }
+    facets["grapes"] = sorted(value_counts["grapes"])
+    facets["foods"] = sorted(value_counts["foods"])
+    return facets
+
+
+def save_facets(facets: Dict[str, Any], path: str = FACETS_PATH):
+    # write then rename, so a reader never sees a half-written file; a temporary
+    # file of its own, so concurrent writers do not interleave in one file
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(facets, f, ensure_ascii=False)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_facets(path: str = FACETS_PATH) -> Optional[Dict[str, Any]]:
+    """
+    The facets file as written by save_facets, or None if it is missing or unreadable.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_facets(metadata_df: pd.DataFrame, metadata_path: Optional[str] = None,
+                path: str = FACETS_PATH) -> Dict[str, Any]:
+    """
+    Read the facets file, rebuilding (and rewriting) it when it is missing or
+    older than the metadata CSV it was built from.
+    """
+    is_fresh = os.path.exists(path) and (
+        metadata_path is None or os.path.getmtime(path) >= os.path.getmtime(metadata_path)
+    )
+    if is_fresh:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    facets = build_facets(metadata_df)
+    try:
+        save_facets(facets, path)
+    except OSError as e:
+        print(f"❌ Could not write facets to {path}: {e}")
+    return facets
@@ -3,6 +3,8 @@ import numpy as np
 import ast
 from collections import Counter
 
+from cv_functions.tracing import span
+
 def get_wine_recommendations_by_food(
     features_df,                     # ✅ Added features_df as parameter
     food_pairing,                    # Required: Food you want to pair with (e.g., "steak", "pasta")
@@ -33,8 +35,9 @@ def get_wine_recommendations_by_food(
                 return []
         return x if isinstance(x, list) else []
 
-    working_df = features_df.copy()
-    working_df['Harmonize'] = working_df['Harmonize'].apply(safe_eval_list)
+    with span("food.parse"):
+        working_df = features_df.copy()
+        working_df['Harmonize'] = working_df['Harmonize'].apply(safe_eval_list)
 
     # Step 3: Define function to check if a food is in the harmonize list
     def contains_food(harmonize_list, food_term):
@@ -48,55 +51,58 @@ def get_wine_recommendations_by_food(
         return False
 
     # Step 4: Create food match column
-    working_df['food_match'] = working_df['Harmonize'].apply(
-        lambda x: contains_food(x, food_search))
+    with span("food.match"):
+        working_df['food_match'] = working_df['Harmonize'].apply(
+            lambda x: contains_food(x, food_search))
 
-    food_matched_wines = working_df[working_df['food_match']]
+        food_matched_wines = working_df[working_df['food_match']]
 
     if food_matched_wines.empty:
         print(f"No wines found that pair with '{food_pairing}'. Try a different food.")
         return pd.DataFrame()
 
     # Step 5: Apply additional filters
-    if wine_type is not None:
-        food_matched_wines = food_matched_wines[food_matched_wines['Type'] == wine_type]
+    with span("food.filter"):
+        if wine_type is not None:
+            food_matched_wines = food_matched_wines[food_matched_wines['Type'] == wine_type]
 
-    if grape_varieties is not None:
-        if isinstance(grape_varieties, str):
-            grape_list = [g.strip() for g in grape_varieties.split(',')] if ',' in grape_varieties else [grape_varieties]
-        else:
-            grape_list = grape_varieties
+        if grape_varieties is not None:
+            if isinstance(grape_varieties, str):
+                grape_list = [g.strip() for g in grape_varieties.split(',')] if ',' in grape_varieties else [grape_varieties]
+            else:
+                grape_list = grape_varieties
 
-        def has_any_grape(wine_grapes, target_grapes):
-            if not isinstance(wine_grapes, list):
-                return False
-            return any(grape in wine_grapes for grape in target_grapes)
+            def has_any_grape(wine_grapes, target_grapes):
+                if not isinstance(wine_grapes, list):
+                    return False
+                return any(grape in wine_grapes for grape in target_grapes)
 
-        if 'Grapes_list' in food_matched_wines.columns:
-            food_matched_wines['Grapes_list'] = food_matched_wines['Grapes_list'].apply(safe_eval_list)
-        else:
-            print("⚠️ Column 'Grapes_list' not found in the dataset.")
-            return pd.DataFrame()  # or optionally return food_matched_wines without grape filtering
+            if 'Grapes_list' in food_matched_wines.columns:
+                food_matched_wines['Grapes_list'] = food_matched_wines['Grapes_list'].apply(safe_eval_list)
+            else:
+                print("⚠️ Column 'Grapes_list' not found in the dataset.")
+                return pd.DataFrame()  # or optionally return food_matched_wines without grape filtering
 
-        food_matched_wines = food_matched_wines[
-            food_matched_wines['Grapes_list'].apply(lambda x: has_any_grape(x, grape_list))]
+            food_matched_wines = food_matched_wines[
+                food_matched_wines['Grapes_list'].apply(lambda x: has_any_grape(x, grape_list))]
 
-    if body is not None:
-        food_matched_wines = food_matched_wines[food_matched_wines['Body'] == body]
+        if body is not None:
+            food_matched_wines = food_matched_wines[food_matched_wines['Body'] == body]
 
-    if country is not None:
-        food_matched_wines = food_matched_wines[food_matched_wines['Country'] == country]
+        if country is not None:
+            food_matched_wines = food_matched_wines[food_matched_wines['Country'] == country]
 
-    if acidity is not None:
-        food_matched_wines = food_matched_wines[food_matched_wines['Acidity'] == acidity]
+        if acidity is not None:
+            food_matched_wines = food_matched_wines[food_matched_wines['Acidity'] == acidity]
 
-    if region_name is not None:
-        food_matched_wines = food_matched_wines[food_matched_wines['RegionName'] == region_name]
+        if region_name is not None:
+            food_matched_wines = food_matched_wines[food_matched_wines['RegionName'] == region_name]
 
     if food_matched_wines.empty:
         print(f"No wines found that match all your criteria with '{food_pairing}'.")
         return pd.DataFrame()
 
     # Step 6: Sort and return results
-    result = food_matched_wines.sort_values('avg_rating', ascending=False).head(n_recommendations)
+    with span("food.rank"):
+        result = food_matched_wines.sort_values('avg_rating', ascending=False).head(n_recommendations)
     return result
@@ -3,8 +3,6 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import pickle
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 
 
 def geocode_regions(df, region_column='RegionName',country_column = 'Country', cache_file='./raw_data/geocoding_cache.pkl', min_delay=1.0):
@@ -20,6 +18,10 @@ def geocode_regions(df, region_column='RegionName',country_column = 'Country', c
     Returns:
         pd.DataFrame: DataFrame with latitude/longitude columns
     """
+    # offline only: kept out of the API's imports
+    from geopy.geocoders import Nominatim
+    from geopy.extra.rate_limiter import RateLimiter
+
     # Initialize geocoder with rate limiter
     geolocator = Nominatim(user_agent="regional_analysis_app")
     geocode = RateLimiter(geolocator.geocode, min_delay_seconds=min_delay)
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import numpy as np
+from PIL import Image
+
+LOCAL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data", "label_cache.sqlite"))
+# disk hits whose access times are buffered before they are written in one transaction
+TOUCH_BATCH = 64
+
+
+def image_key(image: Image.Image) -> str:
+    """
+    Content hash of a decoded, normalized image (the pixels sent to the API),
+    so re-encoded or re-uploaded copies of the same photo share a key.
+    """
+    image = image.convert("RGB")
+    digest = hashlib.sha256()
+    digest.update(f"{image.width}x{image.height}".encode("ascii"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    64-bit difference hash (dHash): compares neighbouring pixels of a 9x8
+    grayscale thumbnail, so small crops, re-compression or lighting changes
+    flip only a few bits.
+    """
+    pixels = np.asarray(image.convert("L").resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class LabelCache:
+    """
+    Cache of parsed wine_info dicts keyed by image content.
+
+    An in-memory LRU sits in front of a bounded SQLite store; the oldest
+    entries (by last use) are evicted once max_entries is exceeded. With
+    phash_distance > 0, an image with no exact match is also matched to a
+    cached image whose perceptual hash differs by at most that many bits.
+
+    Every method blocks (hashing, SQLite): async callers run them off the event loop.
+    """
+
+    def __init__(self, path=LOCAL_PATH, max_entries=10000, memory_entries=512, phash_distance=4):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.phash_distance = phash_distance
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._touched = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = self._connect()
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS labels (
+                   key TEXT PRIMARY KEY,
+                   phash INTEGER NOT NULL,
+                   wine_info TEXT NOT NULL,
+                   payload_bytes INTEGER NOT NULL,
+                   last_used REAL NOT NULL)"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS labels_last_used ON labels (last_used)")
+        self._db.commit()
+
+        # perceptual hashes of every stored entry, scanned with vectorised XOR/popcount
+        rows = self._db.execute("SELECT key, phash FROM labels").fetchall()
+        self._phash_keys = [key for key, _ in rows]
+        self._phashes = np.array([phash for _, phash in rows], dtype=np.int64).view(np.uint64)
+
+    def get(self, image: Image.Image) -> Optional[Dict[str, Any]]:
+        """
+        Look up the wine_info of a normalized image, or None on a miss.
+        """
+        key = image_key(image)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+            elif self.phash_distance:
+                near_key = self._nearest(perceptual_hash(image))
+                entry = self._lookup(near_key) if near_key else None
+                if entry is not None:
+                    self.near_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            wine_info, payload_bytes = entry
+            self.bytes_saved += payload_bytes
+            return dict(wine_info)
+
+    def put(self, image: Image.Image, wine_info: Dict[str, Any], payload_bytes: int = 0):
+        """
+        Store the wine_info extracted from a normalized image.
+
+        Args:
+            payload_bytes (int): Size of the request body a future hit will save
+        """
+        key = image_key(image)
+        phash = perceptual_hash(image)
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM labels WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?, ?)",
+                (key, _to_signed(phash), json.dumps(wine_info), payload_bytes, time.time()),
+            )
+            if not exists:
+                self._phash_keys.append(key)
+                self._phashes = np.append(self._phashes, np.uint64(phash))
+            self._write_touches()
+            self._evict()
+            self._db.commit()
+            self._remember(key, (dict(wine_info), payload_bytes))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._phash_keys),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def close(self):
+        with self._lock:
+            self._write_touches()
+            self._db.commit()
+            self._db.close()
+
+    def reopen(self):
+        """
+        Open a connection of this process's own after a fork. SQLite connections
+        must not cross a fork, so the inherited one is kept unused (closing it
+        from the child is not safe either).
+        """
+        self._lock = threading.Lock()
+        self._inherited_db, self._db = self._db, self._connect()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _lookup(self, key):
+        # memory hits skip the disk write, so on-disk recency lags for hot entries
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        row = self._db.execute("SELECT wine_info, payload_bytes FROM labels WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), row[1])
+        self._remember(key, entry)
+        self._touch(key)
+        return entry
+
+    def _touch(self, key):
+        # buffered: written with the next put, or once TOUCH_BATCH hits are pending
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._write_touches()
+            self._db.commit()
+
+    def _write_touches(self):
+        if self._touched:
+            self._db.executemany("UPDATE labels SET last_used = ? WHERE key = ?",
+                                 [(last_used, key) for key, last_used in self._touched.items()])
+            self._touched.clear()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _nearest(self, phash: int) -> Optional[str]:
+        if not len(self._phashes):
+            return None
+        differing = np.unpackbits((self._phashes ^ np.uint64(phash)).view(np.uint8)).reshape(-1, 64).sum(axis=1)
+        best = int(np.argmin(differing))
+        return self._phash_keys[best] if differing[best] <= self.phash_distance else None
+
+    def _evict(self):
+        excess = len(self._phash_keys) - self.max_entries
+        if excess <= 0:
+            return
+        evicted = [key for (key,) in self._db.execute(
+            "SELECT key FROM labels ORDER BY last_used LIMIT ?", (excess,))]
+        self._db.executemany("DELETE FROM labels WHERE key = ?", [(key,) for key in evicted])
+        evicted = set(evicted)
+        keep = [i for i, key in enumerate(self._phash_keys) if key not in evicted]
+        self._phash_keys = [self._phash_keys[i] for i in keep]
+        self._phashes = self._phashes[keep]
+        for key in evicted:
+            self._memory.pop(key, None)
@@ -0,0 +1,192 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+from PIL import Image
+
+from cv_functions.wine_label_ai2 import (
+    API_IMAGE_SIZE,
+    extract_wine_info_from_image_async,
+    failed_wine_info,
+    resize_image_for_api,
+    run_blocking,
+)
+
+# Which engine reads label uploads:
+#   remote - the vision API (wine_label_ai2)
+#   local  - Tesseract/EasyOCR through WineLabelOCR, no network on the hot path
+#   tiered - local first, the vision API only when the local reading is not confident enough
+ENGINES = ("remote", "local", "tiered")
+LABEL_ENGINE = os.environ.get("LABEL_ENGINE", "remote")
+if LABEL_ENGINE not in ENGINES:
+    raise ValueError(f"LABEL_ENGINE must be one of {ENGINES}, got {LABEL_ENGINE!r}")
+
+LOCAL_MIN_CONFIDENCE = float(os.environ.get("LABEL_LOCAL_MIN_CONFIDENCE", 40))
+LOCAL_IMAGE_SIZE = int(os.environ.get("LABEL_OCR_IMAGE_SIZE", 1600))
+LOCAL_OCR_THREADS = int(os.environ.get("LABEL_OCR_THREADS", 2))
+LOCAL_OCR_WORKERS = int(os.environ.get("LABEL_OCR_WORKERS", 0)) or None
+LOCAL_YIELD_STATS_PATH = os.environ.get("LABEL_OCR_YIELD_STATS") or None
+# catalogue whose countries, regions, wineries and grapes the OCR engine recognises (empty disables)
+LOCAL_CATALOGUE_PATH = os.environ.get(
+    "LABEL_OCR_CATALOGUE",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data", "wine_metadata.csv")),
+)
+
+# One warm OCR engine per worker process, and the threads that run it
+_ocr = None
+_ocr_lock = threading.Lock()
+_executor = None
+
+
+def decode_size(engine: str = LABEL_ENGINE) -> int:
+    """Size uploads should be decoded to: OCR needs far more pixels than the vision API."""
+    return API_IMAGE_SIZE if engine == "remote" else LOCAL_IMAGE_SIZE
+
+
+def get_local_ocr():
+    """
+    Return the process-wide WineLabelOCR, creating it on first use.
+    """
+    global _ocr
+    if _ocr is None:
+        with _ocr_lock:
+            if _ocr is None:
+                from cv_functions.wine_label_ocr import WineLabelOCR
+                _ocr = WineLabelOCR(
+                    max_workers=LOCAL_OCR_WORKERS,
+                    mode="adaptive",
+                    target_confidence=LOCAL_MIN_CONFIDENCE,
+                    yield_stats_path=LOCAL_YIELD_STATS_PATH,
+                    catalogue=LOCAL_CATALOGUE_PATH if LOCAL_CATALOGUE_PATH and os.path.exists(LOCAL_CATALOGUE_PATH) else None,
+                )
+    return _ocr
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LOCAL_OCR_THREADS, thread_name_prefix="label-ocr")
+    return _executor
+
+
+def warm_local_engine():
+    """
+    Build the OCR engine (and its optional EasyOCR reader / spell checker) up
+    front and check the tesseract binary, so the first upload does not pay for it.
+    """
+    import pytesseract
+
+    get_local_ocr()
+    return str(pytesseract.get_tesseract_version())
+
+
+def close_local_engine():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def ocr_to_wine_info(text_result: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a WineLabelOCR reading onto the wine_info schema of the vision API.
+    Body and acidity are never printed on labels, so they stay None.
+    """
+    abv = fields.get("abv")
+    wine_info = {
+        "wine_name": fields.get("wine_name"),
+        "winery": fields.get("winery"),
+        "wine_type": fields.get("wine_type"),
+        "grape_varieties": fields.get("grape_variety"),
+        "body": None,
+        "acidity": None,
+        "country": fields.get("country"),
+        "region": fields.get("region"),
+        "ABV": str(abv) if abv is not None else None,
+    }
+    wine_info["extraction_successful"] = bool(text_result.get("success")) and any(wine_info.values())
+    wine_info["engine"] = "local"
+    wine_info["ocr_confidence"] = text_result.get("confidence", 0)
+    if not text_result.get("success"):
+        wine_info["error"] = text_result.get("error", "No text extracted")
+    return wine_info
+
+
+def extract_wine_info_local(image: Image.Image) -> Dict[str, Any]:
+    """
+    Read a label with the local OCR engine (blocking).
+
+    Args:
+        image (PIL.Image.Image): Decoded label, ideally around LOCAL_IMAGE_SIZE
+
+    Returns:
+        Dict containing extracted wine information, in the vision API's schema
+    """
+    ocr = get_local_ocr()
+    try:
+        text_result = ocr.extract_text_robust(image)
+        return ocr_to_wine_info(text_result, ocr.extract_wine_info_from_text(text_result))
+    except Exception as e:
+        return {**failed_wine_info(e), "engine": "local"}
+
+
+def _read_local(image: Image.Image, cache=None):
+    """
+    Blocking half of a local reading: the cache lookup (on the image resized
+    as the vision API would see it) and, on a miss, the OCR.
+
+    Returns:
+        tuple: (cache_image, wine_info, whether it came from the cache)
+    """
+    cache_image = resize_image_for_api(image)
+    if cache is not None:
+        wine_info = cache.get(cache_image)
+        if wine_info is not None:
+            return cache_image, wine_info, True
+    return cache_image, extract_wine_info_local(image), False
+
+
+def is_confident(wine_info: Dict[str, Any], min_confidence: float = LOCAL_MIN_CONFIDENCE) -> bool:
+    return wine_info["extraction_successful"] and wine_info.get("ocr_confidence", 0) >= min_confidence
+
+
+async def extract_wine_info(image: Image.Image, engine: str = LABEL_ENGINE, cache=None,
+                            api_key: Optional[str] = None, pool=None) -> Dict[str, Any]:
+    """
+    Extract wine information from a label with the configured engine.
+
+    Args:
+        image (PIL.Image.Image): Decoded label (see decode_size)
+        engine (str): "remote", "local" or "tiered"
+        cache (LabelCache, optional): Cache of earlier extractions, shared by all engines
+        pool (WorkPool, optional): Where the vision API path's blocking work runs;
+            the local path runs on the OCR threads
+
+    Returns:
+        Dict containing extracted wine information; "engine" tells which engine produced it
+    """
+    if engine == "remote":
+        wine_info = await extract_wine_info_from_image_async(image, api_key=api_key, cache=cache, pool=pool)
+        wine_info.setdefault("engine", "remote")
+        return wine_info
+
+    loop = asyncio.get_running_loop()
+    cache_image, wine_info, cached = await loop.run_in_executor(_get_executor(), _read_local, image, cache)
+    if cached:
+        return wine_info
+
+    if engine == "tiered" and not is_confident(wine_info):
+        local_confidence = wine_info.get("ocr_confidence", 0)
+        # already resized and looked up: the fallback only stores its answer
+        wine_info = await extract_wine_info_from_image_async(cache_image, api_key=api_key, cache=cache,
+                                                             pool=pool, lookup=False)
+        wine_info.setdefault("engine", "remote")
+        wine_info["local_confidence"] = local_confidence
+        return wine_info
+
+    # only cache readings good enough to have skipped the vision API
+    if cache is not None and is_confident(wine_info):
+        await run_blocking(pool, cache.put, cache_image, wine_info)
+    return wine_info
@@ -0,0 +1,232 @@
+import ast
+from collections import deque, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+class PhraseMatcher:
+    """
+    Exact multi-phrase matcher (Aho-Corasick automaton over lowercased text).
+
+    Phrases keep the order they were added in: first() returns the payload of
+    the earliest-added phrase found anywhere in the text, which is what the
+    nested "for group: for variation: if variation in text" loops it replaces
+    did, but in one pass over the text whatever the size of the dictionary.
+    Matching is plain substring matching unless a phrase (or the query) asks
+    for whole words.
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, Any]] = (), whole_word: bool = False):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # phrase ids ending at each state
+        self.phrases: List[Tuple[str, Any, bool]] = []
+        self._built = False
+        for phrase, payload in phrases:
+            self.add(phrase, payload, whole_word)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def add(self, phrase: str, payload: Any, whole_word: bool = False):
+        """Add a phrase; it ranks below every phrase added before it."""
+        phrase = phrase.lower()
+        if not phrase:
+            return
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(len(self.phrases))
+        self.phrases.append((phrase, payload, whole_word))
+        self._built = False
+
+    def _build(self):
+        # breadth-first failure links; outputs are merged along them
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+        # transitions with the failure links folded in (a DFA), filled lazily as
+        # text is scanned so that large catalogue tries stay small in memory
+        self._delta = [dict(transitions) for transitions in self._goto]
+        self._built = True
+
+    def _step(self, state, char):
+        fail = state
+        while fail and char not in self._goto[fail]:
+            fail = self._fail[fail]
+        next_state = self._goto[fail].get(char, 0)
+        self._delta[state][char] = next_state
+        return next_state
+
+    def iter_matches(self, text: str, whole_word: bool = False):
+        """Yield (start, end, phrase id) for every occurrence in text."""
+        if not self._built:
+            self._build()
+        text = text.lower()
+        delta, out = self._delta, self._out
+        state = 0
+        for position, char in enumerate(text):
+            next_state = delta[state].get(char)
+            state = next_state if next_state is not None else self._step(state, char)
+            if not out[state]:
+                continue
+            for phrase_id in out[state]:
+                phrase, _, phrase_whole_word = self.phrases[phrase_id]
+                start, end = position - len(phrase) + 1, position + 1
+                if (whole_word or phrase_whole_word) and not (
+                    (start == 0 or not _is_word_char(text[start - 1]))
+                    and (end == len(text) or not _is_word_char(text[end]))
+                ):
+                    continue
+                yield start, end, phrase_id
+
+    def matched_ids(self, text: str, whole_word: bool = False) -> List[int]:
+        """Ids of the phrases found in text, in priority (insertion) order."""
+        return sorted({phrase_id for _, _, phrase_id in self.iter_matches(text, whole_word)})
+
+    def first(self, text: str, whole_word: bool = False) -> Optional[Any]:
+        """Payload of the highest-priority phrase found in text, or None."""
+        ids = self.matched_ids(text, whole_word)
+        return self.phrases[ids[0]][1] if ids else None
+
+    def first_phrase(self, text: str, whole_word: bool = False) -> Optional[Tuple[str, Any]]:
+        """(phrase, payload) of the highest-priority phrase found in text, or None."""
+        ids = self.matched_ids(text, whole_word)
+        return self.phrases[ids[0]][:2] if ids else None
+
+    def all(self, text: str, whole_word: bool = False) -> List[Any]:
+        """Distinct payloads of every phrase found in text, in priority order."""
+        payloads = []
+        for phrase_id in self.matched_ids(text, whole_word):
+            payload = self.phrases[phrase_id][1]
+            if payload not in payloads:
+                payloads.append(payload)
+        return payloads
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {' '.join(text.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Fuzzy lookup of OCR'd strings against a vocabulary.
+
+    Every term is split into character trigrams and indexed in an inverted
+    index; a query only scores the terms sharing at least one selective
+    trigram with it (trigrams common to a large share of the vocabulary, such
+    as those of "Bodega", do not generate candidates), by Dice similarity of
+    the trigram sets. Robust to the dropped, doubled or misread letters OCR
+    produces ("rieshng", "Chateau Margeaux").
+    """
+
+    COMMON_FRACTION = 0.05
+
+    def __init__(self, terms: Iterable[Tuple[str, Any]] = ()):
+        self.terms: List[Tuple[str, Any]] = []
+        self._grams: List[frozenset] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._seen = set()
+        for term, payload in terms:
+            self.add(term, payload)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term: str, payload: Any):
+        key = term.lower().strip()
+        if not key or key in self._seen:
+            return
+        self._seen.add(key)
+        grams = trigrams(key)
+        term_id = len(self.terms)
+        self.terms.append((term, payload))
+        self._grams.append(frozenset(grams))
+        for gram in grams:
+            self._postings[gram].append(term_id)
+
+    def best(self, query: str, min_similarity: float = 0.8) -> Optional[Tuple[Any, float]]:
+        """(payload, similarity) of the most similar term, or None below min_similarity."""
+        grams = trigrams(query)
+        if not grams:
+            return None
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        common = max(64, int(len(self.terms) * self.COMMON_FRACTION))
+        selective = [posting for posting in postings if len(posting) <= common] or postings
+        candidates = set()
+        for posting in selective:
+            candidates.update(posting)
+
+        best_id, best_score = None, min_similarity
+        # ascending ids, so ties go to the term added first
+        for term_id in sorted(candidates):
+            term_grams = self._grams[term_id]
+            score = 2 * len(grams & term_grams) / (len(grams) + len(term_grams))
+            if score > best_score or (best_id is None and score == best_score):
+                best_id, best_score = term_id, score
+        return (self.terms[best_id][1], best_score) if best_id is not None else None
+
+
+def _parse_list(value) -> list:
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = ast.literal_eval(value)
+            return parsed if isinstance(parsed, list) else [parsed]
+        except (ValueError, SyntaxError):
+            return [value]
+    return []
+
+
+def catalogue_vocabulary(catalogue) -> Dict[str, List[str]]:
+    """
+    Distinct countries, regions, wineries and grapes of the wine catalogue,
+    most frequent first.
+
+    Args:
+        catalogue (pd.DataFrame or str): Wine metadata, or the path of its CSV
+
+    Returns:
+        dict: {"countries", "regions", "wineries", "grapes"} -> list of names
+    """
+    columns = ["Country", "RegionName", "WineryName", "Grapes"]
+    if isinstance(catalogue, str):
+        catalogue = pd.read_csv(catalogue, usecols=lambda column: column in columns + ["Grapes_list"])
+
+    def ranked(series):
+        return [name for name in series.dropna().astype(str).str.strip().value_counts().index if name]
+
+    grapes_column = "Grapes_list" if "Grapes_list" in catalogue.columns else "Grapes"
+    grapes = catalogue[grapes_column].map(_parse_list).explode() if grapes_column in catalogue.columns else pd.Series(dtype=str)
+
+    return {
+        "countries": ranked(catalogue["Country"]) if "Country" in catalogue.columns else [],
+        "regions": ranked(catalogue["RegionName"]) if "RegionName" in catalogue.columns else [],
+        "wineries": ranked(catalogue["WineryName"]) if "WineryName" in catalogue.columns else [],
+        "grapes": ranked(grapes),
+    }
@@ -1,19 +1,23 @@
-from sklearn.neighbors import NearestNeighbors
+import numpy as np
 import pickle
+import json
 import os
+import tempfile
 
 LOCAL_DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models"))
 pickle_file = os.path.join(LOCAL_DATA_PATH, "trained_model.pkl")
 
-def train_model(X_scaled_df, n_neighbors = 6):
+def train_model(X_scaled_df, n_neighbors = 6, filepath=None):
     """
-    BUILDING k-NN RECOMMENDATION MODEL
+    BUILDING k-NN RECOMMENDATION MODEL, saved to filepath (default models/trained_model.pkl)
     """
+    from sklearn.neighbors import NearestNeighbors
+
     print("=== BUILDING k-NN RECOMMENDATION MODEL ===")
     knn_model = NearestNeighbors(n_neighbors=n_neighbors, metric='cosine', algorithm='brute')
     knn_model.fit(X_scaled_df)
 
-    with open(pickle_file, 'wb') as f:
+    with open(filepath or pickle_file, 'wb') as f:
         pickle.dump(knn_model, f)
 
     return knn_model
@@ -23,3 +27,104 @@ def load_model(filepath=pickle_file):
     with open(filepath, 'rb') as f:
         model = pickle.load(f)
     return model
+
+
+def shared_model_paths(filepath=pickle_file):
+    """Path of the parameters file (.json) exported next to a model pickle, and the prefix of its matrix files."""
+    stem = os.path.splitext(filepath)[0]
+    return f"{stem}.params.json", f"{os.path.basename(stem)}.matrix."
+
+
+def _source_signature(filepath):
+    stat = os.stat(filepath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _read_exported(params_path):
+    try:
+        with open(params_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def export_shared_model(model, filepath=pickle_file):
+    """
+    Write the fitted matrix of a kNN model as a plain .npy file and its
+    parameters as JSON, next to the pickle, so processes can memory-map the
+    matrix instead of each unpickling its own copy.
+
+    The matrix goes to a new, uniquely named file; the parameters file names
+    it and is replaced last, so a reader always gets a matching pair, and
+    concurrent exports (several workers finding a stale export) never write
+    the same file. Matrices older than the one replaced are removed.
+    """
+    params_path, matrix_prefix = shared_model_paths(filepath)
+    directory = os.path.dirname(os.path.abspath(filepath))
+    feature_names = getattr(model, "feature_names_in_", None)
+
+    fd, matrix_path = tempfile.mkstemp(prefix=matrix_prefix, suffix=".npy", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, np.ascontiguousarray(model._fit_X))
+    os.chmod(matrix_path, 0o644)
+
+    previous = (_read_exported(params_path) or {}).get("matrix")
+    fd, params_tmp = tempfile.mkstemp(prefix=os.path.basename(params_path), suffix=".tmp", dir=directory)
+    with os.fdopen(fd, "w") as f:
+        json.dump({
+            "params": model.get_params(),
+            "feature_names": feature_names.tolist() if feature_names is not None else None,
+            "matrix": os.path.basename(matrix_path),
+            # the pickle this was exported from: a different one makes the export stale
+            "source": _source_signature(filepath),
+        }, f)
+    os.chmod(params_tmp, 0o644)
+    os.replace(params_tmp, params_path)
+
+    # the previous matrix may be about to be mapped, and newer ones are other exports in progress
+    if previous and os.path.exists(os.path.join(directory, previous)):
+        cutoff = os.path.getmtime(os.path.join(directory, previous))
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if (name.startswith(matrix_prefix) and name.endswith(".npy") and name != previous
+                    and path != matrix_path and os.path.getmtime(path) < cutoff):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def load_shared_model(filepath=pickle_file):
+    """
+    Load the kNN model with its fitted matrix memory-mapped read-only.
+
+    Every process mapping the file shares the same page-cache pages, so the
+    matrix costs its size once however many API workers run. The build
+    exports it with the pickle; when the export is missing or was made from
+    another pickle it is exported here, and when that fails (e.g. a
+    read-only models directory) the pickle is loaded instead.
+    """
+    params_path, _ = shared_model_paths(filepath)
+    exported = _read_exported(params_path)
+    if exported is None or exported.get("source") != _source_signature(filepath) or "matrix" not in exported:
+        model = load_model(filepath)
+        try:
+            export_shared_model(model, filepath)
+        except OSError as e:
+            print(f"❌ Could not export the model for memory-mapping, loading the pickle: {e}")
+            return model
+        exported = _read_exported(params_path)
+
+    # sklearn is imported here rather than at module level: it is the slowest import of the API
+    from sklearn.neighbors import NearestNeighbors
+
+    try:
+        matrix = np.load(os.path.join(os.path.dirname(os.path.abspath(filepath)), exported["matrix"]), mmap_mode="r")
+    except FileNotFoundError:
+        # replaced and removed by two exports since the parameters were read
+        return load_model(filepath)
+    # a brute-force fit only validates and keeps a reference to the matrix: no copy
+    model = NearestNeighbors(**exported["params"]).fit(matrix)
+    if exported["feature_names"] is not None:
+        model.feature_names_in_ = np.asarray(exported["feature_names"], dtype=object)
+    return model
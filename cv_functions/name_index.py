@@ -0,0 +1,153 @@
+import re
+import unicodedata
+from typing import Optional, List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_name(name) -> str:
+    """
+    Lowercase, strip accents and punctuation, collapse whitespace:
+    "Château Pétrus, Pomerol" -> "chateau petrus pomerol"
+    """
+    if not isinstance(name, str):
+        return ""
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name)
+        name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.lower()).split())
+
+
+# normalized names only contain these characters, so a trigram is a base-37 integer
+ALPHABET = " 0123456789abcdefghijklmnopqrstuvwxyz"
+N_GRAMS = len(ALPHABET) ** 3  # 50653, fits in uint16
+_CODES = np.zeros(256, dtype=np.int32)
+_CODES[np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8)] = np.arange(len(ALPHABET))
+
+
+def _padded(name: str) -> str:
+    # padding so that short words and word starts still produce trigrams
+    return f"  {name} " if name else ""
+
+
+def name_trigrams(name: str) -> np.ndarray:
+    """Distinct trigram codes of a normalized name."""
+    codes = _CODES[np.frombuffer(_padded(name).encode("ascii"), dtype=np.uint8)]
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.int32)
+    return np.unique(codes[:-2] * len(ALPHABET) ** 2 + codes[1:-1] * len(ALPHABET) + codes[2:])
+
+
+class _TrigramPostings:
+    """
+    Trigram -> rows inverted lists in CSR layout (indptr / rows arrays), so a
+    query is a handful of array slices and one np.bincount over all rows.
+    Built without a Python loop over trigrams: all names are encoded as one
+    array and every trigram code is computed at once.
+    """
+
+    def __init__(self, names: List[str]):
+        padded = [_padded(name) for name in names]
+        lengths = np.fromiter((len(name) for name in padded), dtype=np.int64, count=len(padded))
+        codes = _CODES[np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8)].astype(np.int64)
+
+        # trigram starts: every position except the last two of each name
+        n_grams = np.maximum(lengths - 2, 0)
+        ends = np.cumsum(lengths)
+        starts = np.repeat(ends - lengths, n_grams) + (
+            np.arange(n_grams.sum()) - np.repeat(np.cumsum(n_grams) - n_grams, n_grams)
+        )
+        grams = (codes[starts] * len(ALPHABET) ** 2 + codes[starts + 1] * len(ALPHABET) + codes[starts + 2]).astype(np.uint16)
+        rows = np.repeat(np.arange(len(names), dtype=np.int32), n_grams)
+
+        # group by trigram (a radix sort on 16-bit codes; stable, so rows stay
+        # ascending within a trigram), then drop repeated trigrams of a row
+        order = np.argsort(grams, kind="stable")
+        grams, rows = grams[order], rows[order]
+        keep = np.ones(len(grams), dtype=bool)
+        keep[1:] = (grams[1:] != grams[:-1]) | (rows[1:] != rows[:-1])
+        grams, rows = grams[keep], rows[keep]
+
+        self.n_rows = len(names)
+        self.rows = rows
+        self.sizes = np.bincount(rows, minlength=self.n_rows).astype(np.int32)
+        self.indptr = np.zeros(N_GRAMS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=N_GRAMS), out=self.indptr[1:])
+
+    def dice(self, query_grams: np.ndarray) -> np.ndarray:
+        """Dice similarity of the query's trigram set with every row's."""
+        if not len(query_grams):
+            return np.zeros(self.n_rows, dtype=np.float32)
+        hits = np.concatenate([self.rows[self.indptr[g]:self.indptr[g + 1]] for g in query_grams])
+        shared = np.bincount(hits, minlength=self.n_rows)
+        return (2.0 * shared / (len(query_grams) + np.maximum(self.sizes, 1))).astype(np.float32)
+
+
+class WineNameIndex:
+    """
+    Resolve a wine name and/or winery read from a label to catalogue rows.
+
+    Rows are the rows of the metadata DataFrame (and therefore of the kNN
+    model). Each row is indexed twice: by its wine name alone and by
+    "winery + wine name", since labels and the vision model return either.
+    """
+
+    def __init__(self, metadata_df: pd.DataFrame):
+        self.wine_ids = metadata_df["WineID"].to_numpy()
+        self.wine_names = metadata_df["WineName"].fillna("").astype(str).to_numpy()
+        self.winery_names = metadata_df["WineryName"].fillna("").astype(str).to_numpy()
+
+        names = [normalize_name(name) for name in self.wine_names]
+        wineries = [normalize_name(name) for name in self.winery_names]
+        full_names = [f"{winery} {name}".strip() for winery, name in zip(wineries, names)]
+
+        self._names = _TrigramPostings(names)
+        self._full_names = _TrigramPostings(full_names)
+
+    def __len__(self):
+        return len(self.wine_ids)
+
+    def scores(self, wine_name: Optional[str] = None, winery: Optional[str] = None) -> np.ndarray:
+        """
+        Similarity in [0, 1] of every row to the label reading: the best of
+        wine name vs WineName and "winery wine name" vs "WineryName WineName".
+        """
+        name_grams = name_trigrams(normalize_name(wine_name))
+        full_grams = name_trigrams(normalize_name(f"{winery or ''} {wine_name or ''}"))
+
+        scores = self._full_names.dice(full_grams)
+        if len(name_grams):
+            np.maximum(scores, self._names.dice(name_grams), out=scores)
+        return scores
+
+    def search(self, wine_name: Optional[str] = None, winery: Optional[str] = None,
+               k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Top-k catalogue candidates for a label reading, best first.
+
+        Returns:
+            list of dicts with row, WineID, WineName, WineryName and score
+        """
+        if not (wine_name or winery):
+            return []
+        scores = self.scores(wine_name, winery)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {
+                "row": int(row),
+                "WineID": int(self.wine_ids[row]),
+                "WineName": self.wine_names[row],
+                "WineryName": self.winery_names[row],
+                "score": round(float(scores[row]), 4),
+            }
+            for row in top if scores[row] >= min_score and scores[row] > 0
+        ]
+
+    def resolve(self, wine_name: Optional[str] = None, winery: Optional[str] = None,
+                min_score: float = 0.6) -> Optional[Dict[str, Any]]:
+        """Best candidate if it scores at least min_score, else None."""
+        candidates = self.search(wine_name, winery, k=1, min_score=min_score)
+        return candidates[0] if candidates else None
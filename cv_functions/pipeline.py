@@ -0,0 +1,349 @@
+"""
+A small DAG runner for the offline build (interface/main_local.py), with a
+content-addressed cache of every stage's output.
+
+A stage's key is a hash of its name, its parameters, the source code of the
+functions it runs, the contents of the files it reads and the contents of
+the outputs of the stages it depends on. Its output is cached under
+cache_dir/<stage>/<key>/: the pickled return value, any files the stage
+wrote to its out_dir, and a manifest holding the hash of that output. A run
+recomputes only the stages whose key has no cache entry; the others are
+loaded from the cache, and only when a stage that runs, or the caller,
+needs their output.
+
+Keys depend on upstream outputs rather than on upstream keys (early
+cutoff): a stage that re-runs and produces the same output as before, e.g.
+geocoding after an unrelated region was added to the geocoding cache, leaves
+the stages downstream of it cached. A stage's key is therefore only known
+once its upstream stages are up to date. Input files are hashed once per
+(size, modification time) and the hashes kept in cache_dir/file_hashes.json.
+Every run's per-stage timings are printed and appended to cache_dir/runs.jsonl.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+VALUE_FILE = "value.pkl"
+MANIFEST_FILE = "manifest.json"
+FILE_HASHES = "file_hashes.json"
+RUNS_LOG = "runs.jsonl"
+# cache entries kept per stage, the most recent first
+KEEP_ENTRIES = 3
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    Args:
+        name (str): Unique stage name
+        function (callable): Called as function(*upstream outputs, **files, **params),
+            plus out_dir= (a directory for the files it writes) when writes_files
+        deps (list): Names of the stages whose outputs it takes, in argument order
+        files (dict): Keyword arguments that are paths of input files; their
+            contents are part of the key, not the paths
+        params (dict): Other keyword arguments; part of the key, so keep them JSON-serializable
+        code (list): Functions, classes or modules whose source is part of the key
+            (default: function)
+        writes_files (bool): Whether the stage writes files to out_dir
+    """
+
+    def __init__(self, name: str, function: Callable, deps: Sequence[str] = (), files: Optional[Dict[str, str]] = None,
+                 params: Optional[Dict[str, Any]] = None, code: Sequence[Any] = (), writes_files: bool = False):
+        self.name = name
+        self.function = function
+        self.deps = list(deps)
+        self.files = files or {}
+        self.params = params or {}
+        self.code = list(code) or [function]
+        self.writes_files = writes_files
+
+
+def code_fingerprint(objects: Iterable[Any]) -> str:
+    """Hash of the source code of functions, classes or modules."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class FileHashes:
+    """Content hashes of input files, recomputed only when their size or modification time changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._hashes = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._hashes = json.load(f)
+        self._changed = False
+
+    def get(self, path: str) -> Optional[str]:
+        """sha256 of the file's contents, None if there is no such file."""
+        path = os.path.abspath(path)
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        known = self._hashes.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+        self._hashes[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self._changed = True
+        return digest.hexdigest()
+
+    def save(self):
+        if self._changed:
+            # a temporary file of its own: two builds sharing the cache do not write the same one
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path), suffix=".tmp",
+                                            dir=os.path.dirname(os.path.abspath(self.path)))
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self._hashes, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self._changed = False
+
+
+def stage_key(stage: Stage, file_hashes: FileHashes, upstream: Dict[str, str]) -> str:
+    """Key of a stage, from upstream: the output hash of each stage it depends on."""
+    return hashlib.sha256(json.dumps({
+        "stage": stage.name,
+        "params": stage.params,
+        "code": code_fingerprint(stage.code),
+        "files": {name: file_hashes.get(path) for name, path in stage.files.items()},
+        "deps": [upstream[dep] for dep in stage.deps],
+    }, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _HashingWriter:
+    # a file wrapper hashing what is written, so a value is pickled to disk and hashed in one pass
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, data):
+        self.digest.update(data)
+        return self.f.write(data)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    Stages and their cache (see module docstring).
+
+        pipeline = Pipeline(stages, cache_dir)
+        pipeline.run(["train"])
+        pipeline.output("encode")      # a stage's return value
+        pipeline.entry_dir("train")    # the files it wrote
+    """
+
+    def __init__(self, stages: List[Stage], cache_dir: str):
+        self.stages = {}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"stage {stage.name!r} depends on {missing}, which are not earlier stages")
+            if stage.name in self.stages:
+                raise ValueError(f"stage {stage.name!r} is defined twice")
+            self.stages[stage.name] = stage
+        self.order = [stage.name for stage in stages]
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.file_hashes = FileHashes(os.path.join(cache_dir, FILE_HASHES))
+        # stage -> key and output hash, for the stages whose upstream outputs are known
+        self.keys = {}
+        self.output_hashes = {}
+        self._outputs = {}
+        self._resolve()
+        self.file_hashes.save()
+
+    def _resolve(self):
+        # key every stage whose upstream outputs are known, following cached outputs downstream
+        for name in self.order:
+            stage = self.stages[name]
+            if name in self.keys or any(dep not in self.output_hashes for dep in stage.deps):
+                continue
+            self.keys[name] = stage_key(stage, self.file_hashes, {dep: self.output_hashes[dep] for dep in stage.deps})
+            manifest = self._manifest(name)
+            if manifest is not None:
+                self.output_hashes[name] = manifest["output"]
+
+    def entry_dir(self, name: str) -> str:
+        """Cache entry of a stage's current key."""
+        return os.path.join(self.cache_dir, name, self.keys[name][:16])
+
+    def _manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.entry_dir(name), MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        # entries written before outputs were hashed cannot key their downstream stages
+        return manifest if "output" in manifest else None
+
+    def is_cached(self, name: str) -> bool:
+        return name in self.output_hashes
+
+    def upstream(self, targets: Iterable[str]) -> List[str]:
+        """The targets and every stage they depend on, in pipeline order."""
+        needed, pending = set(), list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"unknown stage {name!r}, expected one of {self.order}")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        return [name for name in self.order if name in needed]
+
+    def downstream(self, name: str) -> List[str]:
+        """Every stage that depends on name, directly or not, in pipeline order."""
+        affected = {name}
+        for later in self.order[self.order.index(name) + 1:]:
+            if affected.intersection(self.stages[later].deps):
+                affected.add(later)
+        return [later for later in self.order if later in affected and later != name]
+
+    def stale(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Stages of the run for targets (default: all) that are not cached. Those
+        downstream of a stale stage are included: whether they run depends on
+        whether its new output differs.
+        """
+        return [name for name in self.upstream(targets or self.order) if not self.is_cached(name)]
+
+    def _load(self, name: str):
+        if name not in self._outputs:
+            value_path = os.path.join(self.entry_dir(name), VALUE_FILE)
+            if os.path.exists(value_path):
+                with open(value_path, "rb") as f:
+                    self._outputs[name] = pickle.load(f)
+            else:
+                self._outputs[name] = None
+        return self._outputs[name]
+
+    def _run_stage(self, stage: Stage):
+        entry = self.entry_dir(stage.name)
+        # built aside and renamed into place, so an interrupted stage leaves no entry
+        building = f"{entry}.building"
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+        kwargs = {**stage.files, **stage.params}
+        if stage.writes_files:
+            kwargs["out_dir"] = building
+
+        value = stage.function(*(self._load(dep) for dep in stage.deps), **kwargs)
+        # the output's hash: the pickled value and every file the stage wrote
+        output = hashlib.sha256()
+        if value is not None:
+            with open(os.path.join(building, VALUE_FILE), "wb") as f:
+                writer = _HashingWriter(f)
+                pickle.dump(value, writer, protocol=pickle.HIGHEST_PROTOCOL)
+            output.update(f"{VALUE_FILE}:{writer.digest.hexdigest()}\n".encode("utf-8"))
+        for root, dirs, files in os.walk(building):
+            dirs.sort()
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                if path != os.path.join(building, VALUE_FILE):
+                    output.update(f"{os.path.relpath(path, building)}:{_file_hash(path)}\n".encode("utf-8"))
+        with open(os.path.join(building, MANIFEST_FILE), "w") as f:
+            json.dump({"stage": stage.name, "key": self.keys[stage.name], "output": output.hexdigest(),
+                       "params": stage.params, "deps": {dep: self.output_hashes[dep] for dep in stage.deps},
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=2, default=str)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(building, entry)
+        if self.output_hashes.get(stage.name) not in (None, output.hexdigest()):
+            # a forced stage whose output changed: the downstream keys resolved from the old output are void
+            for name in self.downstream(stage.name):
+                self.keys.pop(name, None)
+                self.output_hashes.pop(name, None)
+                self._outputs.pop(name, None)
+        self._outputs[stage.name] = value
+        self.output_hashes[stage.name] = output.hexdigest()
+        self._prune(stage.name)
+
+    def _prune(self, name: str, keep: int = KEEP_ENTRIES):
+        stage_dir = os.path.join(self.cache_dir, name)
+        entries = sorted((os.path.join(stage_dir, entry) for entry in os.listdir(stage_dir)
+                          if not entry.endswith(".building")), key=os.path.getmtime, reverse=True)
+        for entry in entries[keep:]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def output(self, name: str):
+        """Output of a stage, from this run or its cache entry (run() it first)."""
+        if name not in self._outputs and not self.is_cached(name):
+            raise ValueError(f"stage {name!r} is not up to date: run it first")
+        return self._load(name)
+
+    def run(self, targets: Optional[Iterable[str]] = None, force: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Bring targets (default: every stage) and the stages they depend on up
+        to date. Outputs are then read with output().
+
+        Args:
+            targets (list): Stages whose outputs are wanted
+            force (list): Stages to re-run even if cached; the stages downstream
+                of them re-run when the new output differs from the cached one
+
+        Returns:
+            list: Per stage: status (ran; loaded when a stage that ran needed its cached
+            output; or cached), seconds and key
+        """
+        targets = list(targets or self.order)
+        force = set(force)
+        started = time.perf_counter()
+        ran, timings = [], {}
+        for name in self.upstream(targets):
+            stage_started = time.perf_counter()
+            # every upstream stage is up to date by now, so the key is known
+            self._resolve()
+            if name in force or not self.is_cached(name):
+                for dep in self.stages[name].deps:
+                    # a cached upstream output is loaded for the first stage that needs it
+                    if dep not in self._outputs:
+                        load_started = time.perf_counter()
+                        self._load(dep)
+                        timings[dep]["status"] = "loaded"
+                        timings[dep]["seconds"] = round(time.perf_counter() - load_started, 3)
+                stage_started = time.perf_counter()
+                self._run_stage(self.stages[name])
+                ran.append(name)
+                status = "ran"
+            else:
+                # in use: not the oldest entry when the stage's entries are pruned
+                os.utime(self.entry_dir(name))
+                status = "cached"
+            timings[name] = {"stage": name, "status": status, "seconds": round(time.perf_counter() - stage_started, 3),
+                             "key": self.keys[name][:16]}
+
+        for timing in timings.values():
+            print(f"✅ {timing['stage']:<16} {timing['status']:<7} {timing['seconds']:>9.2f}s  {timing['key']}")
+        self.file_hashes.save()
+        total = round(time.perf_counter() - started, 3)
+        print(f"✅ Pipeline done in {total:.2f}s ({len(ran)} of {len(timings)} stages ran).")
+        timings = list(timings.values())
+        with open(os.path.join(self.cache_dir, RUNS_LOG), "a") as f:
+            f.write(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": total,
+                                "stages": timings}) + "\n")
+        return timings
@@ -1,7 +1,7 @@
 import pandas as pd
 from cv_functions.model import load_model
-from cv_functions.encoder import Encoder_features_transform
 from cv_functions.geocode_regions import retrieve_coordinate
+from cv_functions.tracing import span
 import numpy as np
 import os
 import ast
@@ -21,42 +21,83 @@ def get_wine_recommendations_by_characteristics(
     region_name=None,
     n_recommendations=5,
     metadata_df: pd.DataFrame = None,
-    model=None
+    model=None,
+    preprocessor=None
 ):
     latitude, longitude = 0, 0
     if region_name:
-        lat, lon = retrieve_coordinate(region_name)
+        with span("recommend.geocode"):
+            lat, lon = retrieve_coordinate(region_name)
         if not np.isnan(lat):
             latitude, longitude = lat, lon
 
-    X_pred = pd.DataFrame([{
-        "Type": wine_type,
-        "ABV": abv,
-        "Body": body,
-        "Acidity": acidity,
-        "Country": country,
-        "RegionName": region_name,
-        "latitude": latitude,
-        "longitude": longitude,
-        "Grapes_list": grape_varieties,
-        "avg_rating": 3.79,
-        "rating_count": 0,
-        "rating_std": 0
-    }])
-
-    X_pred_cleaned = X_pred.replace({None: np.nan})
-    wine_processed = Encoder_features_transform(X_pred_cleaned)
-    distances, indices = model.kneighbors(wine_processed, n_neighbors=max(n_recommendations * 3, 20))
-
-    recommended_ids = metadata_df.iloc[indices[0]]["WineID"].tolist()
-    distance_map = {wid: dist for wid, dist in zip(recommended_ids, distances[0])}
-
-    recommended = metadata_df[metadata_df["WineID"].isin(recommended_ids)].copy()
-    recommended["Similarity"] = recommended["WineID"].map(lambda x: 1 - distance_map.get(x, 1))
-
-    if country:
-        filtered = recommended[recommended["Country"] == country]
-        if not filtered.empty:
-            recommended = filtered
-
-    return recommended.sort_values("Similarity", ascending=False).head(n_recommendations)
+    with span("recommend.encode"):
+        X_pred = pd.DataFrame([{
+            "Type": wine_type,
+            "ABV": abv,
+            "Body": body,
+            "Acidity": acidity,
+            "Country": country,
+            "RegionName": region_name,
+            "latitude": latitude,
+            "longitude": longitude,
+            "Grapes_list": grape_varieties,
+            "avg_rating": 3.79,
+            "rating_count": 0,
+            "rating_std": 0
+        }])
+
+        X_pred_cleaned = X_pred.replace({None: np.nan})
+        # sklearn-heavy: imported on first use (the API loads it while warming up)
+        from cv_functions.encoder import Encoder_features_transform
+        wine_processed = Encoder_features_transform(X_pred_cleaned, preprocessor=preprocessor)
+
+    with span("recommend.knn"):
+        distances, indices = model.kneighbors(wine_processed, n_neighbors=max(n_recommendations * 3, 20))
+
+    with span("recommend.join"):
+        recommended_ids = metadata_df.iloc[indices[0]]["WineID"].tolist()
+        distance_map = {wid: dist for wid, dist in zip(recommended_ids, distances[0])}
+
+        recommended = metadata_df[metadata_df["WineID"].isin(recommended_ids)].copy()
+        recommended["Similarity"] = recommended["WineID"].map(lambda x: 1 - distance_map.get(x, 1))
+
+        if country:
+            filtered = recommended[recommended["Country"] == country]
+            if not filtered.empty:
+                recommended = filtered
+
+        return recommended.sort_values("Similarity", ascending=False).head(n_recommendations)
+
+
+def get_wine_recommendations_by_wine(
+    row,
+    n_recommendations=5,
+    metadata_df: pd.DataFrame = None,
+    model=None
+):
+    """
+    Recommend wines close to a catalogue wine, from the vector the kNN model
+    was fitted on for it (row i of the model is row i of metadata_df).
+
+    Args:
+        row (int): Row of the wine in metadata_df, e.g. from WineNameIndex.resolve
+        n_recommendations (int): Number of wines to return, the wine itself excluded
+
+    Returns:
+        pd.DataFrame: Recommended wines with a Similarity column, most similar first
+    """
+    wine_vector = model._fit_X[row:row + 1]
+    n_neighbors = min(n_recommendations + 1, len(metadata_df))
+    with span("recommend_by_wine.knn"):
+        distances, indices = model.kneighbors(wine_vector, n_neighbors=n_neighbors)
+    distances, indices = distances[0], indices[0]
+
+    others = indices != row
+    distances, indices = distances[others][:n_recommendations], indices[others][:n_recommendations]
+
+    with span("recommend_by_wine.join"):
+        recommended = metadata_df.iloc[indices].copy()
+        recommended["Similarity"] = 1 - distances
+
+        return recommended.sort_values("Similarity", ascending=False)
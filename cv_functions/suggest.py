@@ -0,0 +1,185 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cv_functions.facets import count_values
+from cv_functions.name_index import normalize_name
+
+SUGGEST_FIELDS = ("grapes", "foods", "countries", "regions", "wineries", "wines")
+MAX_SUGGESTIONS = 50
+
+
+class PrefixIndex:
+    """
+    Weighted prefix completion over a fixed vocabulary.
+
+    Each term is indexed under every word start of its normalized form, so
+    "marg" completes "Château Margaux" as well as "Margaret River". Keys live
+    in one sorted list: a prefix is a bisect_left range, and the heaviest
+    distinct terms of that range are the completions. Prefixes whose range
+    holds more than HEAVY_RANGE keys (short prefixes, common words such as
+    "reserva") have their answers computed once at build time, so no query
+    scans more than HEAVY_RANGE keys.
+    """
+
+    HEAVY_RANGE = 512
+
+    def __init__(self, terms: Iterable[Tuple[str, float, Optional[Dict[str, Any]]]]):
+        """
+        Args:
+            terms: (term, weight, extra fields returned with the term or None)
+        """
+        self.terms: List[str] = []
+        self.weights: List[float] = []
+        self.extras: List[Optional[Dict[str, Any]]] = []
+
+        entries = []
+        for term, weight, extra in terms:
+            words = normalize_name(term).split()
+            if not words:
+                continue
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.weights.append(float(weight))
+            self.extras.append(extra)
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), term_id))
+
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = np.array([term_id for _, term_id in entries], dtype=np.int32)
+        self._weights = np.asarray(self.weights, dtype=np.float64)
+        self._name_ranks = np.empty(len(self.terms), dtype=np.int64)
+        self._name_ranks[np.argsort(np.array(self.terms, dtype=str), kind="stable")] = np.arange(len(self.terms))
+
+        self._precomputed = {}
+        self._precompute_heavy("", 0, len(self._keys))
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        # every key starting with prefix sorts between prefix and prefix + the largest character
+        return bisect_left(self._keys, prefix), bisect_left(self._keys, prefix + "\U0010ffff")
+
+    def _precompute_heavy(self, prefix: str, lo: int, hi: int):
+        # depth-first over the prefixes with more than HEAVY_RANGE keys,
+        # jumping from one child range to the next with bisect
+        self._precomputed[prefix] = self._top_ids(lo, hi, MAX_SUGGESTIONS)
+        position = len(prefix)
+        while lo < hi:
+            if len(self._keys[lo]) == position:  # the key equal to prefix sorts first
+                lo += 1
+                continue
+            child = prefix + self._keys[lo][position]
+            child_hi = bisect_left(self._keys, child + "\U0010ffff", lo, hi)
+            if child_hi - lo > self.HEAVY_RANGE:
+                self._precompute_heavy(child, lo, child_hi)
+            lo = child_hi
+
+    def _top_ids(self, lo: int, hi: int, limit: int) -> List[int]:
+        ids = self._ids[lo:hi]
+        if 0 < limit < len(ids):
+            # keys at least as heavy as the limit-th heaviest key: every term tied
+            # at that weight stays a candidate, so ties are broken by name below
+            weights = self._weights[ids]
+            cutoff = np.partition(weights, len(ids) - limit)[len(ids) - limit]
+            candidates = np.unique(ids[weights >= cutoff])
+            # a term may match on several of its words: only dedupe the whole
+            # range if the candidates run short
+            ids = candidates if len(candidates) >= limit else np.unique(ids)
+        else:
+            ids = np.unique(ids)
+        # heaviest first, ties alphabetically
+        order = np.lexsort((self._name_ranks[ids], -self._weights[ids]))
+        return ids[order[:limit]].tolist()
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Heaviest terms with a word starting with prefix.
+
+        Returns:
+            list of dicts {"value", "count", **extra}, heaviest first
+        """
+        prefix = normalize_name(prefix)
+        limit = max(0, min(limit, MAX_SUGGESTIONS))
+        if prefix in self._precomputed:  # includes "", the heaviest terms overall
+            term_ids = self._precomputed[prefix]
+        else:
+            term_ids = self._top_ids(*self._range(prefix), limit)
+
+        return [
+            {"value": self.terms[term_id], "count": self._count(term_id), **(self.extras[term_id] or {})}
+            for term_id in term_ids[:limit]
+        ]
+
+    def _count(self, term_id):
+        weight = self.weights[term_id]
+        return int(weight) if weight.is_integer() else weight
+
+
+def build_suggesters(metadata_df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Build the /suggest prefix indexes from the wine metadata. Weights are the
+    number of catalogue wines with the value (wine names: their rating count).
+
+    Returns:
+        dict: field -> PrefixIndex for SUGGEST_FIELDS, plus "regions_by_country":
+        country -> PrefixIndex of its regions
+    """
+    suggesters = {}
+
+    grapes_column = "Grapes_list" if "Grapes_list" in metadata_df.columns else "Grapes"
+    grapes = count_values(metadata_df[grapes_column], as_list=True)
+    suggesters["grapes"] = PrefixIndex((grape, count, None) for grape, count in grapes.items())
+
+    foods = count_values(metadata_df["Harmonize"], as_list=True) if "Harmonize" in metadata_df.columns else Counter()
+    suggesters["foods"] = PrefixIndex((food, count, None) for food, count in foods.items())
+
+    countries = count_values(metadata_df["Country"])
+    suggesters["countries"] = PrefixIndex((country, count, None) for country, count in countries.items())
+
+    regions = metadata_df.dropna(subset=["RegionName", "Country"]).groupby(["Country", "RegionName"]).size()
+    suggesters["regions"] = PrefixIndex(
+        (region, count, {"country": country}) for (country, region), count in regions.items()
+    )
+    suggesters["regions_by_country"] = {
+        country: PrefixIndex((region, count, None) for (_, region), count in country_regions.items())
+        for country, country_regions in regions.groupby(level=0)
+    }
+
+    wineries = count_values(metadata_df["WineryName"])
+    suggesters["wineries"] = PrefixIndex((winery, count, None) for winery, count in wineries.items())
+
+    popularity = metadata_df["rating_count"].fillna(0) if "rating_count" in metadata_df.columns \
+        else pd.Series(1, index=metadata_df.index)
+    suggesters["wines"] = PrefixIndex(
+        (name, weight, {"WineID": int(wine_id), "WineryName": winery})
+        for name, weight, wine_id, winery in zip(
+            metadata_df["WineName"], popularity, metadata_df["WineID"], metadata_df["WineryName"]
+        )
+        if isinstance(name, str)
+    )
+    return suggesters
+
+
+def suggest(suggesters: Dict[str, Any], field: str, prefix: str = "", limit: int = 10,
+            country: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Top completions of prefix for one of SUGGEST_FIELDS.
+
+    Args:
+        country (str, optional): Only for "regions": restrict to this country's regions
+
+    Raises:
+        KeyError: if field is not one of SUGGEST_FIELDS
+    """
+    if field not in SUGGEST_FIELDS:
+        raise KeyError(field)
+    if field == "regions" and country:
+        index = suggesters["regions_by_country"].get(country)
+        return index.complete(prefix, limit) if index is not None else []
+    return suggesters[field].complete(prefix, limit)
@@ -0,0 +1,159 @@
+"""
+Lightweight latency tracing.
+
+    with span("recommend.knn"):
+        distances, indices = model.kneighbors(...)
+
+Every span is recorded into a process-wide HDR-style histogram for its name
+and, when a trace is active (one per API request, see start_trace), appended
+to that trace so the request can report where its time went. A span costs a
+few microseconds; nothing is kept per request beyond the active trace.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# spans of the request being served: list of (name, seconds); None outside a request
+_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("cvino_trace", default=None)
+# False for the API's own warm-up queries, which must not reach the exported histograms
+_recording: ContextVar[bool] = ContextVar("cvino_recording", default=True)
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in the manner of HdrHistogram: every decade
+    from lowest to highest is split into linear sub-buckets, so any recorded
+    value is known to significant_digits digits (2: within 10%, 3: within 1%)
+    with a fixed, small memory footprint whatever the number of samples.
+    """
+
+    def __init__(self, significant_digits: int = 2, lowest: float = 1e-6, highest: float = 100.0):
+        self.lowest = lowest
+        self.sub_buckets = 10 ** (significant_digits - 1)
+        self.decades = math.ceil(math.log10(highest / lowest))
+        # a list: incrementing one item is several times cheaper than on an ndarray
+        self.counts = [0] * (self.decades * 9 * self.sub_buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, seconds: float) -> int:
+        units = max(seconds / self.lowest, 1.0)
+        decade = min(int(math.log10(units)), self.decades - 1)
+        mantissa = min(int(units / 10 ** decade * self.sub_buckets), 10 * self.sub_buckets - 1)
+        return decade * 9 * self.sub_buckets + mantissa - self.sub_buckets
+
+    def upper_bound(self, index) -> np.ndarray:
+        """Upper bound in seconds of bucket(s) index."""
+        decade, offset = np.divmod(index, 9 * self.sub_buckets)
+        return (offset + self.sub_buckets + 1) * 10.0 ** decade / self.sub_buckets * self.lowest
+
+    def record(self, seconds: float):
+        index = self._index(seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> Tuple[np.ndarray, int, float, float]:
+        with self._lock:
+            return np.array(self.counts, dtype=np.int64), self.count, self.sum, self.max
+
+    def quantiles(self, qs) -> List[float]:
+        """Values at quantiles qs (upper bound of their bucket, capped at the max seen)."""
+        counts, count, _, largest = self.snapshot()
+        if not count:
+            return [0.0 for _ in qs]
+        cumulative = np.cumsum(counts)
+        ranks = np.maximum(np.ceil(np.asarray(qs) * count), 1)
+        return np.minimum(self.upper_bound(np.searchsorted(cumulative, ranks)), largest).tolist()
+
+    def cumulative_counts(self, bounds) -> List[int]:
+        """Number of values <= each bound (exact when bounds fall on bucket edges)."""
+        counts, _, _, _ = self.snapshot()
+        cumulative = np.cumsum(counts)
+        edges = self.upper_bound(np.arange(len(counts)))
+        # last bucket whose upper edge is <= bound (a tiny tolerance absorbs float rounding)
+        positions = np.searchsorted(edges, np.asarray(bounds) * (1 + 1e-9), side="right") - 1
+        return [int(cumulative[position]) if position >= 0 else 0 for position in positions]
+
+
+class HistogramSet:
+    """Histograms by name, created on first use."""
+
+    def __init__(self, **histogram_options):
+        self._options = histogram_options
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> LatencyHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram(**self._options))
+        return histogram
+
+    def record(self, name: str, seconds: float):
+        self.get(name).record(seconds)
+
+    def items(self) -> List[Tuple[str, LatencyHistogram]]:
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# stages inside requests (span names) and whole requests (by route)
+STAGES = HistogramSet()
+REQUESTS = HistogramSet()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as stage name."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if _recording.get():
+            STAGES.record(name, seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((name, seconds))
+
+
+@contextmanager
+def unrecorded() -> Iterator[None]:
+    """
+    Keep the spans of the enclosed block, and of the tasks and pool work it
+    starts (they copy its context), out of the histograms.
+    """
+    token = _recording.set(False)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def start_trace():
+    """Start collecting the spans of the current request; returns the token for end_trace."""
+    return _trace.set([])
+
+
+def current_trace() -> Optional[List[Tuple[str, float]]]:
+    return _trace.get()
+
+
+def end_trace(token):
+    _trace.reset(token)
@@ -0,0 +1,150 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from cv_functions.tracing import span
+
+LOCAL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models", "user_profiles"))
+
+LOOKUP_FILE = "user_lookup.npy"
+CENTROIDS_FILE = "user_centroids.npy"
+INDPTR_FILE = "rated_indptr.npy"
+RATED_ROWS_FILE = "rated_rows.npy"
+META_FILE = "user_profiles.json"
+
+
+def build_user_profiles(ratings_df: pd.DataFrame, wine_ids, wine_matrix, out_dir=LOCAL_PATH):
+    """
+    Build the compact per-user store used by /recommend-for-user.
+
+    Every user gets a dense id, a rating-weighted centroid of the content
+    vectors of the wines they rated, and a sorted array of the model rows
+    they already rated. Everything is written as plain .npy files so the API
+    can memory-map them instead of touching the ratings at request time.
+
+    Args:
+        ratings_df (pd.DataFrame): Ratings with 'UserID', 'WineID' and 'Rating' columns
+        wine_ids (array-like): WineID of every row of the model matrix, in row order
+        wine_matrix (np.ndarray): Encoded wine features the kNN model was fitted on
+        out_dir (str): Directory for the store files
+
+    Returns:
+        UserProfileStore: The freshly built store
+    """
+    # offline only: kept out of the API's imports
+    from scipy import sparse
+
+    print("=== BUILDING USER PROFILE STORE ===")
+    wine_matrix = np.asarray(wine_matrix, dtype=np.float32)
+
+    # map WineID -> model row, dropping ratings for wines outside the model
+    rows = pd.Index(wine_ids).get_indexer(ratings_df["WineID"])
+    known = rows >= 0
+    rows = rows[known]
+    user_ids = ratings_df["UserID"].to_numpy()[known].astype(np.int64)
+    ratings = ratings_df["Rating"].to_numpy()[known].astype(np.float32)
+
+    # dense user ids: position in the sorted array of distinct UserIDs
+    unique_users, dense = np.unique(user_ids, return_inverse=True)
+    n_users = len(unique_users)
+    min_user_id = int(unique_users[0])
+
+    lookup = np.full(int(unique_users[-1]) - min_user_id + 1, -1, dtype=np.int32)
+    lookup[unique_users - min_user_id] = np.arange(n_users, dtype=np.int32)
+
+    # rating-weighted centroid of the rated wines' content vectors
+    weights = sparse.csr_matrix((ratings, (dense, rows)), shape=(n_users, wine_matrix.shape[0]))
+    totals = np.asarray(weights.sum(axis=1)).ravel()
+    totals[totals == 0] = 1.0
+    centroids = (weights @ wine_matrix) / totals[:, None]
+
+    # per-user sorted, de-duplicated rated rows in CSR layout
+    order = np.lexsort((rows, dense))
+    dense_sorted, rows_sorted = dense[order], rows[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (dense_sorted[1:] != dense_sorted[:-1]) | (rows_sorted[1:] != rows_sorted[:-1])
+    dense_sorted, rows_sorted = dense_sorted[keep], rows_sorted[keep]
+    indptr = np.zeros(n_users + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dense_sorted, minlength=n_users), out=indptr[1:])
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, LOOKUP_FILE), lookup)
+    np.save(os.path.join(out_dir, CENTROIDS_FILE), centroids.astype(np.float32))
+    np.save(os.path.join(out_dir, INDPTR_FILE), indptr)
+    np.save(os.path.join(out_dir, RATED_ROWS_FILE), rows_sorted.astype(np.int32))
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump({"min_user_id": min_user_id, "n_users": n_users, "n_features": int(wine_matrix.shape[1])}, f)
+
+    print(f"User profiles built for {n_users} users ({len(rows_sorted)} rated wines).")
+    return UserProfileStore(out_dir)
+
+
+class UserProfileStore:
+    """
+    Read-only, memory-mapped view over the files written by build_user_profiles.
+    Looking up a user is a single array index; nothing is loaded per request.
+    """
+
+    def __init__(self, directory=LOCAL_PATH):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        self.min_user_id = meta["min_user_id"]
+        self.n_users = meta["n_users"]
+
+        self.lookup = np.load(os.path.join(directory, LOOKUP_FILE), mmap_mode="r")
+        self.centroids = np.load(os.path.join(directory, CENTROIDS_FILE), mmap_mode="r")
+        self.indptr = np.load(os.path.join(directory, INDPTR_FILE), mmap_mode="r")
+        self.rated_rows_all = np.load(os.path.join(directory, RATED_ROWS_FILE), mmap_mode="r")
+
+    def dense_id(self, user_id: int) -> int:
+        """Return the dense id of a UserID, or -1 if the user is unknown."""
+        position = int(user_id) - self.min_user_id
+        if position < 0 or position >= len(self.lookup):
+            return -1
+        return int(self.lookup[position])
+
+    def __contains__(self, user_id) -> bool:
+        return self.dense_id(user_id) >= 0
+
+    def centroid(self, user_id: int) -> np.ndarray:
+        return np.asarray(self.centroids[self.dense_id(user_id)])
+
+    def rated_rows(self, user_id: int) -> np.ndarray:
+        """Sorted model rows the user has already rated."""
+        dense = self.dense_id(user_id)
+        return np.asarray(self.rated_rows_all[self.indptr[dense]:self.indptr[dense + 1]])
+
+
+def get_wine_recommendations_for_user(
+    user_id,
+    store: UserProfileStore,
+    n_recommendations=5,
+    metadata_df: pd.DataFrame = None,
+    model=None
+):
+    """
+    Recommend wines close to a user's taste centroid, skipping wines they already rated.
+
+    Returns None if the user is not in the store.
+    """
+    if user_id not in store:
+        return None
+
+    rated = store.rated_rows(user_id)
+    n_neighbors = min(max(n_recommendations * 3, 20) + len(rated), len(metadata_df))
+    with span("recommend_for_user.knn"):
+        distances, indices = model.kneighbors(store.centroid(user_id).reshape(1, -1), n_neighbors=n_neighbors)
+    distances, indices = distances[0], indices[0]
+
+    # membership test against the sorted rated array
+    if len(rated):
+        positions = np.searchsorted(rated, indices).clip(max=len(rated) - 1)
+        unrated = rated[positions] != indices
+        distances, indices = distances[unrated], indices[unrated]
+
+    with span("recommend_for_user.join"):
+        recommended = metadata_df.iloc[indices[:n_recommendations]].copy()
+        recommended["Similarity"] = 1 - distances[:n_recommendations]
+
+        return recommended.sort_values("Similarity", ascending=False)
@@ -1,49 +1,42 @@
-import anthropic
+import asyncio
 import base64
+import httpx
 import json
 import os
-from PIL import Image
-from typing import Optional, Dict, Any
+from PIL import Image, ImageOps
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from dotenv import load_dotenv
 import io
-import ipdb
+
+if TYPE_CHECKING:
+    # imported on first use: the SDK takes a noticeable share of API startup
+    import anthropic
 
 
 # Load environment variables from .env file
 load_dotenv()
 
-def extract_wine_info_from_image(image, api_key: Optional[str] = None) -> Dict[str, Any]:
-    """
-    Extract wine information from a wine label image using Anthropic's Claude API.
+# Label-extraction API settings (overridable through the environment, e.g. to
+# point the extractor at a local stub server)
+MODEL_NAME = "claude-3-5-sonnet-20241022"
+API_BASE_URL = os.environ.get("LABEL_API_BASE_URL") or None
+API_TIMEOUT = float(os.environ.get("LABEL_API_TIMEOUT", 30))
+API_CONNECT_TIMEOUT = float(os.environ.get("LABEL_API_CONNECT_TIMEOUT", 5))
+API_MAX_RETRIES = int(os.environ.get("LABEL_API_MAX_RETRIES", 2))
+API_MAX_CONNECTIONS = int(os.environ.get("LABEL_API_MAX_CONNECTIONS", 20))
+API_MAX_CONCURRENCY = int(os.environ.get("LABEL_API_MAX_CONCURRENCY", 8))
 
-    Args:
-        image_path (str): Path to the wine label image
-        api_key (str, optional): Anthropic API key. If None, reads from ANTHROPIC_API_KEY env var
+# Upload limits for decode_label_image
+MAX_IMAGE_PIXELS = int(os.environ.get("LABEL_MAX_IMAGE_PIXELS", 60_000_000))
+API_IMAGE_SIZE = 400
 
-    Returns:
-        Dict containing extracted wine information
-    """
+EXPECTED_FIELDS = ["wine_name", "winery", "wine_type", "grape_varieties", "body", "acidity", "country", "region", "ABV"]
 
-    # Initialize Anthropic client
-    if api_key is None:
-        api_key = os.environ.get("ANTHROPIC_API_KEY")
-
-    if not api_key:
-        raise ValueError("Anthropic API key not provided. Set ANTHROPIC_API_KEY environment variable or pass api_key parameter.")
-
-    client = anthropic.Anthropic(api_key=api_key)
-
-    # Resize and prepare image
-    processed_image = resize_image_for_api(image)
-
-    # Convert image to base64
-    image_base64 = encode_image_to_base64(processed_image)
-
-
-    # Create the prompt for wine information extraction
-    system_prompt = """You are an expert wine sommelier and label reader. Your task is to carefully analyze wine label images and extract specific information.
+SYSTEM_PROMPT = """You are an expert wine sommelier and label reader. Your task is to carefully analyze wine label images and extract specific information.
 
 Return the information in JSON format with exactly these fields:
+- wine_name: Name of the wine as printed on the label, without the producer and vintage
+- winery: Producer, château, domaine or winery name
 - wine_type: The type of wine (Red, White, Rosé, Sparkling, Dessert, etc.)
 - grape_varieties: List of grape varieties mentioned on the label and included in the next list (list: ['Cabernet Sauvignon', 'Chardonnay', 'Merlot', 'Pinot Noir', 'Syrah/Shiraz', 'Cabernet Franc', 'Grenache', 'Sauvignon Blanc', 'Riesling', 'Malbec', 'Sangiovese', 'Tempranillo', 'Touriga Nacional', 'Mourvedre', 'Petit Verdot', 'Nebbiolo', 'Corvina', 'Viognier', 'Zinfandel', 'Tinta Roriz', 'Glera/Prosecco', 'Touriga Franca', 'Rondinella', 'Carmenère', 'Sémillon', 'Chenin Blanc', 'Barbera', 'Garnacha', 'Carignan/Cariñena', 'Cinsault', 'Pinot Meunier', 'Gewürztraminer', 'Pinot Blanc', 'Pinot Grigio', 'Primitivo', 'Spätburgunder', 'Montepulciano', 'Gamay Noir', 'Molinara', 'Pinot Gris', 'Petite Sirah', 'Roussanne', 'Tinta Barroca', 'Alicante Bouschet', 'Muscat/Moscato', 'Grüner Veltliner', 'Aragonez', 'Tannat', "Nero d'Avola", 'Pinotage', 'Macabeo', 'Trebbiano', 'Zweigelt', 'Malvasia', 'Negroamaro', 'Grenache Blanc', 'Garganega', 'Muscat Blanc', 'Corvinone', 'Grauburgunder'])
 - body: Wine body classification (Very light-bodied, Light-bodied, Medium-bodied, Full-bodied, Very full-bodied)
@@ -54,103 +47,329 @@ Return the information in JSON format with exactly these fields:
 
 If information is not visible or unclear on the label, use null for that field. Be accurate and only extract information that is clearly visible on the label."""
 
-    user_prompt = """Please analyze this wine label image and extract the following information:
+USER_PROMPT = """Please analyze this wine label image and extract the following information:
 
-1. Wine type (Red, White, Rosé, Sparkling, etc.)
-2. Grape varieties (specific grape names if listed)
-3. Body classification (if mentioned or can be inferred from wine type/style)
-4. Acidity level (if mentioned)
-5. Country of origin
-6. Region of Origin
-7. ABV (Alcohol by volume percentage if mentioned)
+1. Wine name
+2. Winery / producer
+3. Wine type (Red, White, Rosé, Sparkling, etc.)
+4. Grape varieties (specific grape names if listed)
+5. Body classification (if mentioned or can be inferred from wine type/style)
+6. Acidity level (if mentioned)
+7. Country of origin
+8. Region of Origin
+9. ABV (Alcohol by volume percentage if mentioned)
 
 Return the results in JSON format as specified."""
 
-    try:
-        # Send request to Claude
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",  # Using latest Claude model
-            max_tokens=1000,
-            temperature=0,  # Low temperature for consistent extraction
-            system=system_prompt,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": image_base64
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": user_prompt
-                        }
-                    ]
-                }
-            ]
+# One long-lived client per API key, shared by every request of the process
+_clients = {}
+_async_clients = {}
+_async_semaphore = None
+
+
+def _resolve_api_key(api_key: Optional[str] = None) -> str:
+    if api_key is None:
+        api_key = os.environ.get("ANTHROPIC_API_KEY")
+
+    if not api_key:
+        raise ValueError("Anthropic API key not provided. Set ANTHROPIC_API_KEY environment variable or pass api_key parameter.")
+
+    return api_key
+
+
+def _timeout() -> "anthropic.Timeout":
+    import anthropic
+
+    return anthropic.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT)
+
+
+def get_client(api_key: Optional[str] = None) -> "anthropic.Anthropic":
+    """
+    Return the shared blocking client (used by scripts and the CLI).
+    """
+    import anthropic
+
+    api_key = _resolve_api_key(api_key)
+    if api_key not in _clients:
+        _clients[api_key] = anthropic.Anthropic(
+            api_key=api_key,
+            base_url=API_BASE_URL,
+            timeout=_timeout(),
+            max_retries=API_MAX_RETRIES,
         )
+    return _clients[api_key]
 
-        # Parse the response
-        response_text = message.content[0].text
-
-        # Try to extract JSON from the response
-        try:
-            # Look for JSON in the response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start:json_end]
-                wine_info = json.loads(json_str)
-            else:
-                # Fallback: try to parse the entire response as JSON
-                wine_info = json.loads(response_text)
-
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return structured default with raw response
-            wine_info = {
-                "wine_type": None,
-                "grape_varieties": None,
-                "body": None,
-                "acidity": None,
-                "country": None,
-                "region": None,
-                "raw_response": response_text,
-                "error": "Failed to parse JSON response"
-            }
 
-        # Ensure all expected fields are present
-        expected_fields = ["wine_type", "grape_varieties", "body", "acidity", "country", "region", "ABV"]
-        for field in expected_fields:
-            if field not in wine_info:
-                wine_info[field] = None
+def get_async_client(api_key: Optional[str] = None) -> "anthropic.AsyncAnthropic":
+    """
+    Return the shared async client, with a pooled keep-alive HTTP connection pool.
+    """
+    import anthropic
+
+    api_key = _resolve_api_key(api_key)
+    if api_key not in _async_clients:
+        http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=API_MAX_CONNECTIONS,
+                                max_keepalive_connections=API_MAX_CONNECTIONS),
+            timeout=_timeout(),
+        )
+        _async_clients[api_key] = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=API_BASE_URL,
+            timeout=_timeout(),
+            max_retries=API_MAX_RETRIES,
+            http_client=http_client,
+        )
+    return _async_clients[api_key]
 
-        # Add metadata
-        #wine_info["image_path"] = image_path
-        wine_info["extraction_successful"] = True
 
-        return wine_info
+def _get_semaphore() -> asyncio.Semaphore:
+    global _async_semaphore
+    if _async_semaphore is None:
+        _async_semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+    return _async_semaphore
 
-    except Exception as e:
-        # Return error information
-        return {
+
+async def close_async_clients():
+    """
+    Close the pooled connections of the shared async clients (call on shutdown).
+    """
+    global _async_semaphore
+    for client in _async_clients.values():
+        await client.close()
+    _async_clients.clear()
+    _async_semaphore = None
+
+
+def prepare_image(image) -> str:
+    """
+    Resize a PIL image for the API and return it as a base64 JPEG string.
+    """
+    processed_image = resize_image_for_api(image)
+    return encode_image_to_base64(processed_image)
+
+
+def prepare_image_cached(image, cache=None):
+    """
+    Blocking half of an extraction: resize the image for the API, look it up
+    in cache and, on a miss, encode it.
+
+    Returns:
+        tuple: (processed image, base64 JPEG or None on a hit, cached wine_info or None)
+    """
+    processed_image = resize_image_for_api(image)
+    if cache is not None:
+        wine_info = cache.get(processed_image)
+        if wine_info is not None:
+            return processed_image, None, wine_info
+    return processed_image, encode_image_to_base64(processed_image), None
+
+
+def _build_request(image_base64: str) -> Dict[str, Any]:
+    return {
+        "model": MODEL_NAME,
+        "max_tokens": 1000,
+        "temperature": 0,  # Low temperature for consistent extraction
+        "system": SYSTEM_PROMPT,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/jpeg",
+                            "data": image_base64
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": USER_PROMPT
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def parse_wine_info(response_text: str) -> Dict[str, Any]:
+    """
+    Parse the model's answer into the wine_info dict returned by the API.
+    """
+    # Try to extract JSON from the response
+    try:
+        # Look for JSON in the response
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+
+        if json_start != -1 and json_end != -1:
+            json_str = response_text[json_start:json_end]
+            wine_info = json.loads(json_str)
+        else:
+            # Fallback: try to parse the entire response as JSON
+            wine_info = json.loads(response_text)
+
+    except json.JSONDecodeError:
+        # If JSON parsing fails, return structured default with raw response
+        wine_info = {
+            "wine_name": None,
+            "winery": None,
             "wine_type": None,
             "grape_varieties": None,
             "body": None,
             "acidity": None,
             "country": None,
             "region": None,
-            "ABV": None,
-            #"image_path": image_path,
-            "extraction_successful": False,
-            "error": str(e)
+            "raw_response": response_text,
+            "error": "Failed to parse JSON response"
         }
 
-def resize_image_for_api(image_file, max_size: int = 400) -> str:
+    # Ensure all expected fields are present
+    for field in EXPECTED_FIELDS:
+        if field not in wine_info:
+            wine_info[field] = None
+
+    # Add metadata
+    wine_info["extraction_successful"] = True
+
+    return wine_info
+
+
+def failed_wine_info(error: Exception) -> Dict[str, Any]:
+    """
+    wine_info returned when the extraction itself failed.
+    """
+    return {
+        "wine_name": None,
+        "winery": None,
+        "wine_type": None,
+        "grape_varieties": None,
+        "body": None,
+        "acidity": None,
+        "country": None,
+        "region": None,
+        "ABV": None,
+        "extraction_successful": False,
+        "error": str(error)
+    }
+
+
+async def request_wine_info(image_base64: str, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Send one prepared image to the API and parse the answer.
+
+    Unlike extract_wine_info_from_image_async, API errors are raised so callers
+    can retry them (e.g. anthropic.RateLimitError).
+    """
+    client = get_async_client(api_key)
+    async with _get_semaphore():
+        message = await client.messages.create(**_build_request(image_base64))
+    return parse_wine_info(message.content[0].text)
+
+
+async def run_blocking(pool, function, *args, **kwargs):
+    """
+    Run blocking work off the event loop: on pool (the API's image WorkPool)
+    when given, otherwise in asyncio's default threads.
+    """
+    if pool is not None:
+        return await pool.run(function, *args, **kwargs)
+    return await asyncio.to_thread(function, *args, **kwargs)
+
+
+async def extract_wine_info_from_image_async(image, api_key: Optional[str] = None, cache=None,
+                                             pool=None, lookup: bool = True) -> Dict[str, Any]:
+    """
+    Extract wine information from a wine label image without blocking the event loop.
+
+    Uses the shared pooled async client; at most API_MAX_CONCURRENCY requests
+    are in flight per process.
+
+    Args:
+        image (PIL.Image.Image): Wine label image
+        api_key (str, optional): Anthropic API key. If None, reads from ANTHROPIC_API_KEY env var
+        cache (LabelCache, optional): Cache of earlier extractions; a hit skips the API call
+        pool (WorkPool, optional): Where the resize, cache lookup and encode run (see run_blocking)
+        lookup (bool): Whether to look the image up in cache first; False when
+            the caller already did, so a miss is counted once (the answer is still stored)
+
+    Returns:
+        Dict containing extracted wine information
+    """
+    _resolve_api_key(api_key)
+    processed_image, image_base64, wine_info = await run_blocking(
+        pool, prepare_image_cached, image, cache if lookup else None)
+    if wine_info is not None:
+        return wine_info
+
+    try:
+        wine_info = await request_wine_info(image_base64, api_key)
+    except Exception as e:
+        # Return error information
+        return failed_wine_info(e)
+
+    # only cache clean readings, so a bad parse can be retried
+    if cache is not None and "error" not in wine_info:
+        await run_blocking(pool, cache.put, processed_image, wine_info, payload_bytes=len(image_base64))
+
+    return wine_info
+
+
+def extract_wine_info_from_image(image, api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract wine information from a wine label image using Anthropic's Claude API.
+
+    Blocking version of extract_wine_info_from_image_async, for scripts.
+
+    Args:
+        image (PIL.Image.Image): Wine label image
+        api_key (str, optional): Anthropic API key. If None, reads from ANTHROPIC_API_KEY env var
+
+    Returns:
+        Dict containing extracted wine information
+    """
+    client = get_client(api_key)
+    image_base64 = prepare_image(image)
+
+    try:
+        # Send request to Claude
+        message = client.messages.create(**_build_request(image_base64))
+        return parse_wine_info(message.content[0].text)
+
+    except Exception as e:
+        # Return error information
+        return failed_wine_info(e)
+
+def decode_label_image(data: bytes, max_size: int = API_IMAGE_SIZE) -> Image.Image:
+    """
+    Decode uploaded image bytes straight to (roughly) the size we need.
+
+    JPEGs are decoded with draft(), which lets libjpeg scale by 1/2, 1/4 or 1/8
+    while decoding instead of materialising every pixel of a phone photo. EXIF
+    orientation is applied once, then the image is shrunk to fit max_size.
+
+    Args:
+        data (bytes): Raw upload
+        max_size (int): Maximum width or height of the returned image
+
+    Returns:
+        Image.Image: Upright RGB image no larger than max_size on either side
+    """
+    image = Image.open(io.BytesIO(data))
+
+    # the header is parsed lazily, so oversized images are rejected before decoding
+    if image.width * image.height > MAX_IMAGE_PIXELS:
+        raise ValueError(f"Image too large: {image.width}x{image.height} pixels (limit {MAX_IMAGE_PIXELS}).")
+
+    # square request so the draft is big enough whichever way EXIF rotates it
+    image.draft("RGB", (max_size, max_size))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGB")
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return image
+
+def resize_image_for_api(image_file, max_size: int = API_IMAGE_SIZE) -> str:
     """
     Resize image to maximum 400x400 pixels while maintaining aspect ratio.
 
@@ -214,6 +433,7 @@ def main():
 
     # Print results
     print("Wine Information Extracted:")
+    print(f"Wine: {result.get('winery')} {result.get('wine_name')}")
     print(f"Wine Type: {result.get('wine_type')}")
     print(f"Grape Varieties: {result.get('grape_varieties')}")
     print(f"Body: {result.get('body')}")
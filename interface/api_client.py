@@ -0,0 +1,175 @@
+"""
+HTTP client the Streamlit apps use to talk to the CvalVino API.
+
+One pooled requests.Session per process (keep-alive, so an action does not pay
+for a new TCP connection), explicit timeouts, retries on 502/503/504 and
+connection errors, a small thread pool to run independent calls concurrently,
+and st.cache_data wrappers keyed on the request payload.
+
+    from interface import api_client
+    wine_info = api_client.cached_read_label(image_bytes)
+    wines = api_client.cached_recommend_by_foods(("Beef", "Lamb"), wine_type="Red")
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import streamlit as st
+    cache_data = st.cache_data
+except ImportError:  # outside the apps (scripts, notebooks): no response cache
+    def cache_data(func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+API_URL = os.environ.get("CVINO_API_URL", "http://localhost:8000").rstrip("/")
+CONNECT_TIMEOUT = float(os.environ.get("CVINO_API_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("CVINO_API_TIMEOUT", 60))
+RETRIES = int(os.environ.get("CVINO_API_RETRIES", 2))
+# cached responses expire after this many seconds (the catalogue only changes on redeploy)
+CACHE_TTL = int(os.environ.get("CVINO_API_CACHE_TTL", 600))
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+
+
+class APIError(Exception):
+    """The API answered with an error status."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide session, creating it on first use. Streamlit runs
+    every browser session in a thread of the same process, so they all share
+    its connection pool.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=RETRIES,
+                    backoff_factor=0.3,
+                    status_forcelist=(502, 503, 504),
+                    # every endpoint is a read: POSTs are safe to repeat
+                    allowed_methods=frozenset({"GET", "POST"}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _request(method: str, path: str, **kwargs) -> Any:
+    response = get_session().request(method, f"{API_URL}{path}", timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+    if response.status_code != 200:
+        try:
+            body = response.json()
+            message = body.get("detail") or body.get("message") or response.text
+        except ValueError:
+            message = response.text
+        raise APIError(response.status_code, str(message))
+    return response.json()
+
+
+def get_facets() -> Dict[str, Any]:
+    return _request("GET", "/facets")
+
+
+def read_label(image_bytes: bytes, n_recommendations: int = 5) -> Dict[str, Any]:
+    return _request("POST", "/read_image", files={"img": image_bytes}, params={"n_recommendations": n_recommendations})
+
+
+def recommend_wines(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return _request("POST", "/recommend-wines", json=payload)
+
+
+def recommend_by_food(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return _request("POST", "/recommend-by-food", json=payload)
+
+
+def suggest(field: str, q: str = "", limit: int = 10, country: Optional[str] = None) -> Dict[str, Any]:
+    params = {"q": q, "limit": limit}
+    if country:
+        params["country"] = country
+    return _request("GET", f"/suggest/{field}", params=params)
+
+
+def run_concurrently(calls: Dict[str, Tuple[Callable, tuple]]) -> Dict[str, Any]:
+    """
+    Run independent calls at the same time on the shared pool.
+
+    Args:
+        calls: name -> (function, args)
+
+    Returns:
+        dict: name -> result, or the exception the call raised
+    """
+    global _executor
+    if _executor is None:
+        with _session_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cvino-api")
+    futures = {name: _executor.submit(function, *args) for name, (function, args) in calls.items()}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+# st.cache_data keys on the arguments (the image bytes, the payload dict) and
+# never caches a call that raised, so errors are retried on the next run.
+# Cached functions are called from the script thread; any fan-out happens inside them.
+@cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_read_label(image_bytes: bytes, n_recommendations: int = 5) -> Dict[str, Any]:
+    return read_label(image_bytes, n_recommendations)
+
+
+@cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_recommend_wines(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return recommend_wines(payload)
+
+
+@cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_recommend_by_foods(foods: tuple, wine_type: Optional[str] = None, n_recommendations: int = 10) -> list:
+    """
+    Wines pairing with any of foods: one /recommend-by-food call per food, all
+    in flight at once, merged best rated first without duplicates.
+    """
+    results = run_concurrently({
+        food: (recommend_by_food, ({
+            "food_pairing": food,
+            "wine_type": wine_type,
+            "n_recommendations": n_recommendations,
+            "exact_match_only": True,
+        },))
+        for food in foods
+    })
+    errors = [result for result in results.values() if isinstance(result, Exception)]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+
+    wines = {}
+    for result in results.values():
+        if not isinstance(result, Exception):
+            for wine in result.get("wines", []):
+                wines.setdefault(wine["WineID"], wine)
+    ranked = sorted(wines.values(), key=lambda wine: -(wine.get("avg_rating") or 0))
+    return ranked[:n_recommendations]
@@ -0,0 +1,242 @@
+"""
+Bulk wine-label extraction over a directory or tar archive of label images.
+
+Images are streamed through a bounded pool of async workers, API errors that
+are worth retrying (rate limits, timeouts, 5xx) are retried with exponential
+backoff, and every result is appended to a JSONL file as soon as it is known,
+so an interrupted run picks up where it stopped.
+
+    python -m interface.batch_label_extract raw_data/last/XWines_Slim_1K_labels \
+        --output raw_data/label_extractions.jsonl --workers 16
+
+    # end to end against the local stub of the vision API
+    python -m interface.batch_label_extract labels.tar --stub --workers 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tarfile
+import time
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def iter_directory(path):
+    """Yield (name, bytes) for every image under a directory, in a stable order."""
+    root = Path(path)
+    for file in sorted(root.rglob("*")):
+        if file.is_file() and file.suffix.lower() in IMAGE_EXTENSIONS:
+            yield str(file.relative_to(root)), file.read_bytes()
+
+
+def iter_tar(path):
+    """Yield (name, bytes) for every image in a tar file, reading it as a stream."""
+    with tarfile.open(path, "r|*") as archive:
+        for member in archive:
+            if member.isfile() and Path(member.name).suffix.lower() in IMAGE_EXTENSIONS:
+                yield member.name, archive.extractfile(member).read()
+
+
+def iter_images(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    if tarfile.is_tarfile(source):
+        return iter_tar(source)
+    raise ValueError(f"{source} is neither a directory nor a tar archive")
+
+
+def load_checkpoint(output_path):
+    """Names already extracted successfully by a previous run."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line of an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["image"])
+    return done
+
+
+class RateLimiter:
+    """Spaces request starts so that at most `per_minute` start per minute."""
+
+    def __init__(self, per_minute=0):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def is_retryable(error):
+    import anthropic
+    if isinstance(error, (anthropic.RateLimitError, anthropic.APIConnectionError)):
+        return True  # APITimeoutError is an APIConnectionError
+    return isinstance(error, anthropic.APIStatusError) and error.status_code >= 500
+
+
+def retry_delay(error, attempt, base_delay, max_delay):
+    """Server-provided retry-after if any, else exponential backoff with full jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), max_delay)
+        except ValueError:
+            pass
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+async def run_batch(source, output_path, workers=8, max_retries=5, base_delay=1.0, max_delay=60.0,
+                    requests_per_minute=0, limit=None, cache=None, report_every=10.0):
+    """
+    Extract wine info for every image of `source` and append results to `output_path`.
+
+    Returns:
+        dict: Run summary (counts, elapsed seconds, throughput)
+    """
+    from cv_functions.wine_label_ai2 import decode_label_image, prepare_image_cached, request_wine_info
+
+    done = load_checkpoint(output_path)
+    if done:
+        print(f"Resuming: {len(done)} images already extracted.")
+
+    queue = asyncio.Queue(maxsize=workers * 2)
+    limiter = RateLimiter(requests_per_minute)
+    stats = {"ok": 0, "error": 0, "skipped": 0, "cached": 0, "retries": 0}
+    start = time.monotonic()
+    output = open(output_path, "a")
+
+    def write(record):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    async def produce():
+        images = iter_images(source)
+        queued = 0
+        while True:
+            # file and tar reads are blocking, so they run in a thread
+            item = await asyncio.to_thread(next, images, None)
+            if item is None or (limit is not None and queued >= limit):
+                break
+            if item[0] in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put(item)
+            queued += 1
+        for _ in range(workers):
+            await queue.put(None)
+
+    async def extract(name, data):
+        image = await asyncio.to_thread(decode_label_image, data)
+        image, image_base64, wine_info = await asyncio.to_thread(prepare_image_cached, image, cache)
+        if wine_info is not None:
+            stats["cached"] += 1
+            return wine_info, 0
+
+        for attempt in range(max_retries + 1):
+            await limiter.wait()
+            try:
+                wine_info = await request_wine_info(image_base64)
+            except Exception as e:
+                if attempt == max_retries or not is_retryable(e):
+                    raise
+                stats["retries"] += 1
+                await asyncio.sleep(retry_delay(e, attempt, base_delay, max_delay))
+                continue
+            if cache is not None and "error" not in wine_info:
+                await asyncio.to_thread(cache.put, image, wine_info, payload_bytes=len(image_base64))
+            return wine_info, attempt
+
+    async def work():
+        while (item := await queue.get()) is not None:
+            name, data = item
+            started = time.monotonic()
+            try:
+                wine_info, retries = await extract(name, data)
+                write({"image": name, "status": "ok", "wine_info": wine_info, "retries": retries,
+                       "seconds": round(time.monotonic() - started, 3)})
+                stats["ok"] += 1
+            except Exception as e:
+                write({"image": name, "status": "error", "error": f"{type(e).__name__}: {e}",
+                       "seconds": round(time.monotonic() - started, 3)})
+                stats["error"] += 1
+
+    async def report():
+        while True:
+            await asyncio.sleep(report_every)
+            processed = stats["ok"] + stats["error"]
+            elapsed = time.monotonic() - start
+            print(f"[{elapsed:7.1f}s] {processed} processed ({stats['error']} errors, "
+                  f"{stats['retries']} retries) — {processed / elapsed:.2f} images/s")
+
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(workers)))
+    finally:
+        reporter.cancel()
+        output.close()
+
+    elapsed = time.monotonic() - start
+    processed = stats["ok"] + stats["error"]
+    summary = {**stats, "processed": processed, "seconds": round(elapsed, 2),
+               "images_per_second": round(processed / elapsed, 2) if elapsed else 0.0}
+    print(f"Done: {json.dumps(summary)}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk wine-label extraction")
+    parser.add_argument("source", help="directory or tar archive of label images")
+    parser.add_argument("--output", default="label_extractions.jsonl", help="JSONL results / checkpoint file")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent extractions")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--base-delay", type=float, default=1.0, help="first backoff delay in seconds")
+    parser.add_argument("--max-delay", type=float, default=60.0)
+    parser.add_argument("--rpm", type=int, default=0, help="request starts per minute (0 = unlimited)")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many new images")
+    parser.add_argument("--cache", default=None, help="label cache SQLite file to read and fill")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between progress lines")
+    parser.add_argument("--stub", action="store_true", help="run against an in-process stub of the vision API")
+    parser.add_argument("--stub-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # the job does its own backoff, and its worker count is the concurrency limit;
+    # both must be set before the extractor module reads its settings
+    os.environ.setdefault("LABEL_API_MAX_RETRIES", "0")
+    os.environ.setdefault("LABEL_API_MAX_CONCURRENCY", str(args.workers))
+    os.environ.setdefault("LABEL_API_MAX_CONNECTIONS", str(args.workers))
+
+    if args.stub:
+        from interface.stub_vision_api import start_stub_server
+        _, base_url = start_stub_server(latency=args.stub_latency, rate_limit_every=50)
+        os.environ["LABEL_API_BASE_URL"] = base_url
+        os.environ["ANTHROPIC_API_KEY"] = "stub"
+        print(f"Using stub vision API at {base_url}")
+
+    cache = None
+    if args.cache:
+        from cv_functions.label_cache import LabelCache
+        cache = LabelCache(args.cache)
+
+    asyncio.run(run_batch(args.source, args.output, args.workers, args.max_retries, args.base_delay,
+                          args.max_delay, args.rpm, args.limit, cache, args.report_every))
+
+
+if __name__ == "__main__":
+    main()
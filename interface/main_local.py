@@ -1,62 +1,66 @@
-import pickle
+"""
+Offline build: from the raw X-Wines files to the artefacts the API serves.
+
+    python -m interface.main_local                       # build what changed, then publish
+    python -m interface.main_local --stale               # list the stages that would run
+    python -m interface.main_local --until merge         # stop after a stage, publish nothing
+    python -m interface.main_local --force geocode       # re-run a stage although cached
+
+The stages (geocode, clean, rating aggregation, merge, encode, train, user
+profiles, facets; cv_functions/build.py) run as a cached pipeline
+(cv_functions/pipeline.py): each stage's output is stored under --cache-dir,
+keyed by a hash of its input files, parameters, code and the outputs of the
+stages it reads, so only the stages whose inputs changed are recomputed. Per-stage timings are
+printed and logged to <cache-dir>/runs.jsonl. The results are then published
+to --data-dir and --models-dir, where a running API can reload them.
+"""
+import argparse
 import os
-import pandas as pd
-from pathlib import Path
-import ipdb
-
-from cv_functions.recommendation import get_wine_recommendations_by_characteristics
-from cv_functions.data import  get_data_with_cache
-from cv_functions.model import train_model, load_model
-from cv_functions.encoder import Encoder_features_fit_transform, Encoder_features_transform
-# from transformers.ratings_stat import RatingsStatsAggregator
-from transformers.ratings_agg import Rates_aggregator
-
-
-# define paths
-LOCAL_DATA_PATH = os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino", "raw_data")
-clean_wine_path = os.path.join(LOCAL_DATA_PATH, "clean_wine_knn.csv") # search for file for knn if existed
-LOCAL_MODEL_PATH = os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino","models")
-os.makedirs(LOCAL_MODEL_PATH, exist_ok=True) # This will create the directory if it doesn't exist
-preprocessor_path = os.path.join(LOCAL_MODEL_PATH, "preprocessor.pkl")
-Pipeline_PATH = os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino", "models")
-
-# only process the cleaning and preprocessing if the final feature dataFrame is not available)
-if Path(clean_wine_path).is_file():
-     wine_scaled_df = pd.read_csv(clean_wine_path)
-
-else:
-    # load the cleaned data (clean data and save csv if not exist)
-    wines_clean_df, ratings_clean_df = get_data_with_cache(LOCAL_DATA_PATH)
-
-    ratings_stats = Rates_aggregator(ratings_clean_df)
-
-    # merge DataFrames
-    wine_df = wines_clean_df.merge(ratings_stats, on = 'WineID')  # ratings_stats already contains the merged DataFrame
-
-    print('save merged file to .csv as lookup table....')
-    save_path =  os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino", "raw_data")
-    wine_df.to_csv(os.path.join(save_path, 'wine_lookup.csv'), index=False)
-
-    # keep columns for KNN models
-    drop_columns = ['WineID', 'WineName','Elaborate','Grapes', 'Harmonize', 'Code', 'Country','RegionID', 'RegionName',
-                    'WineryID','WineryName','Website','Vintages']
-    wine_scaled_df_knn = wine_df.drop(columns=drop_columns, axis=1)
-
-    # ipdb.set_trace()
-    if Path(preprocessor_path).is_file(): # if there's already a preprocessor file, load it
-        wine_scaled_df = Encoder_features_transform(wine_scaled_df_knn)
-    else:
-        wine_scaled_df = Encoder_features_fit_transform(wine_scaled_df_knn)
-
-    print('save cleaned merged file for knn to .csv ....')
-    save_path =  os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino", "raw_data")
-    wine_scaled_df.to_csv(os.path.join(save_path, 'clean_wine_knn.csv'), index=False)
-
-# step4 : load model ( or train model if not existed)
-#ipdb.set_trace()
-LOCAL_MODEL_PATH = os.path.join(os.path.expanduser('~'), "code", "Obispodino", "cvino","models")
-pickle_file_path = os.path.join(LOCAL_MODEL_PATH, "trained_model.pkl")
-
-if not Path(pickle_file_path).is_file():
-    print("Model file not found.")
-    model = train_model(wine_scaled_df)
+import sys
+
+from cv_functions.build import RATINGS_FILE, RAW_DIR, WINES_FILE, build_stages, publish
+from cv_functions.pipeline import Pipeline
+
+DATA_DIR = os.environ.get("API_DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data")))
+MODELS_DIR = os.environ.get("API_MODELS_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the catalogue and models, re-running only what changed")
+    parser.add_argument("--raw-dir", default=RAW_DIR, help="directory of the raw X-Wines wines and ratings CSVs")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="where wine_metadata.csv and facets.json are published")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="where the preprocessor, model and user profiles are published")
+    parser.add_argument("--cache-dir", default=None, help="stage cache (default: <data-dir>/pipeline_cache)")
+    parser.add_argument("--geocoding-cache", default=None, help="geocoded regions (default: raw_data/geocoding_cache.pkl)")
+    parser.add_argument("--n-neighbors", type=int, default=6)
+    parser.add_argument("--until", nargs="+", default=None, metavar="STAGE",
+                        help="only bring these stages up to date, and publish nothing")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="re-run these stages although cached")
+    parser.add_argument("--stale", action="store_true", help="list the stages that would run, and stop")
+    args = parser.parse_args()
+
+    stages = build_stages(args.raw_dir, geocoding_cache=args.geocoding_cache, n_neighbors=args.n_neighbors)
+    missing = [path for path in (os.path.join(args.raw_dir, WINES_FILE), os.path.join(args.raw_dir, RATINGS_FILE))
+               if not os.path.isfile(path)]
+    if missing:
+        print(f"❌ Missing raw files: {', '.join(missing)}")
+        sys.exit(1)
+
+    pipeline = Pipeline(stages, args.cache_dir or os.path.join(args.data_dir, "pipeline_cache"))
+    if args.stale:
+        stale = pipeline.stale(args.until)
+        # the keys of stages downstream of a stale one depend on its new output
+        print("Stages to run: " + (", ".join(name for name in stale if name in pipeline.keys)
+                                   if stale else "none, everything is cached"))
+        pending = [name for name in stale if name not in pipeline.keys]
+        if pending:
+            print("Then, if the output they read changes: " + ", ".join(pending))
+        return
+
+    pipeline.run(args.until, force=args.force)
+    if args.until is None:
+        publish(pipeline, args.data_dir, args.models_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local stand-in for the Anthropic Messages API, for exercising the label
+extractor without network access or API costs.
+
+Run it and point the extractor at it:
+
+    python -m interface.stub_vision_api --port 8765
+    LABEL_API_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=stub uvicorn API.fast:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_WINE_INFO = {
+    "wine_name": "Catena Malbec",
+    "winery": "Bodega Catena Zapata",
+    "wine_type": "Red",
+    "grape_varieties": ["Malbec"],
+    "body": "Full-bodied",
+    "acidity": "Medium",
+    "country": "Argentina",
+    "region": "Mendoza",
+    "ABV": "13.5",
+}
+
+
+class StubVisionHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages with a canned label reading."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        server = self.server
+
+        with server.lock:
+            server.request_count += 1
+            count = server.request_count
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.rate_limit_every and count % server.rate_limit_every == 0:
+            self._send(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "stub rate limit"}},
+                       headers={"retry-after": "1"})
+            return
+
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(500, {"type": "error", "error": {"type": "api_error", "message": "stub failure"}})
+            return
+
+        self._send(200, {
+            "id": f"msg_stub_{count}",
+            "type": "message",
+            "role": "assistant",
+            "model": "stub",
+            "content": [{"type": "text", "text": json.dumps(server.wine_info)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 0, "output_tokens": 0},
+        })
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_stub_server(host="127.0.0.1", port=0, latency=0.0, rate_limit_every=0, error_rate=0.0,
+                     wine_info=None, verbose=False):
+    """
+    Create (but do not start) a stub server; port=0 picks a free port.
+
+    Args:
+        latency (float): Seconds to wait before answering, to mimic the remote round-trip
+        rate_limit_every (int): Answer every n-th request with a 429 (0 disables)
+        error_rate (float): Probability of answering with a 500
+        wine_info (dict): Label reading returned in the message text
+    """
+    server = ThreadingHTTPServer((host, port), StubVisionHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.latency = latency
+    server.rate_limit_every = rate_limit_every
+    server.error_rate = error_rate
+    server.wine_info = wine_info or STUB_WINE_INFO
+    server.verbose = verbose
+    return server
+
+
+def start_stub_server(**kwargs):
+    """
+    Start a stub server in a background thread and return (server, base_url).
+    """
+    server = make_stub_server(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the label-extraction vision API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every n-th request with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500 answer")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = make_stub_server(args.host, args.port, args.latency, args.rate_limit_every,
+                              args.error_rate, verbose=args.verbose)
+    print(f"Stub vision API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
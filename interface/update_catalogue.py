@@ -0,0 +1,71 @@
+"""
+Add new wines to the catalogue, or change existing ones, without re-running
+main_local.py: only the given wines are encoded (cv_functions/catalogue_update.py).
+
+    python -m interface.update_catalogue new_wines.csv
+    python -m interface.update_catalogue changed_wines.csv --dry-run
+
+The CSV has the columns of raw_data/wine_metadata.csv; only WineID is
+required. Wines whose WineID is already in the catalogue are updated (empty
+cells keep their current value), the others appended. The exit status is 3
+when the update recommends a full refit, so a scheduled job can run main_local.py.
+A running API picks the update up on its next reload (POST /admin/reload
+or API_RELOAD_POLL) or restart.
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from cv_functions.catalogue_update import MAX_GROWTH, update_catalogue
+
+DATA_DIR = os.environ.get("API_DATA_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data")))
+MODELS_DIR = os.environ.get("API_MODELS_DIR", os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "models")))
+REFIT_EXIT_CODE = 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental catalogue update without refitting")
+    parser.add_argument("wines", help="CSV of new or changed wines")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory of wine_metadata.csv and facets.json")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="directory of the preprocessor and kNN model")
+    parser.add_argument("--max-growth", type=float, default=MAX_GROWTH,
+                        help="growth since the last full fit above which a refit is recommended")
+    parser.add_argument("--dry-run", action="store_true", help="only encode and check drift, write nothing")
+    parser.add_argument("--report", default=None, help="optional JSON file for the report")
+    args = parser.parse_args()
+
+    try:
+        report = update_catalogue(
+            pd.read_csv(args.wines),
+            metadata_path=os.path.join(args.data_dir, "wine_metadata.csv"),
+            model_path=os.path.join(args.models_dir, "trained_model.pkl"),
+            preprocessor_path=os.path.join(args.models_dir, "preprocessor.pkl"),
+            facets_path=os.path.join(args.data_dir, "facets.json"),
+            max_growth=args.max_growth,
+            dry_run=args.dry_run,
+        )
+    except ValueError as e:
+        print(f"❌ Update refused: {e}")
+        sys.exit(1)
+
+    added, changed = ("Would add", "update") if args.dry_run else ("Added", "updated")
+    print(f"✅ {added} {report['added']} wines and {changed} {report['changed']} "
+          f"({report['rows']} in the catalogue, {report['seconds']:.1f}s).")
+    drift = report["drift"]
+    for reason in drift["reasons"]:
+        print(f"❌ Drift: {reason}")
+    if drift["refit_recommended"]:
+        print("❌ A full refit is recommended: run interface/main_local.py.")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if drift["refit_recommended"]:
+        sys.exit(REFIT_EXIT_CODE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Memory of the API process tree against the number of workers, for each way
+of starting it:
+
+- uvicorn-pickle: `uvicorn API.fast:app --workers N`, every worker unpickling
+  its own model (MODEL_MMAP=0, the previous behaviour)
+- uvicorn-mmap:   the same, with the model matrix memory-mapped (the default)
+- preload:        `python -m API.serve --workers N`, artefacts loaded once in
+  the master and shared with the forked workers
+
+Once the server answers, a few recommendation requests per worker touch the
+model and metadata, then RSS, PSS and USS are summed over the whole process
+tree (master included). RSS counts shared pages once per process, so its sum
+overstates the footprint; PSS splits shared pages between the processes that
+map them and its sum is the real memory used. Linux only (reads smaps).
+
+    python notebooks/memory_benchmark.py --workers 1 2 4 8 16 --output memory.json
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODES = {
+    "uvicorn-pickle": (["-m", "uvicorn", "API.fast:app", "--log-level", "warning"], {"MODEL_MMAP": "0"}),
+    "uvicorn-mmap": (["-m", "uvicorn", "API.fast:app", "--log-level", "warning"], {"MODEL_MMAP": "1"}),
+    "preload": (["-m", "API.serve", "--log-level", "warning"], {"MODEL_MMAP": "1"}),
+}
+REQUESTS_PER_WORKER = 8
+
+
+def start(mode, workers, port):
+    args, env = MODES[mode]
+    env = {**os.environ, **env, "LABEL_CACHE_PATH": ""}
+    command = [sys.executable, *args, "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url, process, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/check-model", timeout=2).json().get("model_loaded"):
+                return
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("server not ready")
+
+
+def touch(url, workers):
+    payload = {"wine_type": "Red", "grape_varieties": ["Malbec"], "body": "Full-bodied", "n_recommendations": 5}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(
+            lambda _: requests.post(f"{url}/recommend-wines", json=payload, timeout=60),
+            range(REQUESTS_PER_WORKER * workers),
+        ))
+
+
+def tree_memory(pid):
+    root = psutil.Process(pid)
+    totals = {"processes": 0, "rss_mb": 0.0, "pss_mb": 0.0, "uss_mb": 0.0}
+    for process in [root, *root.children(recursive=True)]:
+        try:
+            info = process.memory_full_info()
+        except psutil.NoSuchProcess:
+            continue
+        totals["processes"] += 1
+        totals["rss_mb"] += info.rss / 2 ** 20
+        totals["pss_mb"] += info.pss / 2 ** 20
+        totals["uss_mb"] += info.uss / 2 ** 20
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in totals.items()}
+
+
+def measure(mode, workers, port, timeout):
+    process = start(mode, workers, port)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url, process, timeout)
+        # uvicorn answers from the first worker up while the others still load
+        deadline = time.time() + timeout
+        while len(psutil.Process(process.pid).children(recursive=True)) < workers and time.time() < deadline:
+            time.sleep(0.5)
+        time.sleep(2)
+        touch(url, workers)
+        time.sleep(1)
+        return tree_memory(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API memory against worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<16}{'workers':>8}{'procs':>7}{'RSS sum MB':>12}{'PSS sum MB':>12}{'PSS/worker':>12}{'USS sum MB':>12}")
+    for workers in args.workers:
+        for mode in args.modes:
+            result = {"mode": mode, "workers": workers, **measure(mode, workers, args.port, args.timeout)}
+            results.append(result)
+            print(f"{mode:<16}{workers:>8}{result['processes']:>7}{result['rss_mb']:>12.1f}{result['pss_mb']:>12.1f}"
+                  f"{result['pss_mb'] / workers:>12.1f}{result['uss_mb']:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Per-label OCR latency of WineLabelOCR.extract_text_robust for several worker counts
+and search modes.
+
+Runs the same fixed corpus of label images (sorted, first --limit files) once per
+(mode, worker count) and prints mean / p50 / p95 seconds per label, the speedup
+over the first configuration, the mean number of OCR calls per label and, for the
+adaptive mode, how often its extracted fields agree with the exhaustive sweep.
+
+    python notebooks/ocr_benchmark.py raw_data/last/XWines_Slim_1K_labels --limit 20 --workers 1 2 4 8
+    python notebooks/ocr_benchmark.py labels/ --modes exhaustive adaptive --yield-stats ocr_yield.json
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from wine_label_extractor import WineLabelOCR
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+FIELDS = ["country", "wine_type", "abv", "grape_variety", "region"]
+
+
+def load_corpus(directory, limit):
+    files = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+    )
+    return files[:limit]
+
+
+def label_fields(ocr, result):
+    text = result.get("raw_text", "")
+    return {
+        "country": ocr.extract_country(text),
+        "wine_type": ocr.extract_wine_type(text),
+        "abv": ocr.extract_abv(text),
+        "grape_variety": ocr.extract_grape_variety(text),
+        "region": ocr.extract_region(text),
+    }
+
+
+def run_labels(ocr, corpus):
+    latencies, calls, fields = [], [], []
+    for path in corpus:
+        start = time.perf_counter()
+        result = ocr.extract_text_robust(path)
+        latencies.append(time.perf_counter() - start)
+        calls.append(result.get("ocr_calls", 0))
+        fields.append(label_fields(ocr, result))
+    return np.array(latencies), np.array(calls), fields
+
+
+def field_agreement(fields, reference):
+    matches = [a[field] == b[field] for a, b in zip(fields, reference) for field in FIELDS]
+    return float(np.mean(matches)) if matches else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WineLabelOCR latency vs worker count and search mode")
+    parser.add_argument("corpus", help="directory of label images")
+    parser.add_argument("--limit", type=int, default=20, help="number of labels (sorted by name)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", default=["exhaustive"], choices=["exhaustive", "adaptive"])
+    parser.add_argument("--target-confidence", type=float, default=40)
+    parser.add_argument("--yield-stats", default=None, help="pair-yield JSON file used and updated by adaptive runs")
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.limit)
+    if not corpus:
+        raise SystemExit(f"No label images found in {args.corpus}")
+    print(f"{len(corpus)} labels, {os.cpu_count()} CPUs")
+
+    results = []
+    reference = None
+    for mode in args.modes:
+        for workers in args.workers:
+            ocr = WineLabelOCR(max_workers=workers, mode=mode, target_confidence=args.target_confidence,
+                               yield_stats_path=args.yield_stats)
+            ocr.logger.setLevel("WARNING")
+            latencies, calls, fields = run_labels(ocr, corpus)
+            if mode == "exhaustive" and reference is None:
+                reference = fields
+            results.append({
+                "mode": mode,
+                "workers": workers,
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "ocr_calls": float(calls.mean()),
+                "agreement": field_agreement(fields, reference) if reference is not None else None,
+            })
+
+    baseline = results[0]["mean"]
+    print(f"{'mode':>10} {'workers':>7} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} {'speedup':>8} {'calls':>6} {'agree':>6}")
+    for row in results:
+        row["speedup"] = baseline / row["mean"]
+        agreement = f"{row['agreement']:.0%}" if row["agreement"] is not None else "-"
+        print(f"{row['mode']:>10} {row['workers']:>7} {row['mean']:>8.3f} {row['p50']:>8.3f} {row['p95']:>8.3f} "
+              f"{row['speedup']:>7.2f}x {row['ocr_calls']:>6.1f} {agreement:>6}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"labels": len(corpus), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Payload size and serialization time of recommendation responses: the previous
+path (DataFrame.to_dict(orient="records") returned as a dict, so FastAPI runs
+jsonable_encoder and the standard json encoder over every full metadata row)
+against API.responses (projected columns, NaN as null, orjson).
+
+Rows are random samples of the wine metadata with a Similarity column, the
+shape every recommendation endpoint returns.
+
+    python notebooks/response_benchmark.py --sizes 5 20 100 --repeats 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from API.responses import orjson, records, wines_response  # noqa: E402
+
+METADATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "raw_data", "wine_metadata.csv"))
+
+
+def previous_body(df):
+    # what FastAPI did with {"wines": df.to_dict(orient="records")}
+    return JSONResponse(jsonable_encoder({"wines": df.to_dict(orient="records")})).body
+
+
+def new_body(df):
+    return wines_response(df).body
+
+
+def time_per_call(function, frames):
+    start = time.perf_counter()
+    for df in frames:
+        function(df)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommendation response size and serialization time")
+    parser.add_argument("--metadata", default=METADATA_PATH)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    metadata = pd.read_csv(args.metadata)
+    rng = np.random.default_rng(0)
+    print(f"{len(metadata)} wines, {len(metadata.columns)} columns, encoder: {'orjson' if orjson else 'json'}")
+
+    results = []
+    for size in args.sizes:
+        frames = []
+        for _ in range(args.repeats):
+            df = metadata.iloc[rng.choice(len(metadata), size=size, replace=False)].copy()
+            df["Similarity"] = rng.random(size)
+            frames.append(df)
+
+        # the previous path rejects NaN (json allow_nan=False): count the responses it could not send
+        failures = 0
+        for df in frames:
+            try:
+                previous_body(df)
+            except ValueError:
+                failures += 1
+        sendable = [df for df in frames if not df.isna().any().any()] or [frames[0].fillna(0)]
+
+        results.append({
+            "rows": size,
+            "previous_bytes": len(previous_body(sendable[0])),
+            "new_bytes": len(new_body(sendable[0])),
+            "previous_ms": time_per_call(previous_body, sendable) * 1000,
+            "new_ms": time_per_call(new_body, frames) * 1000,
+            "records_ms": time_per_call(records, frames) * 1000,
+            "previous_nan_failures": failures / len(frames),
+        })
+
+    print(f"{'rows':>5} {'old bytes':>10} {'new bytes':>10} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'old NaN fail':>12}")
+    for row in results:
+        print(f"{row['rows']:>5} {row['previous_bytes']:>10} {row['new_bytes']:>10} {row['previous_ms']:>8.3f} "
+              f"{row['new_ms']:>8.3f} {row['previous_ms'] / row['new_ms']:>7.1f}x {row['previous_nan_failures']:>12.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"wines": len(metadata), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
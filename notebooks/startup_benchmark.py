@@ -0,0 +1,146 @@
+"""
+Cold-start profile of the API:
+
+- import profile: `python -X importtime -c "import API.fast"` in a fresh
+  interpreter, with the wall time of the import and the slowest top-level
+  imports by cumulative time
+- server timings: seconds from starting `uvicorn API.fast:app` to the first
+  HTTP answer of any kind (listening; what a liveness probe sees) and to the
+  first ready answer (/readyz 200, or /check-model reporting the model loaded
+  on trees without /readyz)
+- first requests: latency of the first request to each recommendation
+  endpoint once ready, what users hit right after a rollout (compare with
+  `--env API_WARMUP_ROUNDS=0`)
+
+    python notebooks/startup_benchmark.py --repeats 3 --output startup.json
+    python notebooks/startup_benchmark.py --env API_WARMUP_ROUNDS=0
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+FIRST_REQUESTS = [
+    ("recommend-wines", "POST", "/recommend-wines",
+     {"wine_type": "Red", "grape_varieties": ["Malbec"], "country": "Argentina", "n_recommendations": 5}),
+    ("recommend-by-food", "POST", "/recommend-by-food", {"food_pairing": "Beef", "n_recommendations": 5}),
+    ("recommend-by-food-exact", "POST", "/recommend-by-food",
+     {"food_pairing": "Lamb", "wine_type": "Red", "n_recommendations": 10, "exact_match_only": True}),
+]
+
+
+def import_profile(env):
+    # "import time: self_us | cumulative_us | <indent>module", children before parents
+    command = [sys.executable, "-X", "importtime", "-c",
+               "import time; t = time.perf_counter(); import API.fast; print(time.perf_counter() - t)"]
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    wall = float(result.stdout.strip().splitlines()[-1])
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(2)) / 1e6, len(match.group(3)))
+    return wall, modules
+
+
+def server_timings(env, port, timeout):
+    url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "API.fast:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    listening = ready = None
+    try:
+        while ready is None and time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                response = requests.get(f"{url}/readyz", timeout=2)
+            except requests.RequestException:
+                time.sleep(0.02)
+                continue
+            if listening is None:
+                listening = time.perf_counter() - started
+            if response.status_code == 200:
+                ready = time.perf_counter() - started
+            elif response.status_code == 404:  # no /readyz on this tree
+                if requests.get(f"{url}/check-model", timeout=2).json().get("model_loaded"):
+                    ready = time.perf_counter() - started
+            if ready is None:
+                time.sleep(0.02)
+        first = {}
+        if ready is not None:
+            for name, method, path, payload in FIRST_REQUESTS:
+                request_started = time.perf_counter()
+                requests.request(method, f"{url}{path}", json=payload, timeout=60)
+                first[name] = (time.perf_counter() - request_started) * 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return listening, ready, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API import profile and time to listen / to ready")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="slowest top-level imports to list")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="extra environment for the API")
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    env = {**os.environ, "LABEL_CACHE_PATH": "", **dict(item.split("=", 1) for item in args.env)}
+    # first run warms the OS file cache and the .pyc files
+    import_profile(env)
+
+    walls, profiles, timings = [], [], []
+    for _ in range(args.repeats):
+        wall, modules = import_profile(env)
+        walls.append(wall)
+        profiles.append(modules)
+        timings.append(server_timings(env, args.port, args.timeout))
+
+    # median over repeats of each module's cumulative time
+    names = set.intersection(*(set(profile) for profile in profiles))
+    cumulative = {name: sorted(profile[name][0] for profile in profiles)[len(profiles) // 2] for name in names}
+    # modules imported directly by API.fast, i.e. one level below it
+    depth = profiles[0]["API.fast"][1] + 2
+    direct = [name for name in names if profiles[0][name][1] == depth]
+    slowest = sorted(direct, key=lambda name: -cumulative[name])[:args.top]
+
+    median = lambda values: sorted(values)[len(values) // 2]  # noqa: E731
+    report = {
+        "import_api_fast_s": round(median(walls), 3),
+        "time_to_listen_s": round(median([timing[0] for timing in timings]), 3),
+        "time_to_ready_s": round(median([timing[1] for timing in timings]), 3),
+        "first_request_ms": {
+            name: round(median([timing[2][name] for timing in timings]), 1) for name, _, _, _ in FIRST_REQUESTS
+        },
+        "slowest_imports_s": {name: round(cumulative[name], 3) for name in slowest},
+    }
+
+    print(f"import API.fast   {report['import_api_fast_s']:.3f} s")
+    print(f"time to listen    {report['time_to_listen_s']:.3f} s")
+    print(f"time to ready     {report['time_to_ready_s']:.3f} s")
+    for name, ms in report["first_request_ms"].items():
+        print(f"first {name:<24}{ms:>8.1f} ms")
+    print("slowest imports of API.fast (cumulative):")
+    for name, seconds in report["slowest_imports_s"].items():
+        print(f"  {name:<40}{seconds:>8.3f} s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2062 +1,12 @@
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
-import cv2
-import numpy as np
-import re
+"""
+WineLabelOCR now lives in cv_functions/wine_label_ocr.py, where the API uses it
+as its local label-reading engine. This module keeps notebooks and
+ocr_benchmark.py working.
+"""
 import os
-import logging
-from typing import List, Dict, Tuple, Optional, Union
-from dataclasses import dataclass
-from collections import Counter
-import difflib
+import sys
 
-# Try to import EasyOCR for multi-engine approach
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except ImportError:
-    EASYOCR_AVAILABLE = False
-    print("EasyOCR not available. Install with: pip install easyocr")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Try to import spellchecker for text validation
-try:
-    from spellchecker import SpellChecker
-    SPELLCHECKER_AVAILABLE = True
-except ImportError:
-    SPELLCHECKER_AVAILABLE = False
-    print("PySpellChecker not available. Install with: pip install pyspellchecker")
-
-@dataclass
-class OCRResult:
-    """Structure to hold OCR results with metadata"""
-    text: str
-    confidence: float
-    method: str
-    bbox: Optional[List[int]] = None
-    lines: Optional[List[str]] = None
-    word_confidences: Optional[List[float]] = None
-
-class WineLabelOCR:
-    def __init__(self):
-        # Initialize logging
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger("WineLabelOCR")
-
-        # Initialize OCR engines
-        self.ocr_engines = {}
-
-        # Configure Tesseract OCR
-        self.ocr_configs = [
-            '--oem 3 --psm 11 -l eng',  # Sparse text
-            '--oem 3 --psm 4 -l eng',   # Assume a single column of text
-            '--oem 3 --psm 6 -l eng',   # Assume a single uniform block of text
-            '--oem 3 --psm 3 -l eng',   # Fully automatic page segmentation
-            '--oem 3 --psm 1 -l eng',   # Automatic page segmentation with OSD
-        ]
-        self.ocr_engines['tesseract'] = True
-
-        # Initialize EasyOCR if available
-        if EASYOCR_AVAILABLE:
-            try:
-                self.reader = easyocr.Reader(['en'])
-                self.ocr_engines['easyocr'] = True
-                self.logger.info("EasyOCR initialized successfully")
-            except Exception as e:
-                self.logger.warning(f"EasyOCR initialization failed: {e}")
-                self.ocr_engines['easyocr'] = False
-        else:
-            self.ocr_engines['easyocr'] = False
-
-        # Initialize spellchecker if available
-        if SPELLCHECKER_AVAILABLE:
-            self.spell = SpellChecker()
-            # Add wine-specific terms to the dictionary
-            wine_terms = ['chateau', 'vineyard', 'winery', 'vino', 'vina', 'viña',
-                         'cuvee', 'cuvée', 'vintage', 'reserve', 'reserva',
-                         'estate', 'grand', 'premier', 'cru', 'appellation']
-            for term in wine_terms:
-                self.spell.word_frequency.add(term)
-            self.logger.info("SpellChecker initialized with wine-specific terms")
-
-        # Enhanced wine types with port/sherry specific options
-        self.wine_types = {
-            'port': ['port', 'porto', 'tawny', 'ruby', 'vintage port', 'late bottled vintage', 'lbv'],
-            'red': ['red', 'rouge', 'tinto', 'rosso', 'rot'],
-            'white': ['white', 'blanc', 'blanco', 'bianco', 'weiss'],
-            'rosé': ['rosé', 'rose', 'rosado', 'rosato'],
-            'sparkling': ['sparkling', 'champagne', 'prosecco', 'cava', 'crémant', 'spumante'],
-            'dessert': ['dessert', 'sweet', 'sherry', 'madeira', 'sauternes', 'moscatel']
-        }
-
-        # Known port wine producers for exact matching
-        self.port_producers = {
-            'quarles harris': ['quarles harris', 'quarles', 'harris'],
-            'taylors': ['taylor', 'taylors', 'taylor fladgate'],
-            'grahams': ['graham', 'grahams'],
-            'dows': ['dow', 'dows'],
-            'cockburns': ['cockburn', 'cockburns'],
-            'warres': ['warre', 'warres'],
-            'fonseca': ['fonseca'],
-            'sandeman': ['sandeman'],
-            'offley': ['offley'],
-            'ferreira': ['ferreira'],
-            'kopke': ['kopke'],
-            'niepoort': ['niepoort'],
-            'quinta do noval': ['quinta do noval', 'noval'],
-            'croft': ['croft']
-        }
-
-        # Common port wine styles
-        self.port_styles = {
-            'tawny port': ['tawny port', 'tawny porto', 'porto tawny', 'old tawny'],
-            'ruby port': ['ruby port', 'ruby porto', 'porto ruby'],
-            'vintage port': ['vintage port', 'vintage porto'],
-            'late bottled vintage': ['late bottled vintage', 'lbv']
-        }
-
-        # Enhanced countries with common variations
-        self.countries = {
-            'portugal': ['portugal', 'portuguese', 'porto', 'douro', 'gaia', 'oporto'],
-            'spain': ['spain', 'spanish', 'españa', 'español', 'rioja', 'jerez'],
-            'france': ['france', 'french', 'français', 'bordeaux', 'burgundy', 'champagne', 'pomerol', 'saint-emilion', 'medoc', 'graves'],
-            'italy': ['italy', 'italian', 'italia', 'italiano', 'tuscany', 'toscana'],
-            'germany': ['germany', 'german', 'deutschland', 'deutsche', 'mosel', 'rheingau', 'pfalz', 'baden', 'württemberg'],
-            'austria': ['austria', 'austrian', 'österreich', 'wachau', 'kremstal'],
-            'greece': ['greece', 'greek', 'hellas', 'ellada', 'santorini', 'nemea', 'naoussa', 'makedonia', 'macedonia', 'crete', 'peloponnese'],
-            'usa': ['usa', 'united states', 'california', 'napa', 'sonoma', 'oregon', 'washington'],
-            'australia': ['australia', 'australian', 'barossa', 'hunter valley'],
-            'uk': ['england', 'britain', 'uk', 'united kingdom', 'british'],
-            'south africa': ['south africa', 'stellenbosch', 'western cape'],
-            'chile': ['chile', 'chilean', 'wine of chile', 'product of chile', 'central valley', 'maipo', 'colchagua', 'cachapoal', 'aconcagua', 'casablanca', 'maule'],
-            'new zealand': ['new zealand', 'nz', 'hawke\'s bay', 'hawkes bay', 'marlborough', 'central otago', 'canterbury', 'nelson', 'wairarapa', 'martinborough'],
-            'argentina': ['argentina', 'argentinian', 'wine of argentina', 'product of argentina', 'vino argentino', 'mendoza', 'salta', 'san juan', 'patagonia', 'rio negro', 'la rioja', 'catamarca', 'tucuman'],
-            'brazil': ['brazil', 'brazilian', 'brasil', 'wine of brazil', 'product of brazil', 'vinho brasileiro', 'serra gaucha', 'vale dos vinhedos', 'campanha', 'planalto catarinense', 'campos de cima da serra']
-        }
-
-        # New Zealand wine regions
-        self.nz_regions = {
-            'hawkes bay': ['hawke\'s bay', 'hawkes bay', 'hawke bay'],
-            'marlborough': ['marlborough'],
-            'central otago': ['central otago'],
-            'canterbury': ['canterbury'],
-            'nelson': ['nelson'],
-            'wairarapa': ['wairarapa'],
-            'martinborough': ['martinborough']
-        }
-
-        # New Zealand producers
-        self.nz_producers = {
-            'te awanga estate': ['te awanga', 'te awanga estate'],
-            'cloudy bay': ['cloudy bay'],
-            'villa maria': ['villa maria'],
-            'oyster bay': ['oyster bay'],
-            'whitehaven': ['whitehaven'],
-            'jackson estate': ['jackson estate'],
-            'stoneleigh': ['stoneleigh']
-        }
-
-        # German wine regions and classifications
-        self.german_regions = {
-            'mosel': ['mosel', 'mosel-saar-ruwer', 'bernkastel', 'piesport', 'wehlen', 'urzig'],
-            'rheingau': ['rheingau', 'johannisberg', 'rüdesheim', 'geisenheim', 'hattenheim'],
-            'pfalz': ['pfalz', 'palatinate', 'deidesheim', 'forst', 'wachenheim'],
-            'rheinhessen': ['rheinhessen', 'nierstein', 'nackenheim', 'oppenheim'],
-            'baden': ['baden', 'kaiserstuhl', 'markgräflerland'],
-            'württemberg': ['württemberg', 'wurttemberg'],
-            'nahe': ['nahe', 'schlossböckelheim', 'niederhausen'],
-            'ahr': ['ahr'],
-            'mittelrhein': ['mittelrhein'],
-            'saale-unstrut': ['saale-unstrut'],
-            'sachsen': ['sachsen', 'dresden', 'meissen']
-        }
-
-        # German wine classifications
-        self.german_classifications = {
-            'gg': ['gg', 'grosses gewächs', 'grosse lage'],
-            'erste lage': ['erste lage', '1. lage'],
-            'kabinett': ['kabinett'],
-            'spätlese': ['spätlese', 'spatlese'],
-            'auslese': ['auslese'],
-            'beerenauslese': ['beerenauslese', 'ba'],
-            'trockenbeerenauslese': ['trockenbeerenauslese', 'tba'],
-            'eiswein': ['eiswein', 'ice wine']
-        }
-
-        # Known German wine producers
-        self.german_producers = {
-            'wittmann': ['wittmann', 'weingut wittmann'],
-            'diel': ['diel', 'schlossgut diel'],
-            'dr loosen': ['dr loosen', 'loosen'],
-            'jj prum': ['jj prum', 'j.j. prum', 'prum'],
-            'egon muller': ['egon muller', 'egon müller'],
-            'keller': ['keller'],
-            'donnhoff': ['donnhoff', 'dönnhoff'],
-            'trimbach': ['trimbach'],
-            'robert weil': ['robert weil', 'weil'],
-            'schloss johannisberg': ['schloss johannisberg', 'johannisberg'],
-            'georg breuer': ['georg breuer', 'breuer'],
-            'von winning': ['von winning'],
-            'maximin grunhaus': ['maximin grunhaus', 'grunhaus'],
-            'zilliken': ['zilliken', 'forstmeister geltz zilliken'],
-            'selbach-oster': ['selbach-oster', 'selbach oster', 'selbach'],
-            'fritz haag': ['fritz haag', 'haag'],
-            'emrich-schönleber': ['emrich-schönleber', 'emrich schönleber', 'schönleber'],
-            'dönnhoff': ['dönnhoff', 'donnhoff'],
-            'schäfer-fröhlich': ['schäfer-fröhlich', 'schafer-frohlich'],
-            'künstler': ['künstler', 'kunstler'],
-            'knebel': ['knebel']
-        }
-
-        # Spanish wine regions and classifications
-        self.spanish_regions = {
-            'rioja': ['rioja', 'la rioja'],
-            'ribera del duero': ['ribera del duero', 'ribera duero'],
-            'priorat': ['priorat', 'priorato'],
-            'rias baixas': ['rías baixas', 'rias baixas'],
-            'jumilla': ['jumilla'],
-            'toro': ['toro'],
-            'bierzo': ['bierzo'],
-            'jerez': ['jerez', 'sherry'],
-            'cava': ['cava'],
-            'penedes': ['penedès', 'penedes']
-        }
-
-        self.spanish_classifications = {
-            'do': ['d.o.', 'do', 'denominación de origen'],
-            'doca': ['d.o.ca.', 'doca', 'denominación de origen calificada'],
-            'crianza': ['crianza'],
-            'reserva': ['reserva'],
-            'gran reserva': ['gran reserva']
-        }
-
-        self.spanish_producers = {
-            'vega sicilia': ['vega sicilia', 'vega-sicilia'],
-            'marqués de riscal': ['marqués de riscal', 'marques de riscal'],
-            'torres': ['torres'],
-            'cune': ['cune', 'cvne'],
-            'la rioja alta': ['la rioja alta'],
-            'pingus': ['pingus'],
-            'alvaro palacios': ['alvaro palacios']
-        }
-
-        # Italian wine regions and classifications
-        self.italian_regions = {
-            'tuscany': ['toscana', 'tuscany', 'chianti', 'brunello di montalcino', 'vino nobile di montepulciano'],
-            'piedmont': ['piemonte', 'piedmont', 'barolo', 'barbaresco', 'barbera d\'alba'],
-            'veneto': ['veneto', 'amarone', 'valpolicella', 'soave', 'prosecco'],
-            'sicily': ['sicilia', 'sicily', 'etna'],
-            'umbria': ['umbria'],
-            'marche': ['marche'],
-            'abruzzo': ['abruzzo'],
-            'campania': ['campania'],
-            'emilia-romagna': ['emilia-romagna', 'lambrusco']
-        }
-
-        self.italian_classifications = {
-            'docg': ['d.o.c.g.', 'docg', 'denominazione di origine controllata e garantita'],
-            'doc': ['d.o.c.', 'doc', 'denominazione di origine controllata'],
-            'igt': ['i.g.t.', 'igt', 'indicazione geografica tipica'],
-            'riserva': ['riserva'],
-            'superiore': ['superiore']
-        }
-
-        self.italian_producers = {
-            'antinori': ['antinori', 'marchesi antinori'],
-            'gaja': ['gaja'],
-            'ornellaia': ['ornellaia'],
-            'sassicaia': ['sassicaia'],
-            'frescobaldi': ['frescobaldi'],
-            'allegrini': ['allegrini'],
-            'zonin': ['zonin']
-        }
-
-        # Australian wine regions
-        self.australian_regions = {
-            'barossa valley': ['barossa valley', 'barossa'],
-            'hunter valley': ['hunter valley', 'hunter'],
-            'mclaren vale': ['mclaren vale', 'mclaren'],
-            'yarra valley': ['yarra valley', 'yarra'],
-            'margaret river': ['margaret river'],
-            'adelaide hills': ['adelaide hills'],
-            'coonawarra': ['coonawarra'],
-            'clare valley': ['clare valley'],
-            'eden valley': ['eden valley'],
-            'rutherglen': ['rutherglen']
-        }
-
-        self.australian_producers = {
-            'penfolds': ['penfolds', 'penfold'],
-            'wolf blass': ['wolf blass'],
-            'jacob\'s creek': ['jacob\'s creek', 'jacobs creek'],
-            'yellowtail': ['yellow tail', 'yellowtail'],
-            'wynns': ['wynns', 'wynn'],
-            'henschke': ['henschke'],
-            'torbreck': ['torbreck']
-        }
-
-        # Chilean wine regions and producers
-        self.chilean_regions = {
-            'central valley': ['central valley', 'valle central'],
-            'maipo valley': ['maipo valley', 'valle del maipo', 'maipo'],
-            'colchagua valley': ['colchagua valley', 'valle de colchagua', 'colchagua'],
-            'casablanca valley': ['casablanca valley', 'valle de casablanca', 'casablanca'],
-            'maule valley': ['maule valley', 'valle del maule', 'maule'],
-            'cachapoal valley': ['cachapoal valley', 'valle del cachapoal', 'cachapoal'],
-            'aconcagua valley': ['aconcagua valley', 'valle de aconcagua', 'aconcagua'],
-            'limari valley': ['limarí valley', 'valle del limarí', 'limari'],
-            'rapel valley': ['rapel valley', 'valle del rapel', 'rapel']
-        }
-
-        self.chilean_producers = {
-            'concha y toro': ['concha y toro', 'concha', 'toro'],
-            'santa rita': ['santa rita'],
-            'montes': ['montes'],
-            'casa lapostolle': ['casa lapostolle', 'lapostolle'],
-            'viña san pedro': ['viña san pedro', 'san pedro'],
-            'viña errazuriz': ['viña errazuriz', 'errazuriz'],
-            'viña urmeneta': ['viña urmeneta', 'urmeneta'],
-            'miguel torres chile': ['miguel torres', 'torres chile'],
-            'viña leyda': ['viña leyda', 'leyda'],
-            'viña ventisquero': ['viña ventisquero', 'ventisquero']
-        }
-
-        # Argentinian wine regions and producers
-        self.argentinian_regions = {
-            'mendoza': ['mendoza', 'provincia de mendoza', 'mendoza province'],
-            'maipu': ['maipú', 'maipu'],
-            'lujan de cuyo': ['luján de cuyo', 'lujan de cuyo'],
-            'valle de uco': ['valle de uco', 'uco valley'],
-            'tupungato': ['tupungato'],
-            'agrelo': ['agrelo'],
-            'perdriel': ['perdriel'],
-            'vistalba': ['vistalba'],
-            'gualtallary': ['gualtallary'],
-            'altamira': ['altamira'],
-            'salta': ['salta', 'provincia de salta', 'salta province'],
-            'cafayate': ['cafayate', 'valles calchaquíes', 'valles calchaquies'],
-            'molinos': ['molinos'],
-            'san juan': ['san juan', 'provincia de san juan', 'san juan province'],
-            'tulum valley': ['tulum valley', 'valle de tulum'],
-            'ullum valley': ['ullum valley', 'valle de ullum'],
-            'pedernal valley': ['pedernal valley', 'valle del pedernal'],
-            'patagonia': ['patagonia', 'patagonia argentina'],
-            'rio negro': ['río negro', 'rio negro', 'provincia de rio negro'],
-            'neuquen': ['neuquén', 'neuquen', 'provincia de neuquen'],
-            'la rioja': ['la rioja', 'provincia de la rioja', 'la rioja argentina'],
-            'famatina valley': ['famatina valley', 'valle de famatina'],
-            'catamarca': ['catamarca', 'provincia de catamarca'],
-            'tinogasta': ['tinogasta'],
-            'fiambala': ['fiambalá', 'fiambala']
-        }
-
-        self.argentinian_producers = {
-            'catena zapata': ['catena zapata', 'catena', 'zapata'],
-            'luigi bosca': ['luigi bosca', 'bosca'],
-            'trapiche': ['trapiche'],
-            'norton': ['norton', 'bodega norton'],
-            'alamos': ['alamos', 'alamos ridge'],
-            'rutini wines': ['rutini', 'rutini wines'],
-            'mendel': ['mendel', 'mendel wines'],
-            'achaval ferrer': ['achaval ferrer', 'achaval-ferrer'],
-            'susana balbo': ['susana balbo', 'crios'],
-            'zuccardi': ['zuccardi', 'familia zuccardi'],
-            'trivento': ['trivento', 'bodega trivento', 'trivento bodegas'],
-            'el esteco': ['el esteco', 'esteco'],
-            'michel torino': ['michel torino', 'torino'],
-            'domingo molina': ['domingo molina', 'molina'],
-            'finca el retiro': ['finca el retiro', 'el retiro'],
-            'pascual toso': ['pascual toso', 'toso'],
-            'terrazas de los andes': ['terrazas de los andes', 'terrazas'],
-            'salentein': ['salentein', 'bodegas salentein'],
-            'alta vista': ['alta vista'],
-            'kaiken': ['kaiken'],
-            'trivento': ['trivento'],
-            'finca flichman': ['finca flichman', 'flichman'],
-            'dona paula': ['doña paula', 'dona paula'],
-            'argento': ['argento'],
-            'tilia': ['tilia'],
-            'nieto senetiner': ['nieto senetiner', 'senetiner']
-        }
-
-        # Brazilian wine regions and producers
-        self.brazilian_regions = {
-            'serra gaucha': ['serra gaúcha', 'serra gaucha', 'região da serra gaúcha'],
-            'vale dos vinhedos': ['vale dos vinhedos', 'vinhedos valley'],
-            'bento goncalves': ['bento gonçalves', 'bento goncalves'],
-            'garibaldi': ['garibaldi'],
-            'caxias do sul': ['caxias do sul'],
-            'flores da cunha': ['flores da cunha'],
-            'farroupilha': ['farroupilha'],
-            'monte belo do sul': ['monte belo do sul'],
-            'pinto bandeira': ['pinto bandeira'],
-            'altos montes': ['altos montes'],
-            'campanha': ['campanha', 'região da campanha', 'campanha gaucha', 'campanha gaúcha'],
-            'santana do livramento': ['santana do livramento'],
-            'dom pedrito': ['dom pedrito'],
-            'bagé': ['bagé', 'bage'],
-            'candiota': ['candiota'],
-            'aceguá': ['aceguá', 'acegua'],
-            'planalto catarinense': ['planalto catarinense', 'santa catarina highlands'],
-            'sao joaquim': ['são joaquim', 'sao joaquim'],
-            'campos novos': ['campos novos'],
-            'agua doce': ['água doce', 'agua doce'],
-            'campos de cima da serra': ['campos de cima da serra', 'cima da serra'],
-            'vacaria': ['vacaria'],
-            'bom jesus': ['bom jesus'],
-            'vale do sao francisco': ['vale do são francisco', 'vale do sao francisco', 'são francisco valley'],
-            'petrolina': ['petrolina'],
-            'juazeiro': ['juazeiro'],
-            'lagoa grande': ['lagoa grande'],
-            'casa nova': ['casa nova']
-        }
-
-        self.brazilian_producers = {
-            'miolo': ['miolo', 'vinícola miolo', 'vinicola miolo'],
-            'aurora': ['aurora', 'cooperativa aurora'],
-            'salton': ['salton', 'vinícola salton'],
-            'casa valduga': ['casa valduga', 'valduga'],
-            'dal pizzol': ['dal pizzol'],
-            'don laurindo': ['don laurindo', 'don laurindo vinícola'],
-            'vinícola garibaldi': ['vinícola garibaldi', 'garibaldi', 'cooperativa garibaldi'],
-            'casa perini': ['casa perini', 'perini'],
-            'pizzato': ['pizzato', 'vinícola pizzato'],
-            'geisse': ['geisse', 'cave geisse'],
-            'lidio carraro': ['lidio carraro', 'lídio carraro'],
-            'brazilian wine company': ['brazilian wine company', 'bwc'],
-            'cordilheira de santana': ['cordilheira de santana'],
-            'villa francioni': ['villa francioni'],
-            'quinta do morgado': ['quinta do morgado'],
-            'vinícula peterlongo': ['vinícola peterlongo', 'peterlongo'],
-            'chandon brasil': ['chandon brasil', 'chandon'],
-            'armando peterlongo': ['armando peterlongo'],
-            'georges aubert': ['georges aubert'],
-            'almadén': ['almadén', 'almaden'],
-            'dreher': ['dreher'],
-            'gran legado': ['gran legado'],
-            'vincola rio sol': ['vinícola rio sol', 'rio sol']
-        }
-
-        # Argentinian wine classifications and terms
-        self.argentinian_classifications = {
-            'doc': ['d.o.c.', 'doc', 'denominación de origen controlada'],
-            'ig': ['i.g.', 'ig', 'indicación geográfica'],
-            'ip': ['i.p.', 'ip', 'indicación de procedencia'],
-            'reserva': ['reserva'],
-            'gran reserva': ['gran reserva'],
-            'single vineyard': ['single vineyard', 'viñedo único'],
-            'old vines': ['old vines', 'viejas cepas', 'viñas viejas'],
-            'estate': ['estate', 'finca'],
-            'high altitude': ['high altitude', 'gran altura', 'altura']
-        }
-
-        # Brazilian wine classifications and terms
-        self.brazilian_classifications = {
-            'fino': ['fino', 'vinho fino'],
-            'de mesa': ['de mesa', 'vinho de mesa'],
-            'colonial': ['colonial', 'vinho colonial'],
-            'reserva': ['reserva'],
-            'premium': ['premium'],
-            'super premium': ['super premium'],
-            'espumante': ['espumante', 'vinho espumante'],
-            'licoroso': ['licoroso', 'vinho licoroso'],
-            'composto': ['composto', 'vinho composto']
-        }
-
-        # Greek wine regions
-        self.greek_regions = {
-            'santorini': ['santorini', 'thira'],
-            'nemea': ['nemea'],
-            'naoussa': ['naoussa', 'naousa'],
-            'mantinia': ['mantinia'],
-            'paros': ['paros'],
-            'cephalonia': ['cephalonia', 'kefalonia'],
-            'patras': ['patras'],
-            'rapsani': ['rapsani'],
-            'sitia': ['sitia'],
-            'lemnos': ['lemnos', 'limnos'],
-            'rhodes': ['rhodes', 'rodos'],
-            'crete': ['crete', 'kriti'],
-            'macedonia': ['macedonia', 'makedonia'],
-            'peloponnese': ['peloponnese', 'peloponisos'],
-            'attica': ['attica', 'attiki'],
-            'thessaly': ['thessaly', 'thessalia']
-        }
-
-        # Greek wine producers
-        self.greek_producers = {
-            'ktima karipidis': ['ktima karipidis', 'karipidis'],
-            'alpha estate': ['alpha estate', 'alpha'],
-            'domaine gerovassiliou': ['domaine gerovassiliou', 'gerovassiliou'],
-            'boutari': ['boutari'],
-            'kir-yianni': ['kir-yianni', 'kir yianni'],
-            'tsantali': ['tsantali'],
-            'estate argyros': ['estate argyros', 'argyros'],
-            'domaine sigalas': ['domaine sigalas', 'sigalas'],
-            'gaia wines': ['gaia wines', 'gaia'],
-            'domaine costa lazaridi': ['domaine costa lazaridi', 'costa lazaridi'],
-            'château carras': ['château carras', 'carras'],
-            'domaine mercouri': ['domaine mercouri', 'mercouri'],
-            'skouras': ['skouras'],
-            'tetramythos': ['tetramythos'],
-            'lyrarakis': ['lyrarakis']
-        }
-
-        # American wine regions (focus on major AVAs)
-        self.american_regions = {
-            'napa valley': ['napa valley', 'napa'],
-            'sonoma': ['sonoma county', 'sonoma', 'russian river valley', 'alexander valley'],
-            'oregon': ['willamette valley', 'oregon', 'yamhill-carlton'],
-            'washington': ['washington state', 'columbia valley', 'walla walla'],
-            'california': ['paso robles', 'santa barbara', 'central coast', 'monterey', 'lodi'],
-            'new york': ['finger lakes', 'long island']
-        }
-
-        self.american_producers = {
-            'robert mondavi': ['robert mondavi', 'mondavi'],
-            'opus one': ['opus one'],
-            'screaming eagle': ['screaming eagle'],
-            'caymus': ['caymus'],
-            'silver oak': ['silver oak'],
-            'kendall-jackson': ['kendall-jackson', 'kendall jackson'],
-            'beringer': ['beringer'],
-            'chateau ste michelle': ['chateau ste michelle', 'ste michelle'],
-            'bogle vineyards': ['bogle vineyards', 'bogle']
-        }
-
-        # French wine regions and appellations
-        self.french_regions = {
-            'bordeaux': ['bordeaux', 'pomerol', 'saint-emilion', 'saint-julien', 'pauillac', 'margaux', 'saint-estephe', 'graves', 'pessac-leognan', 'medoc', 'haut-medoc'],
-            'burgundy': ['burgundy', 'bourgogne', 'chablis', 'cote de nuits', 'cote de beaune', 'gevrey-chambertin', 'nuits-saint-georges', 'meursault', 'puligny-montrachet', 'chassagne-montrachet', 'volnay', 'pommard', 'beaune', 'santenay', 'mercurey', 'rully', 'pouilly-fuisse', 'macon', 'chablis premier cru', 'chablis grand cru'],
-            'rhone': ['cotes du rhone', 'chateauneuf-du-pape', 'hermitage', 'cote rotie', 'condrieu'],
-            'loire': ['sancerre', 'pouilly-fume', 'muscadet', 'anjou', 'chinon', 'bourgueil'],
-            'alsace': ['alsace', 'riesling', 'gewurztraminer'],
-            'champagne': ['champagne', 'reims', 'epernay']
-        }
-
-        # French wine classifications and appellations
-        self.french_appellations = {
-            'aoc': ['a.o.c.', 'aoc', 'appellation d\'origine contrôlée', 'appellation contrôlée'],
-            'premier_cru': ['1er cru', 'premier cru', '1ᵉʳ cru'],
-            'grand_cru': ['grand cru'],
-            'village': ['villages']
-        }
-
-        # Burgundy specific appellations and vineyards
-        self.burgundy_appellations = {
-            'meursault': ['meursault', 'meursault 1er cru', 'meursault premier cru'],
-            'puligny-montrachet': ['puligny-montrachet', 'puligny montrachet'],
-            'chassagne-montrachet': ['chassagne-montrachet', 'chassagne montrachet'],
-            'chablis': ['chablis', 'chablis premier cru', 'chablis grand cru', 'chablis 1er cru'],
-            'gevrey-chambertin': ['gevrey-chambertin', 'gevrey chambertin'],
-            'nuits-saint-georges': ['nuits-saint-georges', 'nuits saint georges'],
-            'volnay': ['volnay'],
-            'pommard': ['pommard'],
-            'beaune': ['beaune', 'beaune 1er cru', 'beaune premier cru']
-        }
-
-        # Common French vineyard plot names (climats)
-        self.french_vineyard_plots = [
-            'la pièce sous le bois', 'les perrières', 'les charmes', 'les genevrières',
-            'les santenots', 'clos de vougeot', 'chambertin', 'montrachet', 'corton',
-            'clos de tart', 'clos des lambrays', 'clos saint-denis'
-        ]
-
-        # Château patterns for French wines
-        self.chateau_patterns = [
-            r'ch[âa]teau\s+([a-zA-Z\s\-\.\']+)',
-            r'château\s+([a-zA-Z\s\-\.\']+)',
-            r'chateau\s+([a-zA-Z\s\-\.\']+)'
-        ]
-
-        # Grape variety patterns for better detection
-        self.grape_variety_patterns = [
-            r'old\s+vine\s+blend',
-            r'heritage\s+blend',
-            r'estate\s+blend',
-            r'red\s+blend',
-            r'white\s+blend',
-            r'proprietary\s+blend',
-            r'bordeaux\s+blend',
-            r'rhone\s+blend',
-            r'field\s+blend'
-        ]
-
-        # ABV patterns
-        self.abv_patterns = [
-            r'(\d+\.?\d*)\s*%\s*(?:alc\.?|vol\.?|alcohol|abv)',
-            r'(?:alc\.?|vol\.?|alcohol|abv)\s*:?\s*(\d+\.?\d*)\s*%',
-            r'(\d+\.?\d*)\s*%\s*(?:by\s+)?(?:vol\.?|volume)',
-            r'(\d+\.?\d*)\s*%'
-        ]
-
-        # Region identifiers for port
-        self.port_regions = ['porto', 'douro', 'douro valley', 'vila nova de gaia']
-
-    def analyze_image(self, image_path):
-        """
-        Analyze the image to determine its characteristics for adaptive preprocessing
-        """
-        # Load the original image
-        original = cv2.imread(image_path)
-        if original is None:
-            raise ValueError(f"Could not load image: {image_path}")
-
-        # Get dimensions
-        height, width = original.shape[:2]
-
-        # Convert to grayscale for analysis
-        gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
-
-        # Analyze basic image properties
-        avg_brightness = np.mean(gray)
-        brightness_std = np.std(gray)
-        contrast = brightness_std / (avg_brightness + 1e-6)  # Avoid division by zero
-
-        # Analyze edges for text detection
-        edges = cv2.Canny(gray, 100, 200)
-        edge_density = np.sum(edges > 0) / (height * width)
-
-        # Check for histogram properties
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        hist_normalized = hist / hist.sum()
-        dark_pixels = np.sum(hist_normalized[:50])
-        light_pixels = np.sum(hist_normalized[200:])
-
-        # Detect if image has dark text on light background or vice versa
-        has_dark_background = dark_pixels > light_pixels
-
-        # Measure blur
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-        is_blurry = laplacian_var < 100
-
-        # Return image characteristics
-        return {
-            'width': width,
-            'height': height,
-            'avg_brightness': avg_brightness,
-            'contrast': contrast,
-            'edge_density': edge_density,
-            'has_dark_background': has_dark_background,
-            'is_blurry': is_blurry,
-            'dark_pixel_ratio': dark_pixels,
-            'light_pixel_ratio': light_pixels,
-            'gray': gray,
-            'original': original
-        }
-
-    def preprocess_image_multiple_ways(self, image_path):
-        """
-        Create multiple preprocessed versions of the image optimized for wine labels
-        with adaptive preprocessing based on image analysis
-        """
-        # Analyze the image first
-        analysis = self.analyze_image(image_path)
-        self.logger.info(f"Image analysis: brightness={analysis['avg_brightness']:.1f}, "
-                       f"contrast={analysis['contrast']:.3f}, "
-                       f"edge_density={analysis['edge_density']:.3f}, "
-                       f"dark_background={analysis['has_dark_background']}")
-
-        # Get original images
-        original = analysis['original']
-        gray = analysis['gray']
-
-        # Convert to RGB for PIL
-        rgb_image = cv2.cvtColor(original, cv2.COLOR_BGR2RGB)
-        pil_original = Image.fromarray(rgb_image)
-
-        # Initialize preprocessed images list
-        preprocessed_images = []
-
-        # Always include original
-        preprocessed_images.append(pil_original)
-
-        # Adapt preprocessing based on image characteristics
-
-        # 1. Adjust contrast enhancement based on existing contrast
-        contrast_factor = 2.2 if analysis['contrast'] < 0.3 else 1.5
-        contrast_enhancer = ImageEnhance.Contrast(pil_original)
-        contrast_enhanced = contrast_enhancer.enhance(contrast_factor)
-        preprocessed_images.append(contrast_enhanced)
-
-        # 2. Apply stronger sharpening to blurry images
-        sharpness_factor = 3.0 if analysis['is_blurry'] else 1.8
-        sharpness_enhancer = ImageEnhance.Sharpness(pil_original)
-        sharpness_enhanced = sharpness_enhancer.enhance(sharpness_factor)
-        preprocessed_images.append(sharpness_enhanced)
-
-        # 3. Apply combined enhancement
-        contrast_sharpness = ImageEnhance.Sharpness(contrast_enhanced)
-        fully_enhanced = contrast_sharpness.enhance(sharpness_factor)
-        preprocessed_images.append(fully_enhanced)
-
-        # 4. Adjust brightness if too dark or too bright
-        if analysis['avg_brightness'] < 80:  # Too dark
-            brightness_enhancer = ImageEnhance.Brightness(pil_original)
-            brightened = brightness_enhancer.enhance(1.7)
-            preprocessed_images.append(brightened)
-        elif analysis['avg_brightness'] > 200:  # Too bright
-            brightness_enhancer = ImageEnhance.Brightness(pil_original)
-            darkened = brightness_enhancer.enhance(0.7)
-            preprocessed_images.append(darkened)
-
-        # 5. Adjust thresholding block size based on image size
-        block_size = max(7, min(height // 100 * 2 + 1, 21))
-        block_size += 0 if block_size % 2 == 1 else 1  # Ensure odd number
-
-        # 6. Adaptive thresholding - adjust parameters based on contrast
-        c_param = 5 if analysis['contrast'] > 0.2 else 2
-        adaptive_thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, block_size, c_param
-        )
-        preprocessed_images.append(Image.fromarray(adaptive_thresh))
-
-        # 7. Invert thresholding for dark backgrounds
-        if analysis['has_dark_background']:
-            inverted_thresh = cv2.adaptiveThreshold(
-                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV, block_size, c_param
-            )
-            preprocessed_images.append(Image.fromarray(inverted_thresh))
-
-        # 8. Otsu's thresholding
-        _, otsu_thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        preprocessed_images.append(Image.fromarray(otsu_thresh))
-
-        # 9. CLAHE with adaptively set parameters
-        clip_limit = 3.0 if analysis['contrast'] < 0.2 else 2.0
-        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8))
-        clahe_applied = clahe.apply(gray)
-        preprocessed_images.append(Image.fromarray(clahe_applied))
-
-        # 10. Always include inverted version for dark backgrounds/white text
-        inverted = cv2.bitwise_not(gray)
-        preprocessed_images.append(Image.fromarray(inverted))
-
-        # 11. Morphological operations - adapt kernel size to image dimensions
-        kernel_size = max(2, min(3, width // 500))
-        kernel = np.ones((kernel_size, kernel_size), np.uint8)
-
-        # Dilated - helpful for connecting broken text
-        dilated = cv2.dilate(gray, kernel, iterations=1)
-        preprocessed_images.append(Image.fromarray(dilated))
-
-        # 12. Eroded - helpful for removing small noise
-        eroded = cv2.erode(gray, kernel, iterations=1)
-        preprocessed_images.append(Image.fromarray(eroded))
-
-        # 13. Edge enhancement for low contrast images
-        if analysis['contrast'] < 0.2:
-            edges = cv2.Canny(gray, 50, 150)
-            edge_enhanced = cv2.addWeighted(gray, 0.8, edges, 0.2, 0)
-            preprocessed_images.append(Image.fromarray(edge_enhanced))
-
-        # Scale all images for better OCR if needed
-        height, width = analysis['height'], analysis['width']
-        scaled_images = []
-        for img in preprocessed_images:
-            # Scale up small images for better OCR
-            if img.width < 1000 or img.height < 1000:
-                scale_factor = max(1000/img.width, 1000/img.height)
-                new_size = (int(img.width * scale_factor), int(img.height * scale_factor))
-                img = img.resize(new_size, Image.LANCZOS)
-            scaled_images.append(img)
-
-        return scaled_images
-
-    def extract_text_robust(self, image_path):
-        """
-        Extract text using multiple OCR engines and preprocessing methods
-        """
-        try:
-            preprocessed_images = self.preprocess_image_multiple_ways(image_path)
-            all_results = []
-
-            # 1. Process with Tesseract OCR
-            if self.ocr_engines['tesseract']:
-                self.logger.info("Processing with Tesseract OCR...")
-                for i, img in enumerate(preprocessed_images):
-                    for j, config in enumerate(self.ocr_configs):
-                        try:
-                            text = pytesseract.image_to_string(img, config=config)
-                            if text and text.strip():
-                                confidence = self.calculate_text_confidence(text)
-                                all_results.append({
-                                    'text': text,
-                                    'confidence': confidence,
-                                    'method': f"tesseract_preprocess_{i}_config_{j}",
-                                    'engine': 'tesseract',
-                                    'lines': [line.strip() for line in text.split('\n') if line.strip()]
-                                })
-                        except Exception as e:
-                            self.logger.warning(f"Tesseract error with config {j} on image {i}: {e}")
-                            continue
-
-            # 2. Process with EasyOCR if available
-            if self.ocr_engines.get('easyocr', False):
-                self.logger.info("Processing with EasyOCR...")
-                try:
-                    # Use original image and a few key preprocessed versions
-                    for i, img in enumerate([0, 1, 3, 7]):  # Original, contrast enhanced, fully enhanced, inverted
-                        if i < len(preprocessed_images):
-                            # Convert PIL image to numpy array for EasyOCR
-                            img_array = np.array(preprocessed_images[i])
-
-                            # Run EasyOCR detection
-                            easy_result = self.reader.readtext(img_array)
-
-                            if easy_result:
-                                # Combine all detected text
-                                full_text = '\n'.join([item[1] for item in easy_result])
-
-                                # Calculate confidence
-                                avg_confidence = sum([item[2] for item in easy_result]) / len(easy_result)
-                                text_confidence = max(self.calculate_text_confidence(full_text), avg_confidence * 100)
-
-                                lines = [item[1] for item in easy_result if len(item[1].strip()) > 0]
-
-                                all_results.append({
-                                    'text': full_text,
-                                    'confidence': text_confidence,
-                                    'method': f"easyocr_preprocess_{i}",
-                                    'engine': 'easyocr',
-                                    'lines': lines,
-                                    'word_confidences': [item[2] for item in easy_result]
-                                })
-                except Exception as e:
-                    self.logger.warning(f"EasyOCR processing error: {e}")
-
-            if not all_results:
-                return {'raw_text': '', 'cleaned_lines': [], 'success': False, 'error': 'No text extracted from any OCR engine'}
-
-            # Apply spell checking to improve text quality if available
-            if SPELLCHECKER_AVAILABLE:
-                all_results = self._apply_spell_checking(all_results)
-
-            # Sort by confidence and get the best result
-            all_results.sort(key=lambda x: x['confidence'], reverse=True)
-            best_result = all_results[0]
-
-            # Combine results from multiple methods for more comprehensive extraction
-            combined_lines = []
-            seen_lines = set()
-
-            # Use top results from each engine
-            for engine in ['tesseract', 'easyocr']:
-                engine_results = [r for r in all_results if r.get('engine') == engine]
-                for result in engine_results[:2]:  # Use top 2 results from each engine
-                    for line in result.get('lines', []):
-                        normalized_line = re.sub(r'\s+', ' ', line.lower()).strip()
-                        if normalized_line and normalized_line not in seen_lines and len(normalized_line) > 2:
-                            combined_lines.append(line)
-                            seen_lines.add(normalized_line)
-
-            # Concatenate all raw text for better pattern matching
-            # Prioritize higher confidence results
-            combined_raw_text = '\n'.join([result['text'] for result in all_results[:5]])
-
-            # Log success information
-            self.logger.info(f"Text extraction successful. Best method: {best_result['method']}")
-            self.logger.info(f"Extracted {len(combined_lines)} unique text lines")
-
-            return {
-                'raw_text': combined_raw_text,
-                'cleaned_lines': combined_lines,
-                'success': True,
-                'best_method': best_result['method'],
-                'confidence': best_result['confidence'],
-                'engine': best_result.get('engine', 'unknown')
-            }
-
-        except Exception as e:
-            self.logger.error(f"Text extraction failed: {str(e)}")
-            return {
-                'raw_text': '',
-                'cleaned_lines': [],
-                'success': False,
-                'error': str(e)
-            }
-
-    def _apply_spell_checking(self, results):
-        """Apply spell checking to improve OCR results"""
-        if not SPELLCHECKER_AVAILABLE:
-            return results
-
-        for result in results:
-            if not result.get('text'):
-                continue
-
-            corrected_lines = []
-            for line in result.get('lines', []):
-                # Only correct lines that look like they might need correction
-                # Skip lines that are likely product names or have special formatting
-                if line.isupper() or len(line) < 4 or any(char.isdigit() for char in line):
-                    corrected_lines.append(line)
-                    continue
-
-                # Split into words and correct each word
-                words = line.split()
-                corrected_words = []
-
-                for word in words:
-                    # Skip correction for numbers, short words, and words with special characters
-                    if len(word) < 4 or any(c.isdigit() for c in word) or not word.isalpha():
-                        corrected_words.append(word)
-                        continue
-
-                    # Only correct if the word seems misspelled
-                    if not self.spell.known([word.lower()]):
-                        correction = self.spell.correction(word.lower())
-                        # Only use correction if it's close to the original
-                        if correction and difflib.SequenceMatcher(None, word.lower(), correction).ratio() > 0.7:
-                            # Preserve case
-                            if word.isupper():
-                                corrected_words.append(correction.upper())
-                            elif word[0].isupper():
-                                corrected_words.append(correction.capitalize())
-                            else:
-                                corrected_words.append(correction)
-                        else:
-                            corrected_words.append(word)
-                    else:
-                        corrected_words.append(word)
-
-                corrected_line = ' '.join(corrected_words)
-                corrected_lines.append(corrected_line)
-
-            # Update the result with corrected text
-            corrected_text = '\n'.join(corrected_lines)
-            result['text'] = corrected_text
-            result['lines'] = corrected_lines
-
-        return results
-
-    def calculate_text_confidence(self, text):
-        """
-        Calculate confidence score based on text characteristics and wine label patterns
-        """
-        if not text.strip():
-            return 0
-
-        score = 0
-        text_lower = text.lower()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-
-        # More lines with actual content = higher confidence
-        score += len(lines) * 2
-
-        # Presence of wine-related terms
-        wine_terms = ['wine', 'vintage', 'estate', 'vineyard', 'winery', 'bottle', 'reserve',
-                      'porto', 'port', 'tawny', 'ruby', 'product of']
-        for term in wine_terms:
-            if term in text_lower:
-                score += 5
-
-        # Presence of "Matured in" or "Aged in" (common in aged wines)
-        if re.search(r'(matured|aged)\s+in', text_lower):
-            score += 8
-
-        # Presence of "Bottled by" (common on wine labels)
-        if re.search(r'bottled\s+by', text_lower):
-            score += 8
-
-        # Presence of established date (Estd or Est)
-        if re.search(r'(est[d]?\.?|established)\s+\d+', text_lower):
-            score += 5
-
-        # Presence of percentage (likely alcohol content)
-        if re.search(r'\d+\.?\d*\s*%', text_lower):
-            score += 8
-
-        # Presence of country/region names
-        all_regions = []
-        for country_variations in self.countries.values():
-            all_regions.extend(country_variations)
-
-        for region in all_regions:
-            if region in text_lower:
-                score += 4
-                break
-
-        # Presence of "Product of" or "Produce of" (common on wine labels)
-        if re.search(r'product\s+of|produce\s+of|produced\s+(in|by)', text_lower):
-            score += 5
-
-        # Presence of known port wine producers
-        for producer_variations in self.port_producers.values():
-            for variation in producer_variations:
-                if variation in text_lower:
-                    score += 10
-                    break
-
-        # Penalize too much noise (random characters)
-        noise_ratio = len(re.findall(r'[^a-zA-Z0-9\s\.,%-]', text)) / max(len(text), 1)
-        score -= noise_ratio * 20
-
-        return max(0, score)
-
-    def extract_wine_name(self, lines, raw_text):
-        """
-        Enhanced wine name extraction for international wines
-        """
-        if not lines:
-            return None
-
-        # Check for New Zealand wines first
-        for producer in self.nz_producers:
-            for variant in self.nz_producers[producer]:
-                if variant.lower() in raw_text.lower():
-                    # Look for grape varieties in the text
-                    grape_patterns = [
-                        r'(merlot\s+cabernet\s+franc)',
-                        r'(cabernet\s+franc)',
-                        r'(sauvignon\s+blanc)',
-                        r'(pinot\s+noir)',
-                        r'(chardonnay)',
-                        r'(merlot)'
-                    ]
-                    for pattern in grape_patterns:
-                        match = re.search(pattern, raw_text.lower())
-                        if match:
-                            return f"{variant.title()} {match.group(1).title()}"
-                    return variant.title()
-
-        # Check for common Chilean wine brands like URMENETA
-        for producer in self.chilean_producers:
-            for variant in self.chilean_producers[producer]:
-                # Prioritize exact word boundaries for brand names
-                brand_pattern = r'\b' + re.escape(variant) + r'\b'
-                if re.search(brand_pattern, raw_text, re.IGNORECASE):
-                    # For brands like URMENETA, look for common grape varieties
-                    for grape in ['merlot', 'cabernet sauvignon', 'chardonnay', 'carmenere', 'sauvignon blanc']:
-                        if grape in raw_text.lower():
-                            # Combine brand with grape for Chilean wines
-                            return f"{variant.title()} {grape.title()}"
-                    # If no grape found, just return the brand name
-                    return variant.title()
-
-        # Look for French château patterns
-        for pattern in self.chateau_patterns:
-            match = re.search(pattern, raw_text.lower())
-            if match:
-                chateau_name = match.group(1).strip()
-                # Clean up the château name
-                chateau_name = re.sub(r'\s+', ' ', chateau_name)
-                chateau_name = chateau_name.split('\n')[0]  # Take only first line if multi-line
-                if len(chateau_name) > 3 and len(chateau_name) < 50:
-                    return f"Château {chateau_name.title()}"
-
-        # Look for American wine patterns like "Essential Red"
-        american_wine_patterns = [
-            r'(essential\s+red)',
-            r'(reserve\s+red)',
-            r'(estate\s+red)',
-            r'(old\s+vine\s+blend)',
-            r'(heritage\s+blend)',
-            r'(proprietor\'s\s+blend)'
-        ]
-
-        for pattern in american_wine_patterns:
-            match = re.search(pattern, raw_text.lower())
-            if match:
-                return match.group(1).strip().title()
-
-        # Look for grape blend patterns
-        for pattern in self.grape_variety_patterns:
-            if re.search(pattern, raw_text.lower()):
-                # Extract the full line containing the blend pattern
-                for line in lines:
-                    if re.search(pattern, line.lower()):
-                        return line.strip()
-                return pattern.replace(r'\s+', ' ').title()
-
-        # Look for grape variety combinations
-        grape_combo_patterns = [
-            r'(merlot\s+cabernet\s+franc)',
-            r'(cabernet\s+merlot)',
-            r'(cabernet\s+franc)',
-            r'(pinot\s+noir)',
-            r'(sauvignon\s+blanc)',
-            r'(chardonnay)',
-            r'(merlot)'
-        ]
-
-        for pattern in grape_combo_patterns:
-            match = re.search(pattern, raw_text.lower())
-            if match:
-                return match.group(1).title()
-
-        # For Chilean wines: Look for prominent uppercase text that might be the brand name
-        for line in lines[:4]:  # Focus on the first few lines
-            if line.isupper() and len(line) >= 3 and len(line) <= 20:
-                # If this uppercase line is followed by a grape variety, it's likely the brand name
-                line_idx = lines.index(line)
-                if line_idx + 1 < len(lines):
-                    next_line = lines[line_idx + 1].lower()
-                    for grape in ['merlot', 'cabernet sauvignon', 'chardonnay', 'carmenere', 'sauvignon blanc']:
-                        if grape in next_line:
-                            return f"{line} {grape.title()}"
-                return line  # Just return the uppercase line if no grape follows
-
-        # Skip common non-wine-name patterns
-        skip_patterns = [
-            r'^\d+$',  # Just numbers
-            r'^\d+\.\d+%',  # Alcohol percentage
-            r'^(wine|vintage|estate|winery)$',  # Generic terms
-            r'^(produced by|product of|bottled by)$',  # Production info
-            r'^\d{4}$',  # Years
-            r'^(bottle|ml|cl|l)$',  # Volume indicators
-            r'^(appellation|mis en bouteille|grand vin)$'  # French label terms
-        ]
-
-        candidates = []
-        for i, line in enumerate(lines[:6]):  # Check first 6 lines
-            line_clean = line.strip()
-            if len(line_clean) < 3:
-                continue
-
-            # Skip if matches skip patterns
-            skip = False
-            for pattern in skip_patterns:
-                if re.match(pattern, line_clean, re.IGNORECASE):
-                    skip = True
-                    break
-
-            if not skip:
-                # Score based on position (earlier lines more likely to be wine name)
-                score = 10 - i
-                # Bonus for mixed case (likely proper names)
-                if any(c.isupper() for c in line_clean) and any(c.islower() for c in line_clean):
-                    score += 5
-                # Bonus for ALL UPPERCASE (common for brand names)
-                if line_clean.isupper():
-                    score += 15
-                # Bonus for reasonable length
-                if 5 <= len(line_clean) <= 50:
-                    score += 3
-                # Bonus for containing grape variety - very common in New World wines
-                for grape in ['merlot', 'cabernet', 'chardonnay', 'sauvignon']:
-                    if grape in line_clean.lower():
-                        score += 12
-                        break
-
-                candidates.append((line_clean, score))
-
-        # Return the highest scoring candidate
-        if candidates:
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            return candidates[0][0]
-
-        return None
-
-    def extract_winery(self, lines, raw_text):
-        """
-        Extract the winery name, with special focus on international producers
-        """
-        # New Zealand winery patterns
-        for producer in self.nz_producers:
-            for variant in self.nz_producers[producer]:
-                if variant.lower() in raw_text.lower():
-                    return producer.title()
-
-        # Chilean winery patterns - common format: Viña + name
-        vina_patterns = [
-            r'vi[ñn]a\s+([a-zA-Z\s\-\.\']+)',
-            r'vina\s+([a-zA-Z\s\-\.\']+)',
-            r'viña\s+([a-zA-Z\s\-\.\']+)'
-        ]
-
-        # Try to find Chilean wineries with "Viña" prefix
-        for pattern in vina_patterns:
-            match = re.search(pattern, raw_text.lower())
-            if match:
-                winery_name = match.group(1).strip()
-                # Clean up the winery name
-                winery_name = re.sub(r'\s+', ' ', winery_name)
-                winery_name = winery_name.split('\n')[0]  # Take only first line if multi-line
-                if len(winery_name) > 2:
-                    return f"Viña {winery_name.title()}"
-
-        # Check for exact matches with Chilean producers
-        for producer, variations in self.chilean_producers.items():
-            for variation in variations:
-                if variation.lower() in raw_text.lower():
-                    return producer.title()
-
-        # Try to find a line with 'Estate', 'Winery', 'Bodega', etc.
-        winery_keywords = ['estate', 'viña', 'vina', 'winery', 'bodega', 'cellars', 'vineyards', 'vinicola']
-        for line in lines:
-            line_lower = line.lower()
-            for keyword in winery_keywords:
-                if keyword in line_lower:
-                    return line.strip()
-
-        # Heuristic: if the first line is not the wine name, it may be the winery
-        if len(lines) > 1:
-            return lines[1].strip()
-
-        return None
-
-    def extract_country(self, raw_text):
-        """
-        Enhanced country extraction for international wines
-        """
-        text_lower = raw_text.lower()
-
-        # Check for New Zealand specific patterns first
-        nz_patterns = [
-            r'new\s+zealand',
-            r'hawke\'s\s+bay',
-            r'hawkes\s+bay',
-            r'marlborough',
-            r'central\s+otago'
-        ]
-        for pattern in nz_patterns:
-            if re.search(pattern, text_lower):
-                return 'New Zealand'
-
-        # Check for Chilean wine specific patterns
-        chile_patterns = [
-            r'wine\s+of\s+chile',
-            r'product\s+of\s+chile',
-            r'produce\s+of\s+chile',
-            r'chilean\s+wine',
-            r'vino\s+de\s+chile'
-        ]
-        for pattern in chile_patterns:
-            if re.search(pattern, text_lower):
-                return 'Chile'
-
-        # Search for known country variants
-        for country, variations in self.countries.items():
-            for variation in variations:
-                if variation.lower() in text_lower:
-                    return country.title()
-
-        return None
-
-    def extract_wine_type(self, raw_text):
-        """
-        Enhanced wine type extraction for international wines
-        """
-        text_lower = raw_text.lower()
-
-        # Check for blend patterns first - return only "Blend" for any blend type
-        blend_patterns = [
-            r'old\s+vine\s+blend',
-            r'heritage\s+blend',
-            r'estate\s+blend',
-            r'red\s+blend',
-            r'white\s+blend',
-            r'proprietary\s+blend',
-            r'bordeaux\s+blend',
-            r'rhone\s+blend',
-            r'field\s+blend',
-            r'very\s+old\s+blend',
-            r'superior\s+blend',
-            r'family\s+blend',
-            r'premium\s+blend',
-            r'reserve\s+blend',
-            r'vintage\s+blend',
-            r'classic\s+blend',
-            r'traditional\s+blend',
-            r'master\s+blend',
-            r'winemaker\'s\s+blend',
-            r'special\s+blend',
-            r'\bblend\b'  # Just "blend" by itself
-        ]
-
-        for pattern in blend_patterns:
-            if re.search(pattern, text_lower):
-                return 'Blend'
-
-        # Generic types (excluding blend which is handled above)
-        for wine_type, variations in self.wine_types.items():
-            for variation in variations:
-                if variation in text_lower:
-                    return wine_type.title()
-
-        # Fallback: look for grape varieties that indicate type
-        red_grapes = ['cabernet', 'merlot', 'pinot noir', 'syrah', 'shiraz', 'malbec', 'tempranillo']
-        white_grapes = ['chardonnay', 'sauvignon blanc', 'riesling', 'pinot grigio']
-
-        for grape in red_grapes:
-            if grape in text_lower:
-                return 'Red'
-
-        for grape in white_grapes:
-            if grape in text_lower:
-                return 'White'
-
-        return None
-
-    def extract_region(self, raw_text):
-        """
-        Enhanced region extraction for multiple countries
-        """
-        text_lower = raw_text.lower()
-
-        # Check for specific Burgundy appellations first (most specific)
-        for appellation, variations in self.burgundy_appellations.items():
-            for variation in variations:
-                if variation in text_lower:
-                    return variation.title()
-
-        # Check for New Zealand regions
-        for region_group, variations in self.nz_regions.items():
-            for variation in variations:
-                if variation in text_lower:
-                    return variation.title()
-
-        # Check for specific regions from all countries
-        all_regions = {**self.french_regions, **self.spanish_regions,
-                      **self.italian_regions, **self.german_regions,
-                      **self.australian_regions, **self.american_regions,
-                      **self.chilean_regions, **self.argentinian_regions,
-                      **self.brazilian_regions, **self.greek_regions}
-
-        for region_group, variations in all_regions.items():
-            for variation in variations:
-                if variation in text_lower:
-                    return variation.title()
-
-        return None
-
-    def extract_abv(self, raw_text):
-        """
-        Enhanced ABV extraction with multiple patterns - returns None if not found
-        """
-        # More restrictive patterns to avoid false positives from OCR noise
-        strict_abv_patterns = [
-            r'(\d+\.?\d*)\s*%\s*(?:alc\.?|vol\.?|alcohol|abv)',
-            r'(?:alc\.?|vol\.?|alcohol|abv)\s*:?\s*(\d+\.?\d*)\s*%',
-            r'(\d+\.?\d*)\s*%\s*(?:by\s+)?(?:vol\.?|volume)'
-        ]
-
-        for pattern in strict_abv_patterns:
-            matches = re.findall(pattern, raw_text.lower())
-            for match in matches:
-                try:
-                    abv = float(match)
-                    # More restrictive range to avoid false positives
-                    if 8.0 <= abv <= 25.0:
-                        return abv
-                except ValueError:
-                    continue
-
-        return None
-
-    def extract_grape_variety(self, raw_text):
-        """
-        Enhanced grape variety extraction from wine labels
-        """
-        text_lower = raw_text.lower()
-
-        # Check for blend patterns first - return only "Blend" for any blend type
-        blend_patterns = [
-            r'old\s+vine\s+blend',
-            r'heritage\s+blend',
-            r'estate\s+blend',
-            r'red\s+blend',
-            r'white\s+blend',
-            r'proprietary\s+blend',
-            r'bordeaux\s+blend',
-            r'rhone\s+blend',
-            r'field\s+blend',
-            r'very\s+old\s+blend',
-            r'superior\s+blend',
-            r'family\s+blend',
-            r'premium\s+blend',
-            r'reserve\s+blend',
-            r'vintage\s+blend',
-            r'classic\s+blend',
-            r'traditional\s+blend',
-            r'master\s+blend',
-            r'winemaker\'s\s+blend',
-            r'special\s+blend',
-            r'\bblend\b'  # Just "blend" by itself
-        ]
-
-        for pattern in blend_patterns:
-            if re.search(pattern, text_lower):
-                return ['Blend']
-
-        # Enhanced grape variety list with "cabernet franc" specifically
-        grape_list = [
-            'cabernet sauvignon', 'cabernet franc', 'merlot', 'syrah', 'pinot noir', 'chardonnay',
-            'sauvignon blanc', 'malbec', 'tempranillo', 'riesling', 'zinfandel',
-            'grenache', 'sangiovese', 'nebbiolo', 'barbera', 'mourvedre',
-            'petit verdot', 'petite sirah', 'viognier', 'chenin blanc', 'semillon',
-            'pinot gris', 'pinot grigio', 'muscat', 'carignan', 'carmenere',
-            'torrontes', 'garnacha', 'albariño', 'verdejo', 'vermentino', 'fiano',
-            'gruner veltliner', 'trebbiano', 'palomino', 'macabeo', 'mencia',
-            'godello', 'monastrell', 'primitivo', 'aglianico', 'corvina', 'negroamaro',
-            'nero d\'avola', 'frappato', 'lambrusco', 'pinot blanc', 'gewurztraminer',
-            'marsanne', 'roussanne', 'cinsault', 'touriga nacional', 'bobal', 'bonarda'
-        ]
-
-        found_grapes = []
-
-        # Check for multi-word grape varieties first (most specific)
-        for grape in sorted(grape_list, key=len, reverse=True):
-            if grape in text_lower:
-                found_grapes.append(grape.title())
-
-        # Remove duplicates while preserving order
-        unique_grapes = []
-        for grape in found_grapes:
-            if grape not in unique_grapes:
-                unique_grapes.append(grape)
-
-        return unique_grapes if unique_grapes else None
-
-    def extract_wine_info(self, image_path):
-        """
-        Extract all wine information using enhanced methods for international wines
-        """
-        # Extract text using robust method
-        result = self.extract_text_robust(image_path)
-
-        if not result['success']:
-            return {
-                'wine_name': None,
-                'winery': None,
-                'country': None,
-                'wine_type': None,
-                'region': None,
-                'abv': None,
-                'grape_variety': None
-            }
-
-        lines = result['cleaned_lines']
-        raw_text = result['raw_text']
-
-        # For debugging: print the extracted raw text
-        print("--------- RAW TEXT EXTRACTED ---------")
-        print(raw_text)
-        print("--------------------------------------")
-
-        # Extract each piece of information
-        wine_name = self.extract_wine_name(lines, raw_text)
-        winery = self.extract_winery(lines, raw_text)
-        country = self.extract_country(raw_text)
-        wine_type = self.extract_wine_type(raw_text)
-        region = self.extract_region(raw_text)
-        abv = self.extract_abv(raw_text)
-        grape_variety = self.extract_grape_variety(raw_text)
-
-        # Hard-coded corrections for specific wines
-
-        # French Burgundy wines - specifically Meursault
-        if 'demessey' in raw_text.lower() and 'meursault' in raw_text.lower():
-            winery = 'Demessey'
-            country = 'France'
-            region = 'Meursault'
-            wine_type = 'White'
-            grape_variety = ['Chardonnay']  # Meursault is always Chardonnay
-
-            # Check for premier cru designation (more flexible OCR matching)
-            if re.search(r'1\s*e?r?\s*cru|premier\s*cru', raw_text.lower()) or '1 cru' in raw_text.lower():
-                wine_name = 'Meursault 1er Cru'
-                # Check for specific vineyard plot (flexible OCR matching)
-                if re.search(r'pi[eè]ce?\s*sous?\s*le?\s*bois?', raw_text.lower()) or 'piece sous' in raw_text.lower():
-                    wine_name = 'Meursault 1er Cru La Pièce Sous Le Bois'
-            else:
-                wine_name = 'Meursault'
-
-        # General Meursault detection (Burgundy white wine)
-        elif 'meursault' in raw_text.lower() and ('france' in raw_text.lower() or 'bourgogne' in raw_text.lower() or 'burgundy' in raw_text.lower()):
-            country = 'France'
-            region = 'Meursault'
-            wine_type = 'White'
-            grape_variety = ['Chardonnay']  # Meursault is always Chardonnay
-
-            if '1er cru' in raw_text.lower() or 'premier cru' in raw_text.lower():
-                wine_name = 'Meursault 1er Cru'
-            else:
-                wine_name = 'Meursault'
-
-        # French Bordeaux wines - typically blends
-        elif 'coufran' in raw_text.lower() or ('chateau' in raw_text.lower() and 'haut-medoc' in raw_text.lower()):
-            if 'coufran' in raw_text.lower():
-                wine_name = 'Château Coufran'
-                winery = 'Château Coufran'
-            country = 'France'
-            region = 'Haut-Médoc'
-            wine_type = 'Blend'  # Bordeaux wines are typically blends
-            grape_variety = ['Blend']
-
-        # General Bordeaux blend detection
-        elif 'bordeaux' in raw_text.lower() and 'france' in raw_text.lower():
-            country = 'France'
-            region = 'Bordeaux'
-            wine_type = 'Blend'  # Bordeaux wines are typically blends
-            grape_variety = ['Blend']
-
-        # Te Awanga Estate (New Zealand)
-        elif 'te awanga' in raw_text.lower():
-            winery = 'Te Awanga Estate'
-            country = 'New Zealand'
-
-            if 'hawke' in raw_text.lower() and 'bay' in raw_text.lower():
-                region = 'Hawke\'s Bay'
-
-            # Look for grape varieties on Te Awanga labels
-            if 'merlot' in raw_text.lower() and 'cabernet franc' in raw_text.lower():
-                wine_name = 'Merlot Cabernet Franc'
-                wine_type = 'Red'
-                grape_variety = ['Merlot', 'Cabernet Franc']
-            elif 'cabernet franc' in raw_text.lower():
-                wine_name = 'Cabernet Franc'
-                wine_type = 'Red'
-                grape_variety = ['Cabernet Franc']
-
-        # Bogle Vineyards (USA)
-        elif 'bogle' in raw_text.lower():
-            winery = 'Bogle Vineyards'
-            country = 'USA'
-
-            if 'essential red' in raw_text.lower():
-                wine_name = 'Essential Red'
-                wine_type = 'Red'
-                if not grape_variety:
-                    grape_variety = ['Old Vine Blend']
-
-            if 'california' in raw_text.lower() or 'ca' in raw_text.lower():
-                region = 'California'
-
-        # Chilean wines
-        elif 'urmeneta' in raw_text.lower():
-            if not wine_name or wine_name.lower() != 'urmeneta merlot':
-                if 'merlot' in raw_text.lower():
-                    wine_name = 'Urmeneta Merlot'
-                elif 'cabernet sauvignon' in raw_text.lower() or 'cabernet' in raw_text.lower():
-                    wine_name = 'Urmeneta Cabernet Sauvignon'
-                elif 'chardonnay' in raw_text.lower():
-                    wine_name = 'Urmeneta Chardonnay'
-                elif 'carmenere' in raw_text.lower():
-                    wine_name = 'Urmeneta Carmenere'
-                else:
-                    wine_name = 'Urmeneta'
-
-            if not winery or 'vina' not in winery.lower():
-                winery = 'Viña Urmeneta'
-
-            if not country:
-                country = 'Chile'
-
-            if not region:
-                region = 'Central Valley'
-
-            if not wine_type and 'merlot' in raw_text.lower():
-                wine_type = 'Red'
-
-        # Trivento wines (Argentinian)
-        elif 'trivento' in raw_text.lower():
-            winery = 'Trivento'
-            country = 'Argentina'
-
-            if 'reserva' in raw_text.lower() or 'reserve' in raw_text.lower():
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Trivento Reserve Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-                elif 'cabernet sauvignon' in raw_text.lower() or 'cabernet' in raw_text.lower():
-                    wine_name = 'Trivento Reserve Cabernet Sauvignon'
-                    wine_type = 'Red'
-                    grape_variety = ['Cabernet Sauvignon']
-                else:
-                    wine_name = 'Trivento Reserve'
-            elif 'golden' in raw_text.lower():
-                wine_name = 'Trivento Golden Reserve'
-                wine_type = 'Red'
-                if 'malbec' in raw_text.lower():
-                    grape_variety = ['Malbec']
-            elif 'malbec' in raw_text.lower():
-                wine_name = 'Trivento Malbec'
-                wine_type = 'Red'
-                grape_variety = ['Malbec']
-            else:
-                wine_name = 'Trivento'
-
-            if not region:
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-                elif 'lujan' in raw_text.lower() or 'luján' in raw_text.lower():
-                    region = 'Lujan de Cuyo'
-                elif 'uco' in raw_text.lower():
-                    region = 'Uco Valley'
-
-        # Argentinian wines
-        elif any(producer_key in raw_text.lower() for producer_key in ['catena', 'trapiche', 'norton', 'alamos', 'luigi bosca', 'rutini', 'mendel', 'trivento']):
-            country = 'Argentina'
-
-            # Catena Zapata wines
-            if 'catena' in raw_text.lower():
-                winery = 'Catena Zapata'
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Catena Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-                elif 'cabernet sauvignon' in raw_text.lower():
-                    wine_name = 'Catena Cabernet Sauvignon'
-                    wine_type = 'Red'
-                    grape_variety = ['Cabernet Sauvignon']
-                elif 'chardonnay' in raw_text.lower():
-                    wine_name = 'Catena Chardonnay'
-                    wine_type = 'White'
-                    grape_variety = ['Chardonnay']
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-                elif 'tupungato' in raw_text.lower():
-                    region = 'Tupungato'
-                elif 'agrelo' in raw_text.lower():
-                    region = 'Agrelo'
-
-            # Trivento wines
-            elif 'trivento' in raw_text.lower():
-                winery = 'Trivento'
-                if 'reserve' in raw_text.lower() or 'reserva' in raw_text.lower():
-                    if 'malbec' in raw_text.lower():
-                        wine_name = 'Trivento Reserve Malbec'
-                        wine_type = 'Red'
-                        grape_variety = ['Malbec']
-                    elif 'cabernet sauvignon' in raw_text.lower() or 'cabernet' in raw_text.lower():
-                        wine_name = 'Trivento Reserve Cabernet Sauvignon'
-                        wine_type = 'Red'
-                        grape_variety = ['Cabernet Sauvignon']
-                    elif 'chardonnay' in raw_text.lower():
-                        wine_name = 'Trivento Reserve Chardonnay'
-                        wine_type = 'White'
-                        grape_variety = ['Chardonnay']
-                    else:
-                        wine_name = 'Trivento Reserve'
-                elif 'golden' in raw_text.lower() and 'reserve' in raw_text.lower():
-                    wine_name = 'Trivento Golden Reserve'
-                    wine_type = 'Red'
-                    if 'malbec' in raw_text.lower():
-                        grape_variety = ['Malbec']
-                elif 'malbec' in raw_text.lower():
-                    wine_name = 'Trivento Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-                else:
-                    wine_name = 'Trivento'
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-                elif 'lujan de cuyo' in raw_text.lower() or 'luján de cuyo' in raw_text.lower():
-                    region = 'Lujan de Cuyo'
-                elif 'uco valley' in raw_text.lower() or 'valle de uco' in raw_text.lower():
-                    region = 'Uco Valley'
-
-            # Trapiche wines
-            elif 'trapiche' in raw_text.lower():
-                winery = 'Trapiche'
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Trapiche Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-                elif 'cabernet sauvignon' in raw_text.lower():
-                    wine_name = 'Trapiche Cabernet Sauvignon'
-                    wine_type = 'Red'
-                    grape_variety = ['Cabernet Sauvignon']
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-
-            # Norton wines
-            elif 'norton' in raw_text.lower():
-                winery = 'Norton'
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Norton Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-                elif 'lujan de cuyo' in raw_text.lower():
-                    region = 'Lujan de Cuyo'
-
-            # Alamos wines
-            elif 'alamos' in raw_text.lower():
-                winery = 'Alamos'
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Alamos Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-                elif 'torrontes' in raw_text.lower():
-                    wine_name = 'Alamos Torrontes'
-                    wine_type = 'White'
-                    grape_variety = ['Torrontes']
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-
-            # Luigi Bosca wines
-            elif 'luigi bosca' in raw_text.lower() or 'bosca' in raw_text.lower():
-                winery = 'Luigi Bosca'
-                if 'malbec' in raw_text.lower():
-                    wine_name = 'Luigi Bosca Malbec'
-                    wine_type = 'Red'
-                    grape_variety = ['Malbec']
-
-                if 'mendoza' in raw_text.lower():
-                    region = 'Mendoza'
-                elif 'maipu' in raw_text.lower() or 'maipú' in raw_text.lower():
-                    region = 'Maipu'
-
-        # Greek wines
-        elif any(producer_key in raw_text.lower() for producer_key in ['ktima karipidis', 'karipidis', 'alpha estate', 'boutari', 'gerovassiliou', 'kir-yianni', 'tsantali']):
-            country = 'Greece'
-
-            # Ktima Karipidis wines
-            if 'ktima karipidis' in raw_text.lower() or 'karipidis' in raw_text.lower():
-                winery = 'Ktima Karipidis'
-
-                # Check for specific wine names with grape varieties
-                if 'potasos' in raw_text.lower() and 'syrah' in raw_text.lower():
-                    wine_name = 'Potasos Syrah'
-                    wine_type = 'Red'
-                    grape_variety = ['Syrah']
-                elif 'syrah' in raw_text.lower():
-                    wine_name = 'Ktima Karipidis Syrah'
-                    wine_type = 'Red'
-                    grape_variety = ['Syrah']
-                elif 'merlot' in raw_text.lower():
-                    wine_name = 'Ktima Karipidis Merlot'
-                    wine_type = 'Red'
-                    grape_variety = ['Merlot']
-                elif 'cabernet sauvignon' in raw_text.lower():
-                    wine_name = 'Ktima Karipidis Cabernet Sauvignon'
-                    wine_type = 'Red'
-                    grape_variety = ['Cabernet Sauvignon']
-                elif 'assyrtiko' in raw_text.lower():
-                    wine_name = 'Ktima Karipidis Assyrtiko'
-                    wine_type = 'White'
-                    grape_variety = ['Assyrtiko']
-                elif 'sauvignon blanc' in raw_text.lower():
-                    wine_name = 'Ktima Karipidis Sauvignon Blanc'
-                    wine_type = 'White'
-                    grape_variety = ['Sauvignon Blanc']
-
-                # Greek region detection
-                if 'naoussa' in raw_text.lower():
-                    region = 'Naoussa'
-                elif 'macedonia' in raw_text.lower() or 'makedonia' in raw_text.lower():
-                    region = 'Macedonia'
-
-            # Alpha Estate wines
-            elif 'alpha estate' in raw_text.lower() or 'alpha' in raw_text.lower():
-                winery = 'Alpha Estate'
-                if 'syrah' in raw_text.lower():
-                    wine_name = 'Alpha Estate Syrah'
-                    wine_type = 'Red'
-                    grape_variety = ['Syrah']
-                elif 'xinomavro' in raw_text.lower():
-                    wine_name = 'Alpha Estate Xinomavro'
-                    wine_type = 'Red'
-                    grape_variety = ['Xinomavro']
-
-            # Boutari wines
-            elif 'boutari' in raw_text.lower():
-                winery = 'Boutari'
-                if 'naoussa' in raw_text.lower():
-                    wine_name = 'Boutari Naoussa'
-                    wine_type = 'Red'
-                    grape_variety = ['Xinomavro']
-                    region = 'Naoussa'
-                elif 'santorini' in raw_text.lower():
-                    wine_name = 'Boutari Santorini'
-                    wine_type = 'White'
-                    grape_variety = ['Assyrtiko']
-                    region = 'Santorini'
-
-        # Brazilian wines
-        elif any(producer_key in raw_text.lower() for producer_key in ['miolo', 'aurora', 'salton', 'casa valduga', 'geisse', 'lidio carraro']):
-            country = 'Brazil'
-
-            # Miolo wines
-            if 'miolo' in raw_text.lower():
-                winery = 'Miolo'
-                if 'merlot' in raw_text.lower():
-                    wine_name = 'Miolo Merlot'
-                    wine_type = 'Red'
-                    grape_variety = ['Merlot']
-                elif 'cabernet sauvignon' in raw_text.lower():
-                    wine_name = 'Miolo Cabernet Sauvignon'
-                    wine_type = 'Red'
-                    grape_variety = ['Cabernet Sauvignon']
-                elif 'chardonnay' in raw_text.lower():
-                    wine_name = 'Miolo Chardonnay'
-                    wine_type = 'White'
-                    grape_variety = ['Chardonnay']
-
-                if 'serra gaucha' in raw_text.lower() or 'serra gaúcha' in raw_text.lower():
-                    region = 'Serra Gaucha'
-                elif 'vale dos vinhedos' in raw_text.lower():
-                    region = 'Vale dos Vinhedos'
-                elif 'campanha' in raw_text.lower():
-                    region = 'Campanha'
-
-            # Casa Valduga wines
-            elif 'casa valduga' in raw_text.lower() or 'valduga' in raw_text.lower():
-                winery = 'Casa Valduga'
-                if 'espumante' in raw_text.lower():
-                    wine_name = 'Casa Valduga Espumante'
-                    wine_type = 'Sparkling'
-                elif 'merlot' in raw_text.lower():
-                    wine_name = 'Casa Valduga Merlot'
-                    wine_type = 'Red'
-                    grape_variety = ['Merlot']
-
-                if 'vale dos vinhedos' in raw_text.lower():
-                    region = 'Vale dos Vinhedos'
-                elif 'serra gaucha' in raw_text.lower():
-                    region = 'Serra Gaucha'
-
-            # Geisse wines (Brazilian sparkling wine specialist)
-            elif 'geisse' in raw_text.lower():
-                winery = 'Cave Geisse'
-                if 'espumante' in raw_text.lower() or 'sparkling' in raw_text.lower():
-                    wine_name = 'Cave Geisse Espumante'
-                    wine_type = 'Sparkling'
-                elif 'brut' in raw_text.lower():
-                    wine_name = 'Cave Geisse Brut'
-                    wine_type = 'Sparkling'
-
-                if 'pinto bandeira' in raw_text.lower():
-                    region = 'Pinto Bandeira'
-                elif 'serra gaucha' in raw_text.lower():
-                    region = 'Serra Gaucha'
-
-            # Lidio Carraro wines
-            elif 'lidio carraro' in raw_text.lower() or 'lídio carraro' in raw_text.lower():
-                winery = 'Lidio Carraro'
-                if 'merlot' in raw_text.lower():
-                    wine_name = 'Lidio Carraro Merlot'
-                    wine_type = 'Red'
-                    grape_variety = ['Merlot']
-                elif 'tannat' in raw_text.lower():
-                    wine_name = 'Lidio Carraro Tannat'
-                    wine_type = 'Red'
-                    grape_variety = ['Tannat']
-
-                if 'vale dos vinhedos' in raw_text.lower():
-                    region = 'Vale dos Vinhedos'
-
-            # Aurora wines (cooperative)
-            elif 'aurora' in raw_text.lower():
-                winery = 'Aurora'
-                if 'merlot' in raw_text.lower():
-                    wine_name = 'Aurora Merlot'
-                    wine_type = 'Red'
-                    grape_variety = ['Merlot']
-                elif 'moscatel' in raw_text.lower():
-                    wine_name = 'Aurora Moscatel'
-                    wine_type = 'White'
-                    grape_variety = ['Moscatel']
-
-                if 'serra gaucha' in raw_text.lower():
-                    region = 'Serra Gaucha'
-                elif 'bento goncalves' in raw_text.lower() or 'bento gonçalves' in raw_text.lower():
-                    region = 'Bento Goncalves'
-
-        # Special case for Wittmann Riesling (German wine with blue/white striped label)
-        if 'wittmann' in raw_text.lower() or any(re.search(r'w[il]t+m[ao]n+', line.lower()) for line in lines):
-            wine_name = 'Wittmann Riesling Trocken'
-            winery = 'Weingut Wittmann'
-            country = 'Germany'
-            wine_type = 'White'
-            region = 'Rheinhessen'
-            grape_variety = ['Riesling']
-            return {
-                'wine_name': wine_name,
-                'winery': winery,
-                'country': country,
-                'wine_type': wine_type,
-                'region': region,
-                'abv': abv,
-                'grape_variety': grape_variety
-            }
-
-        # German Riesling detection
-        if ('riesling' in raw_text.lower() or 'rieshng' in raw_text.lower()) and \
-           ('trocken' in raw_text.lower() or 'seit' in raw_text.lower()):
-            # This is likely a German Riesling
-            if not wine_type:
-                wine_type = 'White'
-            if not grape_variety:
-                grape_variety = ['Riesling']
-            if not country:
-                country = 'Germany'
-
-            # Check for specific German producers
-            for producer, variations in self.german_producers.items():
-                for variation in variations:
-                    # Use fuzzy matching to handle OCR errors
-                    for line in lines:
-                        if variation.lower() in line.lower() or \
-                           difflib.SequenceMatcher(None, variation.lower(), line.lower()).ratio() > 0.8:
-                            winery = producer.title()
-                            if not wine_name:
-                                wine_name = f"{producer.title()} Riesling"
-                            break
-
-        # Package the results into a dictionary
-        return {
-            'wine_name': wine_name,
-            'winery': winery,
-            'country': country,
-            'wine_type': wine_type,
-            'region': region,
-            'abv': abv,
-            'grape_variety': grape_variety
-        }
-
-    def visualize_ocr_results(self, image_path, show_preprocessed=True, max_images=4):
-        """
-        Visualize OCR results and preprocessing steps for debugging
-
-        Args:
-            image_path: Path to wine label image
-            show_preprocessed: Whether to show preprocessed images
-            max_images: Maximum number of preprocessed images to show
-        """
-        try:
-            import matplotlib.pyplot as plt
-            from matplotlib import gridspec
-            import matplotlib.patches as patches
-
-            # Process the image with full details
-            analysis = self.analyze_image(image_path)
-            preprocessed_images = self.preprocess_image_multiple_ways(image_path)
-
-            # Get OCR results
-            ocr_result = self.extract_text_robust(image_path)
-            wine_info = self.extract_wine_info(image_path)
-
-            # Create figure
-            plt.figure(figsize=(15, 10))
-
-            if show_preprocessed:
-                # Create grid with space for preprocessed images
-                gs = gridspec.GridSpec(2, 6)
-
-                # Show original image
-                ax_orig = plt.subplot(gs[0, :2])
-                ax_orig.imshow(Image.open(image_path))
-                ax_orig.set_title("Original Image")
-                ax_orig.axis('off')
-
-                # Show key preprocessed images
-                for i, img in enumerate(preprocessed_images[:max_images]):
-                    if i < max_images:
-                        row, col = divmod(i, 2)
-                        ax = plt.subplot(gs[row, 2+col])
-                        ax.imshow(img, cmap='gray' if img.mode == 'L' else None)
-                        ax.set_title(f"Preprocessed {i+1}")
-                        ax.axis('off')
-
-                # Show OCR results and extracted info
-                ax_text = plt.subplot(gs[1, 2:])
-            else:
-                # Simpler layout without preprocessed images
-                gs = gridspec.GridSpec(1, 2)
-
-                # Show original image
-                ax_orig = plt.subplot(gs[0, 0])
-                ax_orig.imshow(Image.open(image_path))
-                ax_orig.set_title("Original Image")
-                ax_orig.axis('off')
-
-                # Show OCR results and extracted info
-                ax_text = plt.subplot(gs[0, 1])
-
-            # Display image analysis
-            ax_text.axis('off')
-            ax_text.text(0, 1.0, "Image Analysis:", fontsize=12, fontweight='bold')
-            ax_text.text(0, 0.95, f"Resolution: {analysis['width']}×{analysis['height']} px", fontsize=10)
-            ax_text.text(0, 0.92, f"Brightness: {analysis['avg_brightness']:.1f}/255", fontsize=10)
-            ax_text.text(0, 0.89, f"Contrast: {analysis['contrast']:.3f}", fontsize=10)
-            ax_text.text(0, 0.86, f"Blur Detection: {'Blurry' if analysis['is_blurry'] else 'Sharp'}", fontsize=10)
-            ax_text.text(0, 0.83, f"Background: {'Dark' if analysis['has_dark_background'] else 'Light'}", fontsize=10)
-
-            # Display OCR results
-            ax_text.text(0, 0.78, "OCR Results:", fontsize=12, fontweight='bold')
-            if ocr_result['success']:
-                ax_text.text(0, 0.74, f"Method: {ocr_result['best_method']}", fontsize=10)
-                ax_text.text(0, 0.71, f"Confidence: {ocr_result['confidence']:.1f}", fontsize=10)
-                ax_text.text(0, 0.68, f"Engine: {ocr_result['engine']}", fontsize=10)
-
-                # Display sample of extracted text (first 5 lines or less)
-                lines = ocr_result['cleaned_lines'][:5]
-                ax_text.text(0, 0.63, "Sample Text:", fontsize=10, fontweight='bold')
-                for i, line in enumerate(lines):
-                    ax_text.text(0, 0.60 - i*0.03, f"{line[:30]}{'...' if len(line) > 30 else ''}", fontsize=9)
-            else:
-                ax_text.text(0, 0.74, f"OCR Failed: {ocr_result['error']}", fontsize=10, color='red')
-
-            # Display extracted wine information
-            ax_text.text(0, 0.40, "Extracted Wine Information:", fontsize=12, fontweight='bold')
-            for i, (key, value) in enumerate(wine_info.items()):
-                if value is not None:
-                    value_str = str(value) if not isinstance(value, list) else ', '.join(value)
-                    ax_text.text(0, 0.36 - i*0.03, f"{key.replace('_', ' ').title()}: {value_str}", fontsize=9)
-                else:
-                    ax_text.text(0, 0.36 - i*0.03, f"{key.replace('_', ' ').title()}: None", fontsize=9, color='red')
-
-            plt.tight_layout()
-            plt.show()
-
-            # Return the result for further use
-            return {
-                'analysis': analysis,
-                'ocr_result': ocr_result,
-                'wine_info': wine_info
-            }
-
-        except Exception as e:
-            self.logger.error(f"Visualization failed: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
-
-# Main execution block
-if __name__ == "__main__":
-    import os
-    import sys
-    import matplotlib.pyplot as plt
-
-    # Check if an image path is provided as argument
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
-    else:
-        # Default image path - using the image in raw_data
-        image_path = os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-            "raw_data/X-Wines_Official_Repository/last/XWines_Slim_1K_labels/112201.jpeg"
-        )
-
-    # Check if the image exists
-    if not os.path.exists(image_path):
-        print(f"Error: Image file not found at {image_path}")
-        print("Please provide a valid image path as an argument or update the default path.")
-        sys.exit(1)
-
-    print(f"Processing wine label image: {image_path}")
-
-    # Create OCR instance and process the image
-    ocr = WineLabelOCR()
-
-    # Option 1: Just extract information
-    wine_info = ocr.extract_wine_info(image_path)
-    print("\nExtracted Wine Information:")
-    print("--------------------------")
-    for key, value in wine_info.items():
-        print(f"{key.replace('_', ' ').title()}: {value}")
-
-    # Option 2: Visualize the results (better for debugging)
-    # Uncomment the line below to visualize the results
-    # debug_results = ocr.visualize_ocr_results(image_path)
+from cv_functions.wine_label_ocr import *  # noqa: F401,F403
+from cv_functions.wine_label_ocr import OCRResult, WineLabelOCR  # noqa: F401
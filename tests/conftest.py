@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from cv_functions import wine_label_ai2
+from interface.stub_vision_api import start_stub_server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Start a stub of the vision API and point the extractor's shared client at it."""
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_stub_server(**kwargs)
+        servers.append(server)
+        monkeypatch.setattr(wine_label_ai2, "API_BASE_URL", base_url)
+        return server
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "stub")
+    # a fresh client and semaphore per test: each test runs its own event loop
+    monkeypatch.setattr(wine_label_ai2, "_async_clients", {})
+    monkeypatch.setattr(wine_label_ai2, "_async_semaphore", None)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def label_image():
+    """label_image(seed, size): a noise image; distinct seeds give distinct exact and perceptual hashes."""
+    def make(seed: int, size=(600, 450)) -> Image.Image:
+        pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        return Image.fromarray(pixels, "RGB")
+
+    return make
@@ -0,0 +1,86 @@
+"""
+The bulk label job (interface/batch_label_extract.py) against the local
+vision-API stub: backoff on rate limits, checkpoint resume and cache hits.
+"""
+import asyncio
+import json
+
+import pytest
+
+from cv_functions import wine_label_ai2
+from cv_functions.label_cache import LabelCache
+from interface.batch_label_extract import run_batch
+from interface.stub_vision_api import STUB_WINE_INFO
+
+
+@pytest.fixture
+def write_labels(label_image):
+    def write(directory, count):
+        directory.mkdir()
+        for i in range(count):
+            label_image(i, size=(200, 150)).save(directory / f"label_{i:02d}.jpg", format="JPEG")
+        return directory
+
+    return write
+
+
+def batch(*args, **kwargs):
+    async def main():
+        try:
+            return await run_batch(*args, report_every=60, **kwargs)
+        finally:
+            await wine_label_ai2.close_async_clients()
+
+    return asyncio.run(main())
+
+
+def read_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_retries_rate_limits(stub, write_labels, tmp_path, monkeypatch):
+    # the job does its own backoff: the client must not retry behind it
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_RETRIES", 0)
+    server = stub(rate_limit_every=3)
+    source = write_labels(tmp_path / "labels", 8)
+    output = tmp_path / "results.jsonl"
+
+    summary = batch(str(source), str(output), workers=4, max_retries=5, base_delay=0.01, max_delay=0.05)
+
+    assert (summary["ok"], summary["error"]) == (8, 0)
+    assert summary["retries"] > 0
+    assert server.request_count == 8 + summary["retries"]
+    assert sorted(record["image"] for record in read_results(output)) == sorted(p.name for p in source.iterdir())
+
+
+def test_batch_resumes_from_checkpoint(stub, write_labels, tmp_path, monkeypatch):
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_RETRIES", 0)
+    server = stub()
+    source = write_labels(tmp_path / "labels", 6)
+    output = tmp_path / "results.jsonl"
+
+    first = batch(str(source), str(output), workers=2, limit=2)
+    second = batch(str(source), str(output), workers=2)
+
+    assert first["ok"] == 2
+    assert (second["skipped"], second["ok"]) == (2, 4)
+    assert server.request_count == 6
+    records = read_results(output)
+    assert len(records) == 6 and len({record["image"] for record in records}) == 6
+
+
+def test_batch_cache_hits_skip_api(stub, write_labels, tmp_path, monkeypatch):
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_RETRIES", 0)
+    server = stub()
+    source = write_labels(tmp_path / "labels", 4)
+    cache = LabelCache(str(tmp_path / "labels.sqlite"))
+
+    first = batch(str(source), str(tmp_path / "first.jsonl"), workers=2, cache=cache)
+    second = batch(str(source), str(tmp_path / "second.jsonl"), workers=2, cache=cache)
+
+    assert (first["ok"], first["cached"]) == (4, 0)
+    assert (second["ok"], second["cached"]) == (4, 4)
+    assert server.request_count == 4
+    assert all(record["wine_info"]["wine_name"] == STUB_WINE_INFO["wine_name"]
+               for record in read_results(tmp_path / "second.jsonl"))
@@ -0,0 +1,99 @@
+"""
+Artefact bundles: file signatures, reusing unchanged artefacts across a
+reload, and the validation that keeps an unfit bundle from being served.
+"""
+import asyncio
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from API import fast
+from API.bundle import ArtefactBundle, file_signature, signature, validate_bundle
+
+
+def fit_bundle(rows=3, width=2, **overrides):
+    """A bundle whose artefacts line up: rows x width model, width encoded features."""
+    bundle = ArtefactBundle({"metadata": [("wine_metadata.csv", 10, 1)]})
+    bundle.wine_metadata_df = pd.DataFrame({"WineID": range(rows)})
+    bundle.model = SimpleNamespace(_fit_X=np.zeros((rows, width)))
+    # a passthrough transformer encodes its columns as they are
+    bundle.preprocessor = SimpleNamespace(transformers_=[("num", "passthrough", [f"f{i}" for i in range(width)])])
+    bundle.facets = {"n_wines": rows}
+    bundle.user_store = SimpleNamespace(n_users=1, centroids=np.zeros((1, width)), rated_rows_all=np.array([rows - 1]))
+    for name, value in overrides.items():
+        setattr(bundle, name, value)
+    return bundle
+
+
+def test_file_signature_tracks_size_and_mtime(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"a")
+    first = file_signature([str(path), str(tmp_path / "missing.npy")])
+
+    os.utime(path, ns=(1, 1))
+    assert file_signature([str(path)]) != first
+    assert [entry[:2] for entry in first] == [("model.pkl", 1)]
+    assert signature({"model": [str(path)]}) == {"model": file_signature([str(path)])}
+
+
+def test_version_follows_the_signature():
+    assert ArtefactBundle({"model": [("a", 1, 2)]}).version == ArtefactBundle({"model": [("a", 1, 2)]}).version
+    assert ArtefactBundle({"model": [("a", 1, 2)]}).version != ArtefactBundle({"model": [("a", 1, 3)]}).version
+
+
+def test_reuse_only_unchanged_and_loaded_artefacts():
+    previous = fit_bundle()
+    previous.signature = {"metadata": [("m", 1, 1)], "model": [("p", 1, 1)]}
+    previous.name_index = object()
+
+    same = ArtefactBundle({"metadata": [("m", 1, 1)], "model": [("p", 2, 2)]})
+    assert same.reuse(previous, "metadata")
+    assert same.wine_metadata_df is previous.wine_metadata_df
+    assert same.reuse(previous, "metadata", attributes=["name_index"])
+    assert same.name_index is previous.name_index
+    # the model's files changed: it is loaded again
+    assert not same.reuse(previous, "model")
+    assert same.model is None
+
+    previous.facets = None
+    assert not ArtefactBundle(previous.signature).reuse(previous, "facets")
+    assert not ArtefactBundle(previous.signature).reuse(None, "metadata")
+
+
+def test_validate_accepts_consistent_bundle():
+    assert validate_bundle(fit_bundle()) == []
+
+
+@pytest.mark.parametrize("overrides, problem", [
+    ({"model": None}, "not loaded"),
+    ({"wine_metadata_df": pd.DataFrame({"WineID": range(4)}), "facets": {"n_wines": 4}},
+     "metadata has 4 rows but the model 3"),
+    ({"preprocessor": None}, "preprocessor not loaded"),
+    ({"preprocessor": SimpleNamespace(transformers_=[("num", "passthrough", ["f0"])])},
+     "preprocessor encodes 1 features but the model was fitted on 2"),
+    ({"facets": {"n_wines": 2}}, "facets count 2 wines"),
+    ({"user_store": SimpleNamespace(n_users=1, centroids=np.zeros((1, 5)), rated_rows_all=np.array([0]))},
+     "user profiles have 5 features"),
+    ({"user_store": SimpleNamespace(n_users=1, centroids=np.zeros((1, 2)), rated_rows_all=np.array([7]))},
+     "refer to row 7 of a 3-row model"),
+])
+def test_validate_reports_mismatches(overrides, problem):
+    problems = validate_bundle(fit_bundle(**overrides))
+    assert len(problems) == 1 and problem in problems[0]
+
+
+def test_rejected_reload_keeps_serving_the_previous_bundle(monkeypatch):
+    live = fit_bundle()
+    monkeypatch.setattr(fast.app.state, "catalogue", live)
+    monkeypatch.setattr(fast.app.state, "reloads", fast.deque(maxlen=fast.RELOAD_HISTORY))
+    monkeypatch.setattr(fast, "artefact_files", lambda: {})
+    monkeypatch.setattr(fast, "load_bundle", lambda previous: fit_bundle(rows=4, facets={"n_wines": 3}))
+
+    result = asyncio.run(fast.reload_artifacts("test", force=True))
+
+    assert result["status"] == "rejected"
+    assert "facets count 3 wines, the metadata 4" in result["problems"]
+    assert fast.app.state.catalogue is live
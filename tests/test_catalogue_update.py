@@ -0,0 +1,152 @@
+"""
+Incremental catalogue updates against a small catalogue built like the real
+one: rows kept byte-for-byte, drift detection, and files put back when an
+update is refused or fails half-way.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cv_functions import catalogue_update, encoder
+from cv_functions.catalogue_update import knn_features, update_catalogue
+from cv_functions.facets import build_facets, save_facets
+from cv_functions.model import export_shared_model, load_shared_model, train_model
+
+REGIONS = [(1, "Bordeaux", "France", 44.8, -0.6), (2, "Rioja", "Spain", 42.3, -2.5),
+           (3, "Tuscany", "Italy", 43.4, 11.0), (4, "Napa Valley", "United States", 38.5, -122.3)]
+GRAPES = ["Merlot", "Cabernet Sauvignon", "Tempranillo", "Sangiovese", "Chardonnay", "Syrah", "Pinot Noir"]
+BODIES = ["Light-bodied", "Medium-bodied", "Full-bodied", "Very full-bodied"]
+
+
+def catalogue(n, seed=0, first_id=100000):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        region_id, region, country, lat, lon = REGIONS[i % len(REGIONS)]
+        grapes = [GRAPES[(i + k) % len(GRAPES)] for k in range(1 + i % 2)]
+        rows.append({
+            "WineID": first_id + i, "WineName": f"Wine {i}", "Type": ["Red", "White", "Rosé"][i % 3],
+            "Grapes": str(grapes), "Harmonize": str(["Beef", "Lamb"][: 1 + i % 2]),
+            "ABV": float(rng.uniform(11, 15)), "Body": BODIES[i % 4], "Acidity": ["Low", "Medium", "High"][i % 3],
+            "Country": country, "RegionID": region_id, "RegionName": region,
+            "WineryID": 500 + i % 7, "WineryName": f"Winery {i % 7}",
+            "latitude": lat + float(rng.normal(0, 0.1)), "longitude": lon + float(rng.normal(0, 0.1)),
+            "avg_rating": float(rng.uniform(3, 4.8)), "rating_count": int(rng.integers(5, 400)),
+            "rating_std": float(rng.uniform(0.2, 1)), "Grapes_list": str(grapes),
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    """Metadata CSV, fitted preprocessor, kNN model (with its export) and facets, as the build writes them."""
+    monkeypatch.setattr(encoder, "_preprocessor", None)
+    metadata = catalogue(60)
+    paths = {name: str(tmp_path / file) for name, file in [
+        ("metadata", "wine_metadata.csv"), ("model", "trained_model.pkl"),
+        ("preprocessor", "preprocessor.pkl"), ("facets", "facets.json")]}
+
+    metadata.to_csv(paths["metadata"], index=False)
+    features = encoder.Encoder_features_fit_transform(knn_features(metadata), filepath=paths["preprocessor"])
+    model = train_model(features, n_neighbors=3, filepath=paths["model"])
+    export_shared_model(model, paths["model"])
+    save_facets(build_facets(metadata), paths["facets"])
+    return paths
+
+
+def update(paths, updates_df, **kwargs):
+    return update_catalogue(updates_df, paths["metadata"], paths["model"], paths["preprocessor"],
+                            facets_path=paths["facets"], **kwargs)
+
+
+def read_bytes(directory):
+    return {name: open(os.path.join(directory, name), "rb").read() for name in sorted(os.listdir(directory))}
+
+
+def test_update_keeps_unchanged_rows_byte_for_byte(built):
+    with open(built["metadata"]) as f:
+        before = f.read().splitlines()
+    metadata = pd.read_csv(built["metadata"])
+    changes = pd.DataFrame({"WineID": [100005], "ABV": [14.5]})
+    added = catalogue(1, seed=1, first_id=200000)
+
+    report = update(built, pd.concat([changes, added], ignore_index=True))
+
+    with open(built["metadata"]) as f:
+        after = f.read().splitlines()
+    assert (report["changed"], report["added"], report["rows"]) == (1, 1, 61)
+    assert after[0] == before[0]
+    assert [line for i, line in enumerate(after[:61]) if i != 6] == [line for i, line in enumerate(before) if i != 6]
+    assert after[6] != before[6] and ",14.5," in after[6]
+
+    updated = pd.read_csv(built["metadata"])
+    assert (updated.dtypes == metadata.dtypes).all()
+    assert updated.iloc[-1]["WineID"] == 200000
+    assert load_shared_model(built["model"])._fit_X.shape[0] == 61
+
+
+def test_pure_additions_are_appended(built):
+    with open(built["metadata"], "rb") as f:
+        before = f.read()
+
+    update(built, catalogue(3, seed=2, first_id=300000))
+
+    with open(built["metadata"], "rb") as f:
+        after = f.read()
+    assert after.startswith(before)
+    assert pd.read_csv(built["metadata"])["RegionID"].dtype == np.int64
+
+
+def test_small_update_reports_no_drift(built):
+    report = update(built, catalogue(2, seed=3, first_id=400000), dry_run=True)
+
+    assert not report["drift"]["refit_recommended"]
+    assert report["drift"]["reasons"] == []
+
+
+def test_drift_detection(built):
+    unseen_type = catalogue(2, seed=4, first_id=500000).assign(Type="Fortified")
+    out_of_range = catalogue(1, seed=5, first_id=510000).assign(ABV=35.0)
+    growth = catalogue(20, seed=6, first_id=520000)
+
+    drift = update(built, pd.concat([unseen_type, out_of_range, growth], ignore_index=True),
+                   dry_run=True, max_growth=0.2)["drift"]
+
+    assert drift["refit_recommended"]
+    assert drift["unseen_types"] == ["Fortified"]
+    assert list(drift["out_of_range"]) == ["ABV"]
+    assert drift["growth_since_fit"] == pytest.approx(23 / 60, abs=1e-3)
+    assert len(drift["reasons"]) == 3
+
+
+def test_dry_run_and_refused_update_write_nothing(built):
+    directory = os.path.dirname(built["metadata"])
+    before = read_bytes(directory)
+
+    update(built, catalogue(2, seed=7, first_id=600000), dry_run=True)
+    with pytest.raises(ValueError, match="unknown Body"):
+        update(built, catalogue(1, seed=8, first_id=610000).assign(Body="Chewy"))
+
+    assert read_bytes(directory) == before
+
+
+def test_failed_update_rolls_back_every_file(built, monkeypatch):
+    directory = os.path.dirname(built["metadata"])
+    before = read_bytes(directory)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    # the facets are written after the model, its export and the metadata
+    monkeypatch.setattr(catalogue_update, "save_facets", fail)
+    with pytest.raises(OSError, match="disk full"):
+        update(built, pd.concat([pd.DataFrame({"WineID": [100001], "ABV": [12.0]}),
+                                 catalogue(2, seed=9, first_id=700000)], ignore_index=True))
+
+    after = read_bytes(directory)
+    # the new export's matrix file may be left behind; every file the API reads is as it was
+    assert {name: data for name, data in after.items() if name in before} == before
+    assert not [name for name in after if name.endswith((".bak", ".tmp"))]
+    assert load_shared_model(built["model"])._fit_X.shape[0] == 60
@@ -0,0 +1,78 @@
+"""
+ConcurrencyLimit: requests over an endpoint's cap are turned away at once
+with 503 and Retry-After, and the slots free up as requests finish.
+"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from API.execution import ConcurrencyLimit, endpoint_limit
+
+
+def limited_app(limit):
+    app = FastAPI()
+    app.state.release = None
+
+    @app.get("/slow")
+    async def slow():
+        async with limit:
+            await app.state.release.wait()
+        return {"ok": True}
+
+    return app
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+def test_over_the_cap_gets_503_with_retry_after():
+    limit = ConcurrencyLimit("slow", max_in_flight=2, retry_after=7)
+    app = limited_app(limit)
+
+    async def main():
+        app.state.release = asyncio.Event()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            held = [asyncio.create_task(client.get("/slow")) for _ in range(2)]
+            await wait_until(lambda: limit.in_flight == 2)
+
+            rejected = await client.get("/slow")
+            app.state.release.set()
+            accepted = await asyncio.gather(*held)
+            after = await client.get("/slow")
+        return rejected, accepted, after
+
+    rejected, accepted, after = asyncio.run(main())
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "7"
+    assert "slow" in rejected.json()["detail"]
+    assert [response.status_code for response in accepted] == [200, 200]
+    assert after.status_code == 200
+    assert limit.stats() == {"max_in_flight": 2, "in_flight": 0, "peak_in_flight": 2, "accepted": 3, "rejected": 1}
+
+
+def test_slot_is_released_when_the_handler_raises():
+    limit = ConcurrencyLimit("fail", max_in_flight=1)
+
+    async def main():
+        for _ in range(3):
+            try:
+                async with limit:
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+    asyncio.run(main())
+    assert (limit.in_flight, limit.accepted, limit.rejected) == (0, 3, 0)
+
+
+def test_endpoint_limit_reads_the_environment(monkeypatch):
+    monkeypatch.setenv("API_MAX_IN_FLIGHT_READ_IMAGE", "3")
+
+    assert endpoint_limit("read-image", 16).max_in_flight == 3
+    assert endpoint_limit("recommend-wines", 32).max_in_flight == 32
@@ -0,0 +1,92 @@
+"""
+Facets: update_facets after adding and removing rows against build_facets
+of the resulting catalogue, and the facets file.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from cv_functions.facets import build_facets, read_facets, save_facets, update_facets
+
+
+def catalogue(n, seed=0, start=0):
+    countries = ["France", "Italy", "Spain", "Chile"]
+    regions = {"France": ["Bordeaux", "Burgundy"], "Italy": ["Tuscany", "Piedmont"],
+               "Spain": ["Rioja"], "Chile": ["Maipo", "Colchagua"]}
+    rows = []
+    for i in range(start, start + n):
+        country = countries[(i * 7 + seed) % len(countries)]
+        rows.append({
+            "WineID": 1000 + i,
+            "Type": ["Red", "White", "Rosé", "Sparkling"][(i + seed) % 4],
+            "Body": ["Light-bodied", "Medium-bodied", "Full-bodied"][i % 3],
+            "Acidity": ["Low", "Medium", "High"][(i * 5) % 3],
+            "Country": country,
+            "RegionName": regions[country][i % len(regions[country])],
+            "Grapes_list": [["Merlot"], ["Merlot", "Syrah"], ["Chardonnay"], ["Tempranillo", "Garnacha"]][i % 4],
+            "Harmonize": str([["Beef"], ["Fish", "Shellfish"], ["Pasta", "Beef"]][i % 3]),
+        })
+    return pd.DataFrame(rows)
+
+
+def comparable(facets):
+    # list orders are catalogue orders, which updates keep only up to appended values
+    return {
+        **facets,
+        "types": sorted(facets["types"]),
+        "countries": sorted(facets["countries"]),
+        "regions": sorted(facets["regions"]),
+        "country_regions": {country: sorted(regions) for country, regions in facets["country_regions"].items()},
+    }
+
+
+def test_update_matches_rebuild_after_adding_rows():
+    before, added = catalogue(40), catalogue(15, seed=1, start=40)
+
+    updated = update_facets(build_facets(before), added)
+    assert comparable(updated) == comparable(build_facets(pd.concat([before, added], ignore_index=True)))
+
+
+def test_update_matches_rebuild_after_replacing_and_removing_rows():
+    before = catalogue(40)
+    removed = before.iloc[::2]
+    # every Chile row goes: the country and its regions disappear
+    removed = pd.concat([removed, before[(before["Country"] == "Chile") & ~before.index.isin(removed.index)]])
+    added = catalogue(5, seed=2, start=100)
+    added = added[added["Country"] != "Chile"]
+
+    after = pd.concat([before.drop(removed.index), added], ignore_index=True)
+    updated = update_facets(build_facets(before), added, removed)
+
+    assert comparable(updated) == comparable(build_facets(after))
+    assert "Chile" not in updated["countries"] and "Maipo" not in updated["region_country"]
+
+
+def test_update_leaves_input_facets_unchanged():
+    facets = build_facets(catalogue(10))
+    snapshot = comparable(facets)
+    update_facets(facets, catalogue(5, seed=3, start=10))
+    assert comparable(facets) == snapshot
+
+
+def test_save_and_read_round_trip(tmp_path):
+    path = str(tmp_path / "facets.json")
+    facets = build_facets(catalogue(10))
+
+    save_facets(facets, path)
+    save_facets(facets, path)
+
+    assert read_facets(path) == facets
+    assert os.listdir(tmp_path) == ["facets.json"]
+    assert read_facets(str(tmp_path / "missing.json")) is None
+
+
+def test_failed_save_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "facets.json")
+    save_facets({"n_wines": 1}, path)
+
+    with pytest.raises(TypeError):
+        save_facets({"n_wines": object()}, path)
+    assert read_facets(path) == {"n_wines": 1}
+    assert os.listdir(tmp_path) == ["facets.json"]
@@ -0,0 +1,84 @@
+"""
+LabelCache lookups, eviction and persistence, and the extractor skipping
+the vision API on a cache hit.
+"""
+import asyncio
+
+import numpy as np
+from PIL import Image
+
+from cv_functions import wine_label_ai2
+from cv_functions.label_cache import LabelCache
+
+WINE_INFO = {"wine_name": "Test Reserva", "vintage": "2019"}
+
+
+def brighter(image, amount=3):
+    """A copy with different pixels (so a different exact key) but the same dHash."""
+    pixels = np.asarray(image, dtype=np.int16) + amount
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+
+
+def test_exact_hit_and_miss(tmp_path, label_image):
+    cache = LabelCache(str(tmp_path / "labels.sqlite"), phash_distance=0)
+    assert cache.get(label_image(0)) is None
+    cache.put(label_image(0), WINE_INFO, payload_bytes=100)
+
+    assert cache.get(label_image(0)) == WINE_INFO
+    assert cache.get(label_image(1)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["bytes_saved"] == 100
+
+
+def test_near_duplicate_matches_perceptual_hash(tmp_path, label_image):
+    cache = LabelCache(str(tmp_path / "labels.sqlite"), phash_distance=4)
+    cache.put(label_image(0), WINE_INFO)
+
+    assert cache.get(brighter(label_image(0))) == WINE_INFO
+    assert cache.stats()["near_hits"] == 1
+    exact_only = LabelCache(str(tmp_path / "exact.sqlite"), phash_distance=0)
+    exact_only.put(label_image(0), WINE_INFO)
+    assert exact_only.get(brighter(label_image(0))) is None
+
+
+def test_evicts_least_recently_used(tmp_path, label_image):
+    cache = LabelCache(str(tmp_path / "labels.sqlite"), max_entries=2, memory_entries=0, phash_distance=0)
+    cache.put(label_image(0), WINE_INFO)
+    cache.put(label_image(1), WINE_INFO)
+    assert cache.get(label_image(0)) == WINE_INFO  # image 1 is now the oldest
+    cache.put(label_image(2), WINE_INFO)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get(label_image(1)) is None
+    assert cache.get(label_image(0)) == WINE_INFO
+
+
+def test_entries_survive_reopening(tmp_path, label_image):
+    path = str(tmp_path / "labels.sqlite")
+    cache = LabelCache(path)
+    cache.put(label_image(0), WINE_INFO)
+    cache.close()
+
+    reopened = LabelCache(path)
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get(brighter(label_image(0))) == WINE_INFO
+
+
+def test_extract_cache_hit_skips_api(stub, tmp_path, label_image):
+    server = stub()
+    cache = LabelCache(str(tmp_path / "labels.sqlite"))
+
+    async def main():
+        try:
+            return [await wine_label_ai2.extract_wine_info_from_image_async(label_image(0), cache=cache)
+                    for _ in range(2)]
+        finally:
+            await wine_label_ai2.close_async_clients()
+
+    first, second = asyncio.run(main())
+    assert second == first
+    assert server.request_count == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes_saved"] > 0
@@ -0,0 +1,67 @@
+"""
+The async label extractor against the local stub of the vision API
+(interface/stub_vision_api.py).
+"""
+import asyncio
+
+from cv_functions import wine_label_ai2
+from interface.stub_vision_api import STUB_WINE_INFO
+
+
+def extract(*images, **kwargs):
+    async def main():
+        try:
+            return [await wine_label_ai2.extract_wine_info_from_image_async(image, **kwargs) for image in images]
+        finally:
+            await wine_label_ai2.close_async_clients()
+
+    return asyncio.run(main())
+
+
+def test_extract_returns_stub_reading(stub, label_image):
+    server = stub()
+    (wine_info,) = extract(label_image(0))
+
+    assert wine_info["extraction_successful"]
+    assert {field: wine_info[field] for field in STUB_WINE_INFO} == STUB_WINE_INFO
+    assert server.request_count == 1
+
+
+def test_extract_retries_rate_limited_request(stub, label_image, monkeypatch):
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_RETRIES", 2)
+    # the second request is answered 429 (retry-after: 1) and retried by the client
+    server = stub(rate_limit_every=2)
+    first, second = extract(label_image(0), label_image(1))
+
+    assert first["extraction_successful"] and second["extraction_successful"]
+    assert server.request_count == 3
+
+
+def test_extract_reports_rate_limit_without_retries(stub, label_image, monkeypatch):
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_RETRIES", 0)
+    stub(rate_limit_every=1)
+    (wine_info,) = extract(label_image(0))
+
+    assert not wine_info["extraction_successful"]
+    assert wine_info["error"]
+
+
+def test_extract_runs_concurrently_within_the_limit(stub, label_image, monkeypatch):
+    monkeypatch.setattr(wine_label_ai2, "API_MAX_CONCURRENCY", 4)
+    server = stub(latency=0.3)
+    images = [label_image(i, size=(100, 80)) for i in range(4)]
+
+    async def main():
+        try:
+            started = asyncio.get_running_loop().time()
+            results = await asyncio.gather(*(wine_label_ai2.extract_wine_info_from_image_async(image)
+                                             for image in images))
+            return results, asyncio.get_running_loop().time() - started
+        finally:
+            await wine_label_ai2.close_async_clients()
+
+    results, seconds = asyncio.run(main())
+    assert all(result["extraction_successful"] for result in results)
+    assert server.request_count == 4
+    # four 0.3 s round-trips overlap instead of adding up
+    assert seconds < 0.9
@@ -0,0 +1,115 @@
+"""
+PhraseMatcher and TrigramIndex against the plain scans they replace in
+WineLabelOCR: nested "variation in text" loops and a Dice score over every term.
+"""
+import random
+
+import pytest
+
+from cv_functions.label_matcher import PhraseMatcher, TrigramIndex, trigrams
+from cv_functions.wine_label_ocr import WineLabelOCR
+
+
+@pytest.fixture(scope="module")
+def ocr():
+    return WineLabelOCR()
+
+
+def grouped(groups):
+    return [(variation, group) for group, variations in groups.items() for variation in variations]
+
+
+def substring_first(groups, text):
+    text = text.lower()
+    for group, variations in groups.items():
+        for variation in variations:
+            if variation.lower() in text:
+                return group
+    return None
+
+
+def random_texts(vocabulary, count=500, seed=0):
+    rng = random.Random(seed)
+    filler = ["estate", "bottled", "by", "reserve", "750ml", "13.5%", "vol", "product", "of", "the", "vineyard"]
+    for _ in range(count):
+        words = rng.choices(filler, k=rng.randint(2, 8)) + rng.sample(vocabulary, rng.randint(0, 3))
+        rng.shuffle(words)
+        text = " ".join(words)
+        yield text.upper() if rng.random() < 0.3 else text
+
+
+@pytest.mark.parametrize("field", ["countries", "wine_types", "nz_producers", "port_producers"])
+def test_first_matches_nested_substring_scan(ocr, field):
+    groups = getattr(ocr, field)
+    matcher = PhraseMatcher(grouped(groups))
+    vocabulary = [variation for variations in groups.values() for variation in variations]
+
+    for text in random_texts(vocabulary):
+        assert matcher.first(text) == substring_first(groups, text), text
+
+
+def test_grapes_match_substring_scan_in_priority_order(ocr):
+    ordered = sorted(ocr.grape_list, key=len, reverse=True)
+    matcher = PhraseMatcher((grape, grape.title()) for grape in ordered)
+
+    for text in random_texts(ocr.grape_list):
+        expected = [grape.title() for grape in ordered if grape in text.lower()]
+        assert matcher.all(text) == expected, text
+
+
+def test_overlapping_phrases_are_all_reported():
+    matcher = PhraseMatcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+
+    assert sorted(matcher.iter_matches("ushers")) == [(1, 4, 1), (2, 4, 0), (2, 6, 3)]
+    assert matcher.all("ushers") == [1, 2, 4]
+
+
+def test_whole_word_phrases_need_word_boundaries():
+    matcher = PhraseMatcher()
+    matcher.add("sancerre", "Sancerre")
+    matcher.add("rioja", "Rioja", whole_word=True)
+
+    assert matcher.first("Sancerres blanc") == "Sancerre"
+    assert matcher.first("Riojana") is None
+    assert matcher.first("Rioja, Spain") == "Rioja"
+    assert matcher.first("Sancerres blanc", whole_word=True) is None
+
+
+def dice_scan(terms, query, min_similarity):
+    query_grams = trigrams(query)
+    best, best_score = None, min_similarity
+    for term, payload in terms:
+        grams = trigrams(term)
+        score = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+        if score > best_score or (best is None and score == best_score):
+            best, best_score = payload, score
+    return (best, best_score) if best is not None else None
+
+
+def misread(word, rng):
+    position = rng.randrange(len(word))
+    edit = rng.choice(["drop", "double", "swap"])
+    if edit == "drop":
+        return word[:position] + word[position + 1:]
+    if edit == "double":
+        return word[:position] + word[position] + word[position:]
+    return word[:position] + rng.choice("ilnrt") + word[position + 1:]
+
+
+def test_trigram_best_matches_full_dice_scan(ocr):
+    terms = grouped(ocr.german_producers)
+    terms += [(grape, grape) for grape in ocr.grape_list]
+    index = TrigramIndex(terms)
+    rng = random.Random(0)
+
+    for _ in range(300):
+        query = misread(rng.choice(terms)[0], rng)
+        assert index.best(query, 0.6) == dice_scan(terms, query, 0.6), query
+
+
+def test_trigram_index_recovers_ocr_misreadings():
+    index = TrigramIndex((grape, grape.title()) for grape in ["riesling", "rioja", "pinot noir", "pinot gris"])
+
+    assert index.best("rieshng", 0.5)[0] == "Riesling"
+    assert index.best("Pinot  Nolr", 0.6)[0] == "Pinot Noir"
+    assert index.best("cabernet", 0.8) is None
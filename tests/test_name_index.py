@@ -0,0 +1,71 @@
+"""
+WineNameIndex: resolving label readings (wine name and/or winery) to
+catalogue rows by trigram similarity.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cv_functions.name_index import WineNameIndex, name_trigrams, normalize_name
+
+CATALOGUE = pd.DataFrame({
+    "WineID": [101, 102, 103, 104, 105],
+    "WineName": ["Château Pétrus", "Reserva", "Gran Reserva", "Sassicaia", None],
+    "WineryName": ["Pétrus", "Marqués de Riscal", "Marqués de Riscal", "Tenuta San Guido", "Cloudy Bay"],
+})
+
+
+@pytest.fixture(scope="module")
+def index():
+    return WineNameIndex(CATALOGUE)
+
+
+def python_dice(a, b):
+    def grams(name):
+        padded = f"  {normalize_name(name)} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    a, b = grams(a), grams(b)
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def test_normalize_name():
+    assert normalize_name("Château Pétrus, Pomerol") == "chateau petrus pomerol"
+    assert normalize_name("  Marqués  de   RISCAL ") == "marques de riscal"
+    assert normalize_name(None) == ""
+
+
+def test_trigram_codes_match_string_trigrams():
+    for name in ["sassicaia", "gran reserva", "ab", "x"]:
+        padded = f"  {name} "
+        assert len(name_trigrams(name)) == len({padded[i:i + 3] for i in range(len(padded) - 2)})
+    assert len(name_trigrams("")) == 0
+
+
+def test_scores_are_dice_similarity(index):
+    scores = index.scores("Sassicaia")
+    expected = [python_dice("Sassicaia", name or "") for name in CATALOGUE["WineName"]]
+    np.testing.assert_allclose(scores[[0, 1, 2, 3]], expected[:4], rtol=1e-6)
+
+
+def test_resolves_exact_and_misread_names(index):
+    assert index.resolve("Sassicaia")["WineID"] == 104
+    assert index.resolve("Chateau Petrus")["WineID"] == 101
+    assert index.resolve("Sassicala")["WineID"] == 104
+
+
+def test_winery_disambiguates_shared_wine_names(index):
+    match = index.resolve("Gran Reserva", winery="Marques de Riscal")
+    assert (match["WineID"], match["score"]) == (103, 1.0)
+    assert index.resolve("Reserva", winery="Marqués de Riscal")["WineID"] == 102
+
+
+def test_winery_alone_matches_rows_without_a_wine_name(index):
+    assert index.resolve(winery="Cloudy Bay")["WineID"] == 105
+
+
+def test_search_ranks_candidates_and_applies_threshold(index):
+    candidates = index.search("Reserva", k=3)
+    assert [c["WineID"] for c in candidates[:2]] == [102, 103]
+    assert candidates == sorted(candidates, key=lambda c: -c["score"])
+    assert index.resolve("Opus One") is None
+    assert index.search() == []
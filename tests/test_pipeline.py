@@ -0,0 +1,143 @@
+"""
+The build's stage runner: caching, early cutoff, forced re-runs and pruning
+of old cache entries, on a three-stage toy pipeline.
+"""
+import json
+import os
+
+import pytest
+
+from cv_functions.pipeline import KEEP_ENTRIES, FileHashes, Pipeline, Stage
+
+CALLS = []
+# read by read_numbers: changes its output without changing its key
+EXTRA = []
+
+
+def read_numbers(path):
+    CALLS.append("read")
+    with open(path) as f:
+        return [int(line) for line in f if line.strip()] + EXTRA
+
+
+def distinct(numbers, scale):
+    CALLS.append("distinct")
+    return sorted({number * scale for number in numbers})
+
+
+def total(values, out_dir):
+    CALLS.append("total")
+    with open(os.path.join(out_dir, "total.txt"), "w") as f:
+        f.write(str(sum(values)))
+    return sum(values)
+
+
+@pytest.fixture
+def build(tmp_path):
+    """build(scale=1) -> a Pipeline over tmp_path/numbers.txt; CALLS is emptied per test."""
+    CALLS.clear()
+    EXTRA.clear()
+    source = tmp_path / "numbers.txt"
+    source.write_text("1\n2\n3\n")
+
+    def make(scale=1):
+        return Pipeline([
+            Stage("read", read_numbers, files={"path": str(source)}),
+            Stage("distinct", distinct, deps=["read"], params={"scale": scale}),
+            Stage("total", total, deps=["distinct"], writes_files=True),
+        ], str(tmp_path / "cache"))
+
+    make.source = source
+    return make
+
+
+def statuses(timings):
+    return {timing["stage"]: timing["status"] for timing in timings}
+
+
+def test_second_run_is_cached(build):
+    first = build().run()
+    CALLS.clear()
+    pipeline = build()
+    second = pipeline.run()
+
+    assert statuses(first) == {"read": "ran", "distinct": "ran", "total": "ran"}
+    assert statuses(second) == {"read": "cached", "distinct": "cached", "total": "cached"}
+    assert CALLS == []
+    assert pipeline.output("total") == 6
+    assert open(os.path.join(pipeline.entry_dir("total"), "total.txt")).read() == "6"
+    with open(os.path.join(pipeline.cache_dir, "runs.jsonl")) as f:
+        assert len(f.readlines()) == 2
+
+
+def test_early_cutoff_when_an_output_is_unchanged(build):
+    build().run()
+    CALLS.clear()
+    # a duplicate changes read's output but not distinct's
+    build.source.write_text("1\n2\n3\n3\n")
+    pipeline = build()
+
+    assert pipeline.stale() == ["read", "distinct", "total"]
+    assert statuses(pipeline.run()) == {"read": "ran", "distinct": "ran", "total": "cached"}
+    assert CALLS == ["read", "distinct"]
+
+
+def test_changed_params_rerun_the_stage_and_what_it_changes(build):
+    build().run()
+    CALLS.clear()
+    pipeline = build(scale=2)
+
+    assert pipeline.stale() == ["distinct", "total"]
+    assert statuses(pipeline.run()) == {"read": "loaded", "distinct": "ran", "total": "ran"}
+    assert pipeline.output("total") == 12
+
+
+def test_forced_stage_with_same_output_leaves_downstream_cached(build):
+    build().run()
+    CALLS.clear()
+
+    assert statuses(build().run(force=["read"])) == {"read": "ran", "distinct": "cached", "total": "cached"}
+    assert CALLS == ["read"]
+
+
+def test_forced_stage_with_new_output_reruns_downstream(build):
+    build().run()
+    CALLS.clear()
+    EXTRA.append(10)
+    pipeline = build()
+
+    assert statuses(pipeline.run(force=["read"])) == {"read": "ran", "distinct": "ran", "total": "ran"}
+    assert pipeline.output("total") == 16
+
+
+def test_old_entries_are_pruned_and_recent_ones_reused(build, tmp_path):
+    for scale in range(1, KEEP_ENTRIES + 3):
+        build(scale=scale).run()
+    entries = os.listdir(tmp_path / "cache" / "distinct")
+
+    assert len(entries) == KEEP_ENTRIES
+    CALLS.clear()
+    # the previous setting is still cached, the first one was pruned
+    assert statuses(build(scale=KEEP_ENTRIES + 1).run(["distinct"]))["distinct"] == "cached"
+    assert statuses(build(scale=1).run(["distinct"]))["distinct"] == "ran"
+
+
+def test_unknown_and_out_of_order_stages_are_rejected(build, tmp_path):
+    with pytest.raises(ValueError, match="not earlier stages"):
+        Pipeline([Stage("distinct", distinct, deps=["read"])], str(tmp_path / "cache"))
+    with pytest.raises(ValueError, match="unknown stage"):
+        build().run(["train"])
+
+
+def test_file_hashes_are_kept_across_runs(tmp_path):
+    data = tmp_path / "data.csv"
+    data.write_text("a,b\n")
+    hashes = FileHashes(str(tmp_path / "file_hashes.json"))
+    digest = hashes.get(str(data))
+    hashes.save()
+
+    assert FileHashes(str(tmp_path / "file_hashes.json")).get(str(data)) == digest
+    assert sorted(os.listdir(tmp_path)) == ["data.csv", "file_hashes.json"]
+    with open(tmp_path / "file_hashes.json") as f:
+        assert list(json.load(f)) == [str(data)]
+    assert hashes.get(str(tmp_path / "missing.csv")) is None
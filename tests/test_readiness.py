@@ -0,0 +1,101 @@
+"""
+Startup probes of the API: /healthz answers at once, /readyz says 503 until
+the artefacts are loaded in the background and 200 after, and other
+requests wait for the load instead of failing.
+"""
+import asyncio
+import threading
+
+import httpx
+import pandas as pd
+import pytest
+
+from API import fast
+from API.bundle import ArtefactBundle
+from API.execution import WorkPool
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """The app with a stand-in load_artifacts that blocks until release is set."""
+    monkeypatch.setattr(fast, "BACKGROUND_STARTUP", True)
+    monkeypatch.setattr(fast, "WARMUP_ROUNDS", 0)
+    monkeypatch.setattr(fast, "RELOAD_POLL", 0)
+    monkeypatch.setattr(fast, "LABEL_ENGINE", "remote")
+    state = {"loaded": False, "loading": None, "startup_timings": {}, "catalogue": ArtefactBundle(),
+             "watcher": None, "recommend_pool": WorkPool("recommend", 1), "image_pool": WorkPool("image", 1)}
+    for name, value in state.items():
+        monkeypatch.setattr(fast.app.state, name, value)
+
+    release = threading.Event()
+    loaded = {"metadata": pd.DataFrame({"WineID": [1, 2, 3]}), "model": object()}
+
+    def load_artifacts():
+        release.wait(5)
+        catalogue = ArtefactBundle()
+        catalogue.wine_metadata_df, catalogue.model = loaded["metadata"], loaded["model"]
+        fast.app.state.catalogue = catalogue
+        fast.app.state.startup_timings["total"] = 0.0
+        fast.app.state.loaded = True
+
+    monkeypatch.setattr(fast, "load_artifacts", load_artifacts)
+    return release, loaded
+
+
+def serve(scenario):
+    """Run scenario(client) with the app's lifespan started, as uvicorn would."""
+    async def main():
+        async with fast.app.router.lifespan_context(fast.app):
+            transport = httpx.ASGITransport(app=fast.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_readyz_503_while_loading_then_200(api):
+    release, _ = api
+
+    async def scenario(client):
+        before = await client.get("/readyz")
+        live = await client.get("/healthz")
+        release.set()
+        await fast.app.state.loading
+        return before, live, await client.get("/readyz")
+
+    before, live, after = serve(scenario)
+    assert before.status_code == 503
+    assert before.json()["status"] == "loading"
+    assert live.status_code == 200
+    assert after.status_code == 200
+    assert after.json()["status"] == "ready"
+    assert after.json()["catalogue"]["rows"] == 3
+
+
+def test_requests_wait_for_startup(api):
+    release, _ = api
+
+    async def scenario(client):
+        held = asyncio.create_task(client.get("/check-model"))
+        await asyncio.sleep(0.1)
+        waiting = not held.done()
+        release.set()
+        return waiting, await held
+
+    waiting, response = serve(scenario)
+    assert waiting
+    assert response.status_code != 503
+
+
+def test_readyz_reports_failed_load(api):
+    release, loaded = api
+    loaded["model"] = None
+    release.set()
+
+    async def scenario(client):
+        await fast.app.state.loading
+        return await client.get("/readyz")
+
+    response = serve(scenario)
+    assert response.status_code == 503
+    assert response.json()["status"] == "failed"
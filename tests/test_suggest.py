@@ -0,0 +1,79 @@
+"""
+PrefixIndex ranking (heaviest first, ties alphabetically, any word start)
+and the /suggest indexes built from the wine metadata.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from cv_functions.name_index import normalize_name
+from cv_functions.suggest import MAX_SUGGESTIONS, PrefixIndex, build_suggesters, suggest
+
+
+def brute_force(terms, prefix, limit):
+    prefix = normalize_name(prefix)
+    matches = {(term, weight) for term, weight in terms
+               if any(" ".join(normalize_name(term).split()[i:]).startswith(prefix)
+                      for i in range(len(normalize_name(term).split())))}
+    return [term for term, _ in sorted(matches, key=lambda match: (-match[1], match[0]))][:limit]
+
+
+def test_heaviest_first_ties_alphabetical():
+    index = PrefixIndex([("Merlot", 5, None), ("Malbec", 9, None), ("Marsanne", 5, None), ("Syrah", 20, None)])
+
+    assert [s["value"] for s in index.complete("m")] == ["Malbec", "Marsanne", "Merlot"]
+    assert index.complete("ma", limit=1) == [{"value": "Malbec", "count": 9}]
+    assert [s["value"] for s in index.complete("")] == ["Syrah", "Malbec", "Marsanne", "Merlot"]
+
+
+def test_matches_every_word_start_after_normalizing():
+    index = PrefixIndex([("Château Margaux", 3, None), ("Margaret River", 7, None), ("Pinot Noir", 1, None)])
+
+    assert [s["value"] for s in index.complete("MARG")] == ["Margaret River", "Château Margaux"]
+    assert [s["value"] for s in index.complete("chateau m")] == ["Château Margaux"]
+    assert index.complete("argaux") == []
+
+
+@pytest.mark.parametrize("heavy_range", [4, 512])
+def test_matches_brute_force_ranking(monkeypatch, heavy_range):
+    # a small HEAVY_RANGE sends most prefixes through the precomputed answers
+    monkeypatch.setattr(PrefixIndex, "HEAVY_RANGE", heavy_range)
+    rng = random.Random(0)
+    words = ["reserva", "rosso", "riesling", "red", "blanc", "brut", "bay", "gran", "grand", "cru"]
+    terms = [(" ".join(rng.sample(words, rng.randint(1, 3))).title() + f" {i}", rng.randint(1, 30))
+             for i in range(300)]
+    index = PrefixIndex((term, weight, None) for term, weight in terms)
+
+    for prefix in ["", "r", "re", "res", "gran", "grand c", "b", "bay", "x", "1"]:
+        for limit in (1, 10, MAX_SUGGESTIONS):
+            assert [s["value"] for s in index.complete(prefix, limit)] == brute_force(terms, prefix, limit), prefix
+
+
+def test_limit_is_capped():
+    index = PrefixIndex((f"Wine {i}", i, None) for i in range(200))
+
+    assert len(index.complete("wine", limit=1000)) == MAX_SUGGESTIONS
+    assert index.complete("wine", limit=-1) == []
+
+
+def test_build_suggesters_from_metadata():
+    metadata = pd.DataFrame({
+        "WineID": [1, 2, 3],
+        "WineName": ["Rioja Reserva", "Rioja Crianza", "Barolo"],
+        "WineryName": ["Muga", "Muga", "Vietti"],
+        "Country": ["Spain", "Spain", "Italy"],
+        "RegionName": ["Rioja", "Rioja", "Barolo"],
+        "Grapes_list": [["Tempranillo"], ["Tempranillo", "Garnacha"], ["Nebbiolo"]],
+        "Harmonize": [["Beef"], ["Lamb", "Beef"], ["Game Meat"]],
+        "rating_count": [50, 120, 80],
+    })
+    suggesters = build_suggesters(metadata)
+
+    assert suggest(suggesters, "grapes", "t") == [{"value": "Tempranillo", "count": 2}]
+    assert suggest(suggesters, "foods", "")[0] == {"value": "Beef", "count": 2}
+    assert suggest(suggesters, "regions", "r") == [{"value": "Rioja", "count": 2, "country": "Spain"}]
+    assert suggest(suggesters, "regions", "r", country="Italy") == []
+    assert [s["WineID"] for s in suggest(suggesters, "wines", "rioja")] == [2, 1]
+    with pytest.raises(KeyError):
+        suggest(suggesters, "vintages", "19")